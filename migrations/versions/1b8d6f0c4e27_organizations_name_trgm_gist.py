@@ -0,0 +1,29 @@
+"""organizations name trigram gist index
+
+Revision ID: 1b8d6f0c4e27
+Revises: e5f7c2a9b813
+Create Date: 2026-10-18 13:40:52.116730
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '1b8d6f0c4e27'
+down_revision: str | Sequence[str] | None = 'e5f7c2a9b813'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # GIN (ix_organizations_name_trgm) serves ILIKE / % filtering; only GiST supports
+    # `name <-> q` distance ordering, which lets top-k fuzzy/suggest queries stop early
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_organizations_name_trgm_gist "
+        "ON organizations USING gist (name gist_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_organizations_name_trgm_gist")
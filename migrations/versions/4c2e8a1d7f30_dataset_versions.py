@@ -0,0 +1,62 @@
+"""dataset versions
+
+Revision ID: 4c2e8a1d7f30
+Revises: bfff833ba1f6
+Create Date: 2026-10-18 10:12:41.203518
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '4c2e8a1d7f30'
+down_revision: str | Sequence[str] | None = 'bfff833ba1f6'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Per-table change counter. Bumped by a statement-level trigger and announced
+    # on the "dataset_versions" channel as "<table>:<version>", so API processes
+    # can invalidate in-memory caches without polling.
+    op.create_table(
+        "dataset_versions",
+        sa.Column("name", sa.String(length=63), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_dataset_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            v bigint;
+        BEGIN
+            INSERT INTO dataset_versions (name, version)
+            VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (name) DO UPDATE SET version = dataset_versions.version + 1
+            RETURNING version INTO v;
+
+            PERFORM pg_notify('dataset_versions', TG_TABLE_NAME || ':' || v);
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+    op.execute("INSERT INTO dataset_versions (name, version) VALUES ('activities', 1)")
+    op.execute(
+        """
+        CREATE TRIGGER trg_activities_dataset_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON activities
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_dataset_version()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_activities_dataset_version ON activities")
+    op.execute("DROP FUNCTION IF EXISTS bump_dataset_version()")
+    op.drop_table("dataset_versions")
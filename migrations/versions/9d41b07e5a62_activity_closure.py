@@ -0,0 +1,140 @@
+"""activity closure table
+
+Revision ID: 9d41b07e5a62
+Revises: 4c2e8a1d7f30
+Create Date: 2026-10-18 11:03:17.548201
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41b07e5a62'
+down_revision: str | Sequence[str] | None = '4c2e8a1d7f30'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # (ancestor, descendant, distance) for every pair on a path, self-pairs included,
+    # so "activity with all descendants" is a single PK range scan
+    op.create_table(
+        "activity_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.SmallInteger(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["ancestor_id"],
+            ["activities.id"],
+            name="fk_activity_closure_ancestor_id_activities",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["descendant_id"],
+            ["activities.id"],
+            name="fk_activity_closure_descendant_id_activities",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id", name="pk_activity_closure"),
+    )
+    op.create_index(
+        "ix_activity_closure_descendant_id",
+        "activity_closure",
+        ["descendant_id"],
+        unique=False,
+    )
+
+    # backfill from the adjacency list
+    op.execute(
+        """
+        WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM activities
+            UNION ALL
+            SELECT p.ancestor_id, a.id, p.depth + 1
+            FROM paths p
+            JOIN activities a ON a.parent_id = p.descendant_id
+        )
+        INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM paths
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION activity_closure_on_insert() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, NEW.id, depth + 1
+            FROM activity_closure
+            WHERE descendant_id = NEW.parent_id
+            UNION ALL
+            SELECT NEW.id, NEW.id, 0;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION activity_closure_on_move() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF NEW.parent_id IS NOT NULL AND EXISTS (
+                SELECT 1 FROM activity_closure
+                WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+            ) THEN
+                RAISE EXCEPTION 'activity % cannot be moved under its own descendant %',
+                    NEW.id, NEW.parent_id;
+            END IF;
+
+            -- detach the subtree from its former ancestors
+            DELETE FROM activity_closure c
+            USING activity_closure sub, activity_closure sup
+            WHERE sub.ancestor_id = NEW.id
+              AND sup.descendant_id = NEW.id
+              AND sup.ancestor_id <> NEW.id
+              AND c.ancestor_id = sup.ancestor_id
+              AND c.descendant_id = sub.descendant_id;
+
+            -- attach it under the new parent's ancestors
+            INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+            SELECT sup.ancestor_id, sub.descendant_id, sup.depth + sub.depth + 1
+            FROM activity_closure sup
+            JOIN activity_closure sub ON sub.ancestor_id = NEW.id
+            WHERE sup.descendant_id = NEW.parent_id;
+
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_activities_closure_insert
+        AFTER INSERT ON activities
+        FOR EACH ROW EXECUTE FUNCTION activity_closure_on_insert()
+        """
+    )
+    # also fires for ON DELETE SET NULL of a removed parent: children become roots
+    op.execute(
+        """
+        CREATE TRIGGER trg_activities_closure_move
+        AFTER UPDATE OF parent_id ON activities
+        FOR EACH ROW
+        WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+        EXECUTE FUNCTION activity_closure_on_move()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_activities_closure_move ON activities")
+    op.execute("DROP TRIGGER IF EXISTS trg_activities_closure_insert ON activities")
+    op.execute("DROP FUNCTION IF EXISTS activity_closure_on_move()")
+    op.execute("DROP FUNCTION IF EXISTS activity_closure_on_insert()")
+
+    op.drop_index("ix_activity_closure_descendant_id", table_name="activity_closure")
+    op.drop_table("activity_closure")
@@ -0,0 +1,65 @@
+"""dataset version trigger skips bulk loads
+
+Revision ID: a3f6d2c8e915
+Revises: c7d3e9f1a5b2
+Create Date: 2026-10-18 16:05:27.481903
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f6d2c8e915'
+down_revision: str | Sequence[str] | None = 'c7d3e9f1a5b2'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # The bump locks the table's dataset_versions row until commit, so parallel
+    # bulk-load connections would queue on it. Loaders set app.bulk_load = on and
+    # bump each table once after their last commit (app.db.versions.bump_versions).
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_dataset_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            v bigint;
+        BEGIN
+            IF current_setting('app.bulk_load', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+
+            INSERT INTO dataset_versions (name, version)
+            VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (name) DO UPDATE SET version = dataset_versions.version + 1
+            RETURNING version INTO v;
+
+            PERFORM pg_notify('dataset_versions', TG_TABLE_NAME || ':' || v);
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_dataset_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            v bigint;
+        BEGIN
+            INSERT INTO dataset_versions (name, version)
+            VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (name) DO UPDATE SET version = dataset_versions.version + 1
+            RETURNING version INTO v;
+
+            PERFORM pg_notify('dataset_versions', TG_TABLE_NAME || ':' || v);
+            RETURN NULL;
+        END
+        $$
+        """
+    )
@@ -0,0 +1,41 @@
+"""dataset version triggers for buildings and organizations
+
+Revision ID: c7d3e9f1a5b2
+Revises: 1b8d6f0c4e27
+Create Date: 2026-10-18 13:41:08.617342
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d3e9f1a5b2'
+down_revision: str | Sequence[str] | None = '1b8d6f0c4e27'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+TABLES = ("buildings", "organizations", "organization_phones", "organization_activities")
+
+
+def upgrade() -> None:
+    # HTTP validators (ETag) are derived from these counters, so every table an
+    # endpoint reads from needs one
+    for table in TABLES:
+        op.execute(
+            f"INSERT INTO dataset_versions (name, version) VALUES ('{table}', 1) "
+            "ON CONFLICT (name) DO NOTHING"
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_dataset_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_dataset_version()
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_dataset_version ON {table}")
+        op.execute(f"DELETE FROM dataset_versions WHERE name = '{table}'")
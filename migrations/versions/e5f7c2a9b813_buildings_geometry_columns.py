@@ -0,0 +1,40 @@
+"""buildings stored geometry and lat/lon
+
+Revision ID: e5f7c2a9b813
+Revises: 9d41b07e5a62
+Create Date: 2026-10-18 12:26:09.871443
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f7c2a9b813'
+down_revision: str | Sequence[str] | None = '9d41b07e5a62'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Planar copy of the geography point for bbox / tile queries, plus lat/lon,
+    # all derived from `geom` so writers keep inserting geography only.
+    op.execute(
+        """
+        ALTER TABLE buildings
+            ADD COLUMN geom_pt geometry(POINT, 4326)
+                GENERATED ALWAYS AS (geom::geometry) STORED NOT NULL,
+            ADD COLUMN lat double precision
+                GENERATED ALWAYS AS (ST_Y(geom::geometry)) STORED NOT NULL,
+            ADD COLUMN lon double precision
+                GENERATED ALWAYS AS (ST_X(geom::geometry)) STORED NOT NULL
+        """
+    )
+
+    # the existing gist index is on geography and cannot serve geometry && / ST_Intersects
+    op.execute("CREATE INDEX IF NOT EXISTS ix_buildings_geom_pt_gist ON buildings USING gist (geom_pt)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_buildings_geom_pt_gist")
+    op.execute("ALTER TABLE buildings DROP COLUMN lon, DROP COLUMN lat, DROP COLUMN geom_pt")
@@ -3,15 +3,21 @@ from __future__ import annotations
 from fastapi import Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.errors import AuthError
+from app.core.errors import AuthError, NotFoundError, ValidationError
 from app.core.settings import get_settings
-from app.db.session import get_session
+from app.db.session import ReadSessionMaker, get_session, get_suggest_session
 from app.repos.activities import ActivitiesRepo
 from app.repos.buildings import BuildingsRepo
+from app.repos.dto import PageParams
 from app.repos.organizations import OrganizationsRepo
+from app.schemas.common import Pagination
 from app.services.activities import ActivitiesService
 from app.services.buildings import BuildingsService
+from app.services.export import ExportService
 from app.services.organizations import OrganizationsService
+from app.services.result_cache import ResultCache, get_result_cache, get_tile_cache
+from app.services.taxonomy import TaxonomyCache, taxonomy_cache
+from app.services.tiles import TilesService
 
 
 async def verify_api_key(x_api_key: str | None = Header(default=None, alias="X-API-Key")) -> None:
@@ -19,7 +25,31 @@ async def verify_api_key(x_api_key: str | None = Header(default=None, alias="X-A
         raise AuthError(message="Invalid API key", code="INVALID_API_KEY")
 
 
-SessionDep = Depends(get_session)
+async def verify_admin_key(x_admin_key: str | None = Header(default=None, alias="X-Admin-Key")) -> None:
+    # admin endpoints expose SQL text and plans: off unless a separate key is configured
+    admin_api_key = get_settings().admin_api_key
+    if admin_api_key is None:
+        raise NotFoundError(message="Not found")
+    if x_admin_key != admin_api_key:
+        raise AuthError(message="Invalid admin key", code="INVALID_ADMIN_KEY")
+
+
+def get_page_params(pg: Pagination = Depends()) -> PageParams:
+    if pg.cursor is not None and pg.offset:
+        raise ValidationError(
+            message="Specify either cursor or offset, not both",
+            code="PAGINATION_INVALID",
+        )
+    # clients keep the first page's total; recounting on every cursor page would
+    # scan the whole filtered set each time
+    total = pg.include_total or ("none" if pg.cursor is not None else "exact")
+    return PageParams(limit=pg.limit, offset=pg.offset, cursor=pg.cursor, total=total)
+
+
+# Function scope: the session is closed (connection back in the pool) as soon as the
+# route returns, before the response is encoded and sent. AsyncSession checks out a
+# connection only on its first query, so rejected or cache-served requests never do.
+SessionDep = Depends(get_session, scope="function")
 
 
 def get_activities_repo(session: AsyncSession = SessionDep) -> ActivitiesRepo:
@@ -34,19 +64,50 @@ def get_organizations_repo(session: AsyncSession = SessionDep) -> OrganizationsR
     return OrganizationsRepo(session)
 
 
-def get_activities_service(repo: ActivitiesRepo = Depends(get_activities_repo)) -> ActivitiesService:
-    return ActivitiesService(repo)
+def get_taxonomy() -> TaxonomyCache:
+    return taxonomy_cache
+
+
+def get_activities_service(
+    repo: ActivitiesRepo = Depends(get_activities_repo),
+    taxonomy: TaxonomyCache = Depends(get_taxonomy),
+) -> ActivitiesService:
+    return ActivitiesService(repo, taxonomy)
 
 
 def get_organizations_service(
     orgs: OrganizationsRepo = Depends(get_organizations_repo),
     acts: ActivitiesRepo = Depends(get_activities_repo),
+    taxonomy: TaxonomyCache = Depends(get_taxonomy),
+    cache: ResultCache = Depends(get_result_cache),
 ) -> OrganizationsService:
-    return OrganizationsService(orgs=orgs, acts=acts)
+    return OrganizationsService(orgs=orgs, acts=acts, taxonomy=taxonomy, cache=cache)
+
+
+def get_suggest_service(
+    session: AsyncSession = Depends(get_suggest_session, scope="function"),
+    taxonomy: TaxonomyCache = Depends(get_taxonomy),
+) -> OrganizationsService:
+    # on the suggest pool: its connections carry the autocomplete statement timeout
+    return OrganizationsService(orgs=OrganizationsRepo(session), acts=ActivitiesRepo(session), taxonomy=taxonomy)
 
 
 def get_buildings_service(
     buildings: BuildingsRepo = Depends(get_buildings_repo),
     orgs: OrganizationsRepo = Depends(get_organizations_repo),
+    cache: ResultCache = Depends(get_result_cache),
 ) -> BuildingsService:
-    return BuildingsService(buildings=buildings, orgs=orgs)
+    return BuildingsService(buildings=buildings, orgs=orgs, cache=cache)
+
+
+def get_export_service() -> ExportService:
+    return ExportService(ReadSessionMaker, batch_size=get_settings().export_batch_size)
+
+
+def get_tiles_service(
+    orgs: OrganizationsRepo = Depends(get_organizations_repo),
+    acts: ActivitiesRepo = Depends(get_activities_repo),
+    taxonomy: TaxonomyCache = Depends(get_taxonomy),
+    cache: ResultCache = Depends(get_tile_cache),
+) -> TilesService:
+    return TilesService(orgs=orgs, acts=acts, taxonomy=taxonomy, cache=cache)
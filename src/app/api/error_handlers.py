@@ -3,6 +3,7 @@ from __future__ import annotations
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
+from app.api.metrics import metrics
 from app.core.errors import AppError, AuthError, NotFoundError, ValidationError
 from app.schemas.errors import ProblemDetails
 
@@ -11,6 +12,7 @@ def install_error_handlers(app: FastAPI) -> None:
     @app.exception_handler(AppError)
     async def handle_app_error(request: Request, exc: AppError) -> JSONResponse:
         status = _map_status(exc)
+        metrics.errors[exc.code] += 1
         problem = ProblemDetails(
             title=_map_title(exc),
             status=status,
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import SessionDep
+from app.core.settings import get_settings
+from app.db.versions import versions
+
+# Tables behind an organization card (phones and activity names included).
+CARD_TABLES = ("organizations", "organization_phones", "organization_activities", "activities")
+
+
+def etag_for(snapshot: dict[str, int]) -> str:
+    """
+    Weak validator over table versions: equal versions mean an equal response body.
+    """
+    raw = ",".join(f"{name}:{version}" for name, version in sorted(snapshot.items()))
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison (RFC 9110 13.1.2): opaque tags compared without W/
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def cache_control(*, max_age_s: int, stale_while_revalidate_s: int) -> str:
+    scope = "public" if get_settings().http_cache_public else "private"
+    return f"{scope}, max-age={max_age_s}, stale-while-revalidate={stale_while_revalidate_s}"
+
+
+def conditional(
+    *tables: str,
+    max_age_s: int | None = None,
+    stale_while_revalidate_s: int | None = None,
+) -> Any:
+    """
+    Route dependency: ETag from the versions of `tables`, 304 on If-None-Match.
+
+    The validator is computed before the handler runs, so a revalidation hit never
+    executes the route query (and does not touch the database while the
+    dataset-versions listener is live and reads go to the primary).
+    """
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        session: AsyncSession = SessionDep,
+    ) -> None:
+        settings = get_settings()
+        etag = etag_for(await versions.snapshot(session, tables))
+        headers = {
+            "ETag": etag,
+            "Cache-Control": cache_control(
+                max_age_s=settings.http_cache_max_age_s if max_age_s is None else max_age_s,
+                stale_while_revalidate_s=(
+                    settings.http_cache_stale_while_revalidate_s
+                    if stale_while_revalidate_s is None
+                    else stale_while_revalidate_s
+                ),
+            ),
+            "Vary": "X-API-Key",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(dependency)
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import bisect
+import time
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from dataclasses import asdict, dataclass, field
+
+from fastapi.routing import APIRoute
+from sqlalchemy.engine.interfaces import CacheStats as CompiledCacheOutcome
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.pool import pool_snapshot
+from app.db.statement_cache import cache_outcomes
+from app.services.result_cache import get_result_cache
+
+# upper bounds (s) of the request latency buckets; the last bucket is +Inf
+LATENCY_BUCKETS_S: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+UNMATCHED_PATH = "<unmatched>"
+
+
+@dataclass(slots=True)
+class RouteMetrics:
+    """
+    Counters of one (method, route template); plain list increments, no locks
+    (all updates happen on the event loop thread).
+    """
+
+    method: str
+    path: str
+    statuses: list[int] = field(default_factory=lambda: [0] * len(STATUS_CLASSES))
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_S) + 1))
+    sum_s: float = 0.0
+
+    def observe(self, status: int, seconds: float) -> None:
+        self.statuses[min(max(status // 100, 1), 5) - 1] += 1
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_S, seconds)] += 1
+        self.sum_s += seconds
+
+
+class Metrics:
+    """
+    Process-wide request metrics. Label sets are registered once from the app's
+    routes, so recording is a dict lookup plus a few increments.
+    """
+
+    def __init__(self) -> None:
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.unmatched = RouteMetrics(method="ANY", path=UNMATCHED_PATH)
+        self.in_flight = 0
+        self.errors: Counter[str] = Counter()
+
+    def register_routes(self, routes: Iterable[BaseRoute]) -> None:
+        for route in routes:
+            if isinstance(route, APIRoute):
+                for method in sorted(route.methods):
+                    self.routes.setdefault((method, route.path), RouteMetrics(method=method, path=route.path))
+
+    def for_scope(self, scope: Scope) -> RouteMetrics:
+        # FastAPI leaves the matched route in the scope
+        route = scope.get("route")
+        if not isinstance(route, APIRoute):
+            return self.unmatched
+        return self.routes.get((scope["method"], route.path), self.unmatched)
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """
+    Records in-flight requests and, once the body is sent, latency and status per route.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            metrics.errors["UNHANDLED"] += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+            metrics.for_scope(scope).observe(status, time.perf_counter() - started)
+
+
+def _labels(**labels: str) -> str:
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"') for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped, strict=True)) + "}"
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else f"{bound:g}"
+
+
+def _request_lines() -> list[str]:
+    lines = [
+        "# HELP http_requests_total Requests by route and status class.",
+        "# TYPE http_requests_total counter",
+    ]
+    routes = [*metrics.routes.values(), metrics.unmatched]
+    for r in routes:
+        for status, n in zip(STATUS_CLASSES, r.statuses, strict=True):
+            lines.append(f"http_requests_total{_labels(method=r.method, route=r.path, status=status)} {n}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Request latency, including sending the body.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for r in routes:
+        running = 0
+        for bound, n in zip((*LATENCY_BUCKETS_S, float("inf")), r.buckets, strict=True):
+            running += n
+            labels = _labels(method=r.method, route=r.path, le=_le(bound))
+            lines.append(f"http_request_duration_seconds_bucket{labels} {running}")
+        labels = _labels(method=r.method, route=r.path)
+        lines.append(f"http_request_duration_seconds_sum{labels} {r.sum_s:.6f}")
+        lines.append(f"http_request_duration_seconds_count{labels} {running}")
+
+    lines += [
+        "# HELP http_requests_in_flight Requests being handled.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {metrics.in_flight}",
+        "# HELP app_errors_total Error responses by AppError code.",
+        "# TYPE app_errors_total counter",
+    ]
+    lines += [f"app_errors_total{_labels(code=code)} {n}" for code, n in sorted(metrics.errors.items())]
+    return lines
+
+
+def _pool_lines(engines: Sequence[AsyncEngine]) -> list[str]:
+    snapshots = [pool_snapshot(e.sync_engine) for e in engines]
+    lines = []
+    for name, help_text in (
+        ("size", "Configured persistent connections."),
+        ("checked_out", "Connections in use."),
+        ("checked_in", "Idle connections in the pool."),
+        ("overflow", "Connections open beyond the pool size."),
+        ("max_overflow", "Allowed overflow connections."),
+    ):
+        lines += [f"# HELP db_pool_{name} {help_text}", f"# TYPE db_pool_{name} gauge"]
+        lines += [f"db_pool_{name}{_labels(pool=s.name)} {getattr(s, name)}" for s in snapshots]
+
+    lines += [
+        "# HELP db_pool_wait_seconds Time spent waiting for a pooled connection.",
+        "# TYPE db_pool_wait_seconds histogram",
+    ]
+    for s in snapshots:
+        for bound_ms, n in s.wait_buckets_ms.items():
+            le = bound_ms if bound_ms == "+Inf" else _le(float(bound_ms) / 1000)
+            lines.append(f"db_pool_wait_seconds_bucket{_labels(pool=s.name, le=le)} {n}")
+        lines.append(f"db_pool_wait_seconds_sum{_labels(pool=s.name)} {s.wait_total_ms / 1000:.6f}")
+        lines.append(f"db_pool_wait_seconds_count{_labels(pool=s.name)} {s.waits}")
+
+    lines += ["# HELP db_pool_timeouts_total Checkouts that gave up waiting.", "# TYPE db_pool_timeouts_total counter"]
+    lines += [f"db_pool_timeouts_total{_labels(pool=s.name)} {s.timeouts}" for s in snapshots]
+    return lines
+
+
+def _ratio(hits: int, total: int) -> str:
+    return f"{hits / total:.4f}" if total else "NaN"
+
+
+def _cache_lines() -> list[str]:
+    result_cache = get_result_cache()
+    stats = asdict(result_cache.stats)
+    lookups = stats["hits"] + stats["misses"] + stats["expired"] + stats["invalidated"]
+    lines = [
+        "# HELP result_cache_events_total Result cache lookups by outcome, and evictions.",
+        "# TYPE result_cache_events_total counter",
+    ]
+    lines += [f"result_cache_events_total{_labels(event=k)} {v}" for k, v in stats.items()]
+    lines += [
+        "# HELP result_cache_hit_ratio Hits over all lookups since start.",
+        "# TYPE result_cache_hit_ratio gauge",
+        f"result_cache_hit_ratio {_ratio(stats['hits'], lookups)}",
+        "# HELP result_cache_entries Entries currently cached.",
+        "# TYPE result_cache_entries gauge",
+        f"result_cache_entries {len(result_cache)}",
+    ]
+
+    hit = cache_outcomes[CompiledCacheOutcome.CACHE_HIT]
+    miss = cache_outcomes[CompiledCacheOutcome.CACHE_MISS]
+    lines += [
+        "# HELP sqlalchemy_compiled_cache_total Executed statements by compiled-cache outcome.",
+        "# TYPE sqlalchemy_compiled_cache_total counter",
+    ]
+    lines += [
+        f"sqlalchemy_compiled_cache_total{_labels(outcome=o.name.lower())} {n}"
+        for o, n in sorted(cache_outcomes.items(), key=lambda kv: kv[0].name)
+    ]
+    lines += [
+        "# HELP sqlalchemy_compiled_cache_hit_ratio Hits over cacheable statements since start.",
+        "# TYPE sqlalchemy_compiled_cache_hit_ratio gauge",
+        f"sqlalchemy_compiled_cache_hit_ratio {_ratio(hit, hit + miss)}",
+    ]
+    return lines
+
+
+def render_metrics(engines: Sequence[AsyncEngine]) -> str:
+    """
+    Prometheus text exposition (format 0.0.4) of request, pool and cache metrics.
+    """
+    return "\n".join([*_request_lines(), *_pool_lines(engines), *_cache_lines()]) + "\n"
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import Response
+from pydantic_core import to_json
+from starlette.types import Receive, Scope, Send
+
+
+class DTOResponse(Response):
+    """
+    JSON response encoded from DTOs when it is sent, not when it is created.
+
+    Routes return it before their function-scoped dependencies exit, so the
+    database connection is already back in the pool while the body is encoded.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, headers: list[tuple[bytes, bytes]]) -> None:
+        super().__init__(content=b"")
+        self.content = content
+        self.raw_headers.extend(headers)
+
+    def encode(self) -> bytes:
+        self.body = to_json(self.content)
+        self.headers["content-length"] = str(len(self.body))
+        return self.body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.encode()
+        await super().__call__(scope, receive, send)
+
+
+def dto_response(content: Any, response: Response) -> DTOResponse:
+    """
+    Encodes repo/service DTOs (slotted dataclasses, Page, lists) straight to JSON bytes.
+
+    Skips the dataclass -> dict -> model -> response_model re-validation round trip;
+    the route's `response_model` still documents the shape, and the DTO fields mirror
+    the schema fields one to one. `response` is the route's injected Response:
+    headers set on it by dependencies (ETag, Cache-Control) are carried over.
+    """
+    return DTOResponse(content, response.headers.raw)
@@ -3,11 +3,17 @@ from __future__ import annotations
 from fastapi import APIRouter
 
 from app.api.v1.activities import router as activities_router
+from app.api.v1.admin import router as admin_router
 from app.api.v1.buildings import router as buildings_router
+from app.api.v1.export import router as export_router
 from app.api.v1.organizations import router as organizations_router
+from app.api.v1.tiles import router as tiles_router
 
 router = APIRouter(prefix="/api/v1")
 
 router.include_router(organizations_router, prefix="/organizations", tags=["organizations"])
 router.include_router(buildings_router, prefix="/buildings", tags=["buildings"])
 router.include_router(activities_router, prefix="/activities", tags=["activities"])
+router.include_router(tiles_router, prefix="/tiles", tags=["tiles"])
+router.include_router(export_router, prefix="/export", tags=["export"])
+router.include_router(admin_router, prefix="/admin", tags=["admin"])
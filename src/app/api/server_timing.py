@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.query_stats import QueryStats, current_stats
+
+log = logging.getLogger(__name__)
+
+
+def server_timing(stats: QueryStats, *, total_ms: float) -> str:
+    return (
+        f'db;dur={stats.db_ms:.2f};desc="{stats.statements} statements, {stats.rows} rows", '
+        f"pool;dur={stats.pool_wait_ms:.2f}, "
+        f"total;dur={total_ms:.2f}"
+    )
+
+
+class ServerTimingMiddleware:
+    """
+    Collects per-request DB stats (see app.db.query_stats), sends them in a
+    Server-Timing header, logs one line per request, and warns about requests
+    over the statement budget or repeating one statement (N+1).
+
+    The header goes out with the response start, so for streamed bodies it covers
+    only the work done before the first chunk; the log line covers everything.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        header: bool,
+        budget: int,
+        repeat_warn: int,
+    ) -> None:
+        self.app = app
+        self.header = header
+        self.budget = budget
+        self.repeat_warn = repeat_warn
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(origin=f"{scope['method']} {scope['path']}")
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.header:
+                    total_ms = (time.perf_counter() - started) * 1000
+                    MutableHeaders(scope=message).append("Server-Timing", server_timing(stats, total_ms=total_ms))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            self._report(scope, status, stats, total_ms=(time.perf_counter() - started) * 1000)
+
+    def _report(self, scope: Scope, status: int, stats: QueryStats, *, total_ms: float) -> None:
+        method, path = scope["method"], scope["path"]
+        log.info(
+            "%s %s status=%d total_ms=%.2f statements=%d db_ms=%.2f rows=%d pool_wait_ms=%.2f",
+            method,
+            path,
+            status,
+            total_ms,
+            stats.statements,
+            stats.db_ms,
+            stats.rows,
+            stats.pool_wait_ms,
+            extra={
+                "method": method,
+                "path": path,
+                "status": status,
+                "total_ms": round(total_ms, 2),
+                "statements": stats.statements,
+                "db_ms": round(stats.db_ms, 2),
+                "rows": stats.rows,
+                "pool_wait_ms": round(stats.pool_wait_ms, 2),
+            },
+        )
+
+        if self.budget and stats.statements > self.budget:
+            log.warning("%s %s ran %d SQL statements (budget %d)", method, path, stats.statements, self.budget)
+        statement, repeats = stats.most_repeated()
+        if self.repeat_warn and repeats >= self.repeat_warn:
+            log.warning(
+                "%s %s ran the same statement %d times (possible N+1): %s",
+                method,
+                path,
+                repeats,
+                " ".join(statement.split())[:200],
+            )
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+ExportFormat = Literal["ndjson", "csv"]
+
+# rows are coalesced into chunks of about this size before being sent
+CHUNK_BYTES = 64 * 1024
+
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    return value
+
+
+async def encode_rows(
+    rows: AsyncIterator[Any],
+    *,
+    fmt: ExportFormat,
+    columns: Sequence[str],
+) -> AsyncIterator[bytes]:
+    buf = bytearray()
+    if fmt == "csv":
+        line = io.StringIO()
+        writer = csv.writer(line)
+        writer.writerow(columns)
+
+    async for row in rows:
+        if fmt == "csv":
+            writer.writerow([_csv_value(getattr(row, c)) for c in columns])
+            buf += line.getvalue().encode()
+            line.seek(0)
+            line.truncate()
+        else:
+            buf += to_json(row)
+            buf += b"\n"
+        if len(buf) >= CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+
+    if fmt == "csv" and line.tell():
+        buf += line.getvalue().encode()
+    if buf:
+        yield bytes(buf)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    z = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def export_response(
+    rows: AsyncIterator[Any],
+    *,
+    fmt: ExportFormat,
+    columns: Sequence[str],
+    filename: str,
+    gzip: bool,
+) -> StreamingResponse:
+    body = encode_rows(rows, fmt=fmt, columns=columns)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    if gzip:
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
@@ -1,44 +1,42 @@
 from __future__ import annotations
 
-from dataclasses import asdict
+from fastapi import APIRouter, Depends, Query, Response
 
-from fastapi import APIRouter, Depends, Query
-
-from app.api.deps import get_activities_service, verify_api_key
+from app.api.deps import get_activities_service, get_page_params, verify_api_key
+from app.api.http_cache import conditional
+from app.api.responses import dto_response
+from app.repos.dto import PageParams
 from app.schemas.activity import ActivityNode, ActivityOut
-from app.schemas.common import ListResponse, Pagination
+from app.schemas.common import ListResponse
 from app.services.activities import ActivitiesService
 
 router = APIRouter(dependencies=[Depends(verify_api_key)])
 
 
-@router.get("", response_model=ListResponse[ActivityOut])
+@router.get(
+    "",
+    response_model=ListResponse[ActivityOut],
+    dependencies=[conditional("activities", max_age_s=300)],
+)
 async def list_activities(
-    pg: Pagination = Depends(),
+    response: Response,
+    pg: PageParams = Depends(get_page_params),
     svc: ActivitiesService = Depends(get_activities_service),
     max_depth: int = Query(default=3, ge=1, le=3),
-) -> ListResponse[ActivityOut]:
-    page = await svc.list(limit=pg.limit, offset=pg.offset, max_depth=max_depth)
-    return ListResponse(
-        total=page.total,
-        items=[ActivityOut(**asdict(a)) for a in page.items],
-    )
+) -> Response:
+    page = await svc.list(page=pg, max_depth=max_depth)
+    return dto_response(page, response)
 
 
-@router.get("/tree", response_model=list[ActivityNode])
+@router.get(
+    "/tree",
+    response_model=list[ActivityNode],
+    dependencies=[conditional("activities", max_age_s=300)],
+)
 async def activities_tree(
+    response: Response,
     svc: ActivitiesService = Depends(get_activities_service),
     max_depth: int = Query(default=3, ge=1, le=3),
-) -> list[ActivityNode]:
-    tree = await svc.tree(max_depth=max_depth)
-
-    def map_node(n) -> ActivityNode:
-        return ActivityNode(
-            id=n.id,
-            name=n.name,
-            parent_id=n.parent_id,
-            depth=n.depth,
-            children=[map_node(c) for c in n.children],
-        )
-
-    return [map_node(n) for n in tree]
+) -> Response:
+    # ActivityNodeDTO mirrors ActivityNode, children included
+    return dto_response(await svc.tree(max_depth=max_depth), response)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Response
+
+from app.api.deps import verify_admin_key
+from app.api.responses import dto_response
+from app.core.settings import get_settings
+from app.db.pool import pool_snapshot
+from app.db.session import all_engines, engine, slow_queries
+from app.db.statement_cache import statement_cache_snapshot
+from app.schemas.admin import PoolStatsOut, SlowQueryOut, StatementCacheOut
+
+router = APIRouter(dependencies=[Depends(verify_admin_key)])
+
+
+@router.get("/pool", response_model=list[PoolStatsOut])
+async def pool_stats(response: Response) -> Response:
+    return dto_response([pool_snapshot(e.sync_engine) for e in all_engines()], response)
+
+
+@router.get("/statements", response_model=StatementCacheOut)
+async def statement_cache_stats(response: Response) -> Response:
+    snapshot = statement_cache_snapshot(
+        engine.sync_engine, prepare_threshold=get_settings().db_prepare_threshold
+    )
+    return dto_response(snapshot, response)
+
+
+@router.get("/slow-queries", response_model=list[SlowQueryOut])
+async def recent_slow_queries(response: Response) -> Response:
+    return dto_response(slow_queries.recent(), response)
@@ -1,38 +1,62 @@
 from __future__ import annotations
 
-from dataclasses import asdict
+from typing import Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 
-from app.api.deps import get_buildings_service, verify_api_key
-from app.schemas.building import BuildingOut
-from app.schemas.common import ListResponse, Pagination
-from app.schemas.organization import OrganizationOut
+from app.api.deps import get_buildings_service, get_page_params, verify_api_key
+from app.api.http_cache import CARD_TABLES, conditional
+from app.api.responses import dto_response
+from app.repos.dto import PageParams
+from app.schemas.building import BuildingGeoOut, BuildingOut
+from app.schemas.common import ListResponse
+from app.schemas.organization import OrganizationCardOut, OrganizationOut
 from app.services.buildings import BuildingsService
 
 router = APIRouter(dependencies=[Depends(verify_api_key)])
 
 
-@router.get("", response_model=ListResponse[BuildingOut])
+@router.get("", response_model=ListResponse[BuildingOut], dependencies=[conditional("buildings")])
 async def list_buildings(
-    pg: Pagination = Depends(),
+    response: Response,
+    pg: PageParams = Depends(get_page_params),
     svc: BuildingsService = Depends(get_buildings_service),
-) -> ListResponse[BuildingOut]:
-    page = await svc.list(limit=pg.limit, offset=pg.offset)
-    return ListResponse(
-        total=page.total,
-        items=[BuildingOut(**asdict(b)) for b in page.items],
-    )
+) -> Response:
+    return dto_response(await svc.list(page=pg), response)
+
+
+@router.get(
+    "/nearest",
+    response_model=list[BuildingGeoOut],
+    dependencies=[conditional("buildings")],
+)
+async def nearest_buildings(
+    response: Response,
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    k: int = Query(default=1, ge=1, le=100),
+    max_radius_m: float | None = Query(default=None, gt=0),
+    svc: BuildingsService = Depends(get_buildings_service),
+) -> Response:
+    rows = await svc.nearest(lat=lat, lon=lon, k=k, max_radius_m=max_radius_m)
+    return dto_response(rows, response)
 
 
-@router.get("/{building_id}/organizations", response_model=ListResponse[OrganizationOut])
+@router.get(
+    "/{building_id}/organizations",
+    response_model=ListResponse[OrganizationCardOut] | ListResponse[OrganizationOut],
+    dependencies=[conditional(*CARD_TABLES)],
+)
 async def list_building_orgs(
     building_id: int,
-    pg: Pagination = Depends(),
+    response: Response,
+    pg: PageParams = Depends(get_page_params),
     svc: BuildingsService = Depends(get_buildings_service),
-) -> ListResponse[OrganizationOut]:
-    page = await svc.organizations(building_id=building_id, limit=pg.limit, offset=pg.offset)
-    return ListResponse(
-        total=page.total,
-        items=[OrganizationOut(**asdict(o)) for o in page.items],
-    )
+    expand: Literal["card"] | None = Query(
+        default=None, description="`card` returns full organization cards inline"
+    ),
+) -> Response:
+    page = await svc.organizations(building_id=building_id, page=pg)
+    if expand == "card":
+        return dto_response(await svc.with_cards(page), response)
+    return dto_response(page, response)
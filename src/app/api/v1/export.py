@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from dataclasses import fields
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_export_service, verify_api_key
+from app.api.streaming import ExportFormat, export_response
+from app.repos.dto import ActivityRow, BuildingRow, OrganizationExportRow
+from app.services.export import ExportService
+from app.services.organizations import GeoQuery
+
+router = APIRouter(dependencies=[Depends(verify_api_key)])
+
+FormatQuery = Query(default="ndjson", description="`ndjson` (one JSON object per line) or `csv`")
+GzipQuery = Query(default=False, description="gzip the body (Content-Encoding: gzip)")
+
+
+def _columns(dto: type) -> list[str]:
+    return [f.name for f in fields(dto)]
+
+
+@router.get("/organizations", response_class=StreamingResponse)
+async def export_organizations(
+    svc: ExportService = Depends(get_export_service),
+    format: ExportFormat = FormatQuery,
+    gzip: bool = GzipQuery,
+    name: str | None = Query(default=None, min_length=1),
+    match: Literal["contains", "fuzzy"] = Query(default="contains"),
+    activity_id: int | None = Query(default=None),
+    include_descendants: bool = Query(default=True),
+    building_id: int | None = Query(default=None),
+
+    lat: float | None = Query(default=None, ge=-90, le=90),
+    lon: float | None = Query(default=None, ge=-180, le=180),
+    radius_m: float | None = Query(default=None, gt=0),
+
+    min_lat: float | None = Query(default=None, ge=-90, le=90),
+    min_lon: float | None = Query(default=None, ge=-180, le=180),
+    max_lat: float | None = Query(default=None, ge=-90, le=90),
+    max_lon: float | None = Query(default=None, ge=-180, le=180),
+) -> StreamingResponse:
+    rows = svc.organizations(
+        name=name,
+        match=match,
+        activity_id=activity_id,
+        include_descendants=include_descendants,
+        building_id=building_id,
+        geo=GeoQuery(
+            lat=lat, lon=lon, radius_m=radius_m,
+            min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon,
+        ),
+    )
+    return export_response(
+        rows, fmt=format, columns=_columns(OrganizationExportRow), filename="organizations", gzip=gzip
+    )
+
+
+@router.get("/buildings", response_class=StreamingResponse)
+async def export_buildings(
+    svc: ExportService = Depends(get_export_service),
+    format: ExportFormat = FormatQuery,
+    gzip: bool = GzipQuery,
+    min_lat: float | None = Query(default=None, ge=-90, le=90),
+    min_lon: float | None = Query(default=None, ge=-180, le=180),
+    max_lat: float | None = Query(default=None, ge=-90, le=90),
+    max_lon: float | None = Query(default=None, ge=-180, le=180),
+) -> StreamingResponse:
+    rows = svc.buildings(geo=GeoQuery(min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon))
+    return export_response(rows, fmt=format, columns=_columns(BuildingRow), filename="buildings", gzip=gzip)
+
+
+@router.get("/activities", response_class=StreamingResponse)
+async def export_activities(
+    svc: ExportService = Depends(get_export_service),
+    format: ExportFormat = FormatQuery,
+    gzip: bool = GzipQuery,
+    max_depth: int = Query(default=3, ge=1, le=3),
+) -> StreamingResponse:
+    rows = svc.activities(max_depth=max_depth)
+    return export_response(rows, fmt=format, columns=_columns(ActivityRow), filename="activities", gzip=gzip)
@@ -1,52 +1,98 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from typing import Literal
 
-from app.api.deps import get_organizations_service, verify_api_key
-from app.schemas.common import ListResponse, Pagination
-from app.schemas.organization import OrganizationCardOut, OrganizationGeoOut, OrganizationOut
+from fastapi import APIRouter, Depends, Query, Response
+
+from app.api.deps import (
+    get_organizations_service,
+    get_page_params,
+    get_suggest_service,
+    verify_api_key,
+)
+from app.api.http_cache import CARD_TABLES, conditional
+from app.api.responses import dto_response
+from app.core.errors import ValidationError
+from app.repos.dto import PageParams
+from app.schemas.common import ListResponse
+from app.schemas.organization import (
+    ClustersOut,
+    OrganizationCardOut,
+    OrganizationCardsOut,
+    OrganizationGeoCardOut,
+    OrganizationGeoOut,
+    OrganizationOut,
+    OrganizationSuggestOut,
+)
 from app.services.organizations import GeoQuery, OrganizationsService
-from dataclasses import asdict
 
 router = APIRouter(dependencies=[Depends(verify_api_key)])
 
+ExpandQuery = Query(default=None, description="`card` returns full organization cards inline")
+
+
+def _parse_ids(values: list[str]) -> list[int]:
+    try:
+        return [int(x) for v in values for x in v.split(",") if x.strip()]
+    except ValueError:
+        raise ValidationError(message="ids must be integers", code="IDS_INVALID") from None
 
-@router.get("", response_model=ListResponse[OrganizationOut])
+
+@router.get(
+    "",
+    response_model=ListResponse[OrganizationCardOut] | ListResponse[OrganizationOut],
+    dependencies=[conditional(*CARD_TABLES)],
+)
 async def list_organizations(
-    pg: Pagination = Depends(),
+    response: Response,
+    pg: PageParams = Depends(get_page_params),
     svc: OrganizationsService = Depends(get_organizations_service),
     name: str = Query(min_length=1),
-) -> ListResponse[OrganizationOut]:
-    page = await svc.search_by_name(name=name, limit=pg.limit, offset=pg.offset)
-    return ListResponse(
-        total=page.total,
-        items=[OrganizationOut(**asdict(o)) for o in page.items],
-    )
+    match: Literal["contains", "fuzzy"] = Query(
+        default="contains",
+        description="`fuzzy` tolerates typos (trigram similarity), ranked by trigram distance",
+    ),
+    expand: Literal["card"] | None = ExpandQuery,
+) -> Response:
+    page = await svc.search_by_name(name=name, page=pg, match=match)
+    if expand == "card":
+        return dto_response(await svc.with_cards(page), response)
+    return dto_response(page, response)
 
 
-@router.get("/by-activity/{activity_id}", response_model=ListResponse[OrganizationOut])
+@router.get(
+    "/by-activity/{activity_id}",
+    response_model=ListResponse[OrganizationCardOut] | ListResponse[OrganizationOut],
+    dependencies=[conditional(*CARD_TABLES)],
+)
 async def list_by_activity(
     activity_id: int,
+    response: Response,
     include_descendants: bool = Query(default=True),
-    pg: Pagination = Depends(),
+    pg: PageParams = Depends(get_page_params),
     svc: OrganizationsService = Depends(get_organizations_service),
-) -> ListResponse[OrganizationOut]:
+    expand: Literal["card"] | None = ExpandQuery,
+) -> Response:
     page = await svc.list_by_activity(
         activity_id=activity_id,
         include_descendants=include_descendants,
-        limit=pg.limit,
-        offset=pg.offset,
-    )
-    return ListResponse(
-        total=page.total,
-        items=[OrganizationOut(**asdict(o)) for o in page.items],
+        page=pg,
     )
+    if expand == "card":
+        return dto_response(await svc.with_cards(page), response)
+    return dto_response(page, response)
 
 
-@router.get("/geo", response_model=ListResponse[OrganizationGeoOut])
+@router.get(
+    "/geo",
+    response_model=ListResponse[OrganizationGeoCardOut] | ListResponse[OrganizationGeoOut],
+    dependencies=[conditional(*CARD_TABLES, "buildings")],
+)
 async def geo_search(
-    pg: Pagination = Depends(),
+    response: Response,
+    pg: PageParams = Depends(get_page_params),
     svc: OrganizationsService = Depends(get_organizations_service),
+    expand: Literal["card"] | None = ExpandQuery,
 
     lat: float | None = Query(default=None, ge=-90, le=90),
     lon: float | None = Query(default=None, ge=-180, le=180),
@@ -56,33 +102,145 @@ async def geo_search(
     min_lon: float | None = Query(default=None, ge=-180, le=180),
     max_lat: float | None = Query(default=None, ge=-90, le=90),
     max_lon: float | None = Query(default=None, ge=-180, le=180),
-) -> ListResponse[OrganizationGeoOut]:
+) -> Response:
     page = await svc.geo_search(
         q=GeoQuery(
             lat=lat, lon=lon, radius_m=radius_m,
             min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon,
         ),
-        limit=pg.limit,
-        offset=pg.offset,
+        page=pg,
     )
-    return ListResponse(
-        total=page.total,
-        items=[OrganizationGeoOut(**asdict(o)) for o in page.items],
+    if expand == "card":
+        return dto_response(await svc.with_cards(page), response)
+    return dto_response(page, response)
+
+
+@router.get(
+    "/suggest",
+    response_model=list[OrganizationSuggestOut],
+    dependencies=[conditional("organizations")],
+)
+async def suggest_organizations(
+    response: Response,
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=20),
+    svc: OrganizationsService = Depends(get_suggest_service),
+) -> Response:
+    result = await svc.suggest(q=q, limit=limit)
+    if result.timed_out:
+        # an empty list here means "too slow", not "no matches": never cache or revalidate it
+        del response.headers["ETag"]
+        response.headers["Cache-Control"] = "no-store"
+        response.headers["X-Suggest-Timed-Out"] = "1"
+    return dto_response(result.items, response)
+
+
+@router.get(
+    "/nearest",
+    response_model=list[OrganizationGeoOut],
+    dependencies=[conditional("organizations", "buildings")],
+)
+async def nearest_organizations(
+    response: Response,
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    k: int = Query(default=10, ge=1, le=100),
+    max_radius_m: float | None = Query(default=None, gt=0),
+    svc: OrganizationsService = Depends(get_organizations_service),
+) -> Response:
+    rows = await svc.nearest(lat=lat, lon=lon, k=k, max_radius_m=max_radius_m)
+    return dto_response(rows, response)
+
+
+@router.get(
+    "/cards",
+    response_model=OrganizationCardsOut,
+    dependencies=[conditional(*CARD_TABLES)],
+)
+async def get_organization_cards(
+    response: Response,
+    ids: list[str] = Query(description="Organization ids, comma-separated or repeated"),
+    svc: OrganizationsService = Depends(get_organizations_service),
+) -> Response:
+    return dto_response(await svc.get_cards(org_ids=_parse_ids(ids)), response)
+
+
+@router.get(
+    "/search",
+    response_model=ListResponse[OrganizationGeoCardOut] | ListResponse[OrganizationGeoOut],
+    dependencies=[conditional(*CARD_TABLES, "buildings")],
+)
+async def combined_search(
+    response: Response,
+    pg: PageParams = Depends(get_page_params),
+    svc: OrganizationsService = Depends(get_organizations_service),
+    expand: Literal["card"] | None = ExpandQuery,
+
+    name: str | None = Query(default=None, min_length=1),
+    match: Literal["contains", "fuzzy"] = Query(default="contains"),
+    activity_id: int | None = Query(default=None),
+    include_descendants: bool = Query(default=True),
+    building_id: int | None = Query(default=None),
+
+    lat: float | None = Query(default=None, ge=-90, le=90),
+    lon: float | None = Query(default=None, ge=-180, le=180),
+    radius_m: float | None = Query(default=None, gt=0),
+
+    min_lat: float | None = Query(default=None, ge=-90, le=90),
+    min_lon: float | None = Query(default=None, ge=-180, le=180),
+    max_lat: float | None = Query(default=None, ge=-90, le=90),
+    max_lon: float | None = Query(default=None, ge=-180, le=180),
+) -> Response:
+    page = await svc.search(
+        name=name,
+        match=match,
+        activity_id=activity_id,
+        include_descendants=include_descendants,
+        building_id=building_id,
+        geo=GeoQuery(
+            lat=lat, lon=lon, radius_m=radius_m,
+            min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon,
+        ),
+        page=pg,
     )
+    if expand == "card":
+        return dto_response(await svc.with_cards(page), response)
+    return dto_response(page, response)
 
 
+@router.get(
+    "/clusters",
+    response_model=ClustersOut,
+    dependencies=[conditional("organizations", "buildings", "organization_activities", "activities")],
+)
+async def organization_clusters(
+    response: Response,
+    min_lat: float = Query(ge=-90, le=90),
+    min_lon: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    max_lon: float = Query(ge=-180, le=180),
+    zoom: int = Query(ge=0, le=22, description="Map zoom level; each 256 px tile gets a 4x4 grid"),
+    activity_id: int | None = Query(default=None),
+    include_descendants: bool = Query(default=True),
+    svc: OrganizationsService = Depends(get_organizations_service),
+) -> Response:
+    clusters = await svc.clusters(
+        q=GeoQuery(min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon),
+        zoom=zoom,
+        activity_id=activity_id,
+        include_descendants=include_descendants,
+    )
+    return dto_response(clusters, response)
 
 
-@router.get("/{org_id}", response_model=OrganizationCardOut)
+@router.get(
+    "/{org_id}",
+    response_model=OrganizationCardOut,
+    dependencies=[conditional(*CARD_TABLES)],
+)
 async def get_organization_card(
     org_id: int,
+    response: Response,
     svc: OrganizationsService = Depends(get_organizations_service),
-) -> OrganizationCardOut:
-    row = await svc.get_card(org_id=org_id)
-    return OrganizationCardOut(
-        id=row.id,
-        name=row.name,
-        building_id=row.building_id,
-        phones=row.phones,
-        activities=row.activities,
-    )
\ No newline at end of file
+) -> Response:
+    return dto_response(await svc.get_card(org_id=org_id), response)
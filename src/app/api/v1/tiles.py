@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Path, Query, Response
+
+from app.api.deps import get_tiles_service, verify_api_key
+from app.api.http_cache import conditional
+from app.services.tiles import TilesService
+
+router = APIRouter(dependencies=[Depends(verify_api_key)])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+@router.get(
+    "/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}, "description": "Layers `buildings` and `organizations`"}},
+    dependencies=[conditional("organizations", "buildings", "organization_activities", "activities")],
+)
+async def get_tile(
+    response: Response,
+    z: int = Path(ge=0, le=22),
+    x: int = Path(ge=0),
+    y: int = Path(ge=0),
+    activity_id: int | None = Query(default=None),
+    include_descendants: bool = Query(default=True),
+    svc: TilesService = Depends(get_tiles_service),
+) -> Response:
+    tile = await svc.tile(z=z, x=x, y=y, activity_id=activity_id, include_descendants=include_descendants)
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=dict(response.headers))
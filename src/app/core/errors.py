@@ -31,3 +31,8 @@ class ValidationError(AppError):
 @dataclass(slots=True)
 class AuthError(AppError):
     code: str = "AUTH_ERROR"
+
+
+@dataclass(slots=True)
+class StatementBudgetExceeded(AppError):
+    code: str = "SQL_BUDGET_EXCEEDED"
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -20,11 +21,157 @@ class Settings(BaseSettings):
     )
 
     api_key: str = Field(min_length=8, description="Static API key for X-API-Key header")
+    admin_api_key: str | None = Field(
+        default=None,
+        min_length=8,
+        description="Key for the /admin endpoints (X-Admin-Key header); unset disables them",
+    )
     database_url: str = Field(
         default="postgresql+psycopg://postgres:postgres@db:5432/postgres",
         description="SQLAlchemy async database URL",
     )
+    database_replica_urls: list[str] = Field(
+        default_factory=list,
+        description="Read replica URLs (JSON list); API reads are routed to healthy ones",
+    )
+    replica_strategy: Literal["round_robin", "least_busy"] = Field(default="round_robin")
+    replica_max_lag_s: float = Field(
+        default=5.0,
+        ge=0,
+        description="Replicas further behind the primary are taken out of rotation",
+    )
+    replica_check_interval_s: float = Field(default=5.0, gt=0)
     debug: bool = Field(default=False)
+    db_pool_size: int = Field(default=10, ge=1, description="Persistent connections per worker")
+    db_max_overflow: int = Field(default=10, ge=0, description="Extra connections opened under load")
+    db_pool_timeout_s: float = Field(default=10.0, gt=0, description="Max wait for a free connection")
+    db_pool_recycle_s: int = Field(
+        default=1800,
+        ge=-1,
+        description="Replace connections older than this (-1 = never)",
+    )
+    db_pre_ping: Literal["always", "idle", "never"] = Field(
+        default="idle",
+        description="Liveness check on checkout: every time, only after db_pre_ping_idle_s idle, or never",
+    )
+    db_pre_ping_idle_s: float = Field(default=30.0, ge=0)
+    db_statement_timeout_ms: int = Field(
+        default=0,
+        ge=0,
+        description="Server-side statement_timeout for API connections (0 = server default)",
+    )
+    db_prepare_threshold: int | None = Field(
+        default=5,
+        ge=0,
+        description="psycopg: executions before a query is prepared server-side (None disables, e.g. behind PgBouncer)",
+    )
+    db_prepared_max: int = Field(default=200, ge=0, description="psycopg: prepared statements kept per connection")
+    db_compiled_cache_size: int = Field(
+        default=1000,
+        ge=0,
+        description="SQLAlchemy compiled statement cache entries (query_cache_size)",
+    )
+    sql_statement_budget: int = Field(
+        default=0,
+        ge=0,
+        description="SQL statements per request before it is flagged (0 = no budget)",
+    )
+    sql_budget_action: Literal["warn", "raise"] = Field(
+        default="warn",
+        description="`raise` fails the over-budget statement (for tests/CI) instead of logging a warning",
+    )
+    sql_repeat_warn: int = Field(
+        default=10,
+        ge=0,
+        description="Warn when one SQL statement runs this many times in a request (N+1); 0 disables",
+    )
+    slow_query_ms: float = Field(
+        default=500.0,
+        ge=0,
+        description="Log statements slower than this (0 = off) and keep them for /admin/slow-queries",
+    )
+    slow_query_explain_sample: float = Field(
+        default=0.0,
+        ge=0,
+        le=1,
+        description="Fraction of slow SELECTs re-run as EXPLAIN (ANALYZE, BUFFERS) to capture the plan",
+    )
+    slow_query_buffer_size: int = Field(default=100, ge=1, description="Slow queries kept for the admin endpoint")
+    server_timing_header: bool = Field(
+        default=True,
+        description="Send per-request DB timings in the Server-Timing response header",
+    )
+    dataset_versions_listen: bool = Field(
+        default=True,
+        description="LISTEN for dataset version bumps; otherwise caches read the counter table",
+    )
+    search_similarity_threshold: float = Field(
+        default=0.3,
+        gt=0,
+        le=1,
+        description="pg_trgm.similarity_threshold used by fuzzy name search (`%` operator)",
+    )
+    suggest_timeout_ms: int = Field(
+        default=150,
+        ge=1,
+        description="Statement timeout of the autocomplete pool; slower lookups return no suggestions",
+    )
+    suggest_pool_size: int = Field(default=4, ge=1, description="Persistent autocomplete connections per worker")
+    http_cache_max_age_s: int = Field(
+        default=30,
+        ge=0,
+        description="Default Cache-Control max-age for read endpoints",
+    )
+    http_cache_stale_while_revalidate_s: int = Field(
+        default=300,
+        ge=0,
+        description="Default Cache-Control stale-while-revalidate for read endpoints",
+    )
+    http_cache_public: bool = Field(
+        default=False,
+        description="Allow shared caches (CDN) to store responses; they must key on X-API-Key",
+    )
+    result_cache_max_entries: int = Field(
+        default=2048,
+        ge=0,
+        description=(
+            "LRU bound of the in-process search/geo result cache (0 disables it); "
+            "counts entries, not bytes, so memory use depends on page size"
+        ),
+    )
+    result_cache_ttl_s: float = Field(
+        default=30.0,
+        ge=0,
+        description="Lifetime of a cached search/geo result, on top of version invalidation",
+    )
+    result_cache_coord_step: float = Field(
+        default=0.0,
+        ge=0,
+        description="Snap geo query coordinates to this grid (degrees) before querying and caching; 0 = exact",
+    )
+    export_batch_size: int = Field(
+        default=1000,
+        ge=1,
+        description="Rows fetched per server-side cursor round trip by /export endpoints",
+    )
+    tile_max_features: int = Field(
+        default=5000,
+        ge=1,
+        description="Features per layer in one vector tile; denser tiles keep the busiest buildings",
+    )
+    tile_cache_max_entries: int = Field(
+        default=4096,
+        ge=0,
+        description=(
+            "LRU bound of the in-process vector tile cache (0 disables it); "
+            "counts entries, not bytes, so memory use grows with tile_max_features"
+        ),
+    )
+    tile_cache_ttl_s: float = Field(
+        default=300.0,
+        ge=0,
+        description="Lifetime of a cached vector tile, on top of version invalidation",
+    )
 
 
 @lru_cache
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import Any, ClassVar
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.sql.visitors import InternalTraversal, _TraverseInternalsType
+
+
+class Explain(Executable, ClauseElement):
+    """
+    `EXPLAIN (...) <statement>` keeping the wrapped statement's bind parameters.
+
+    Result is a single row with the JSON plan.
+    """
+
+    # cache key covers the wrapped statement and the options, so compiled EXPLAINs are cached too
+    inherit_cache = True
+    # SQLAlchemy declares it as an instance attribute; it is per-class here
+    _traverse_internals: ClassVar[_TraverseInternalsType] = [  # type: ignore[misc]
+        ("statement", InternalTraversal.dp_clauseelement),
+        ("analyze", InternalTraversal.dp_boolean),
+        ("buffers", InternalTraversal.dp_boolean),
+    ]
+
+    def __init__(self, statement: ClauseElement, *, analyze: bool = False, buffers: bool = False) -> None:
+        self.statement = statement
+        self.analyze = analyze
+        self.buffers = buffers
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: SQLCompiler, **kw: Any) -> str:
+    options = ["FORMAT JSON"]
+    if element.analyze:
+        options.append("ANALYZE")
+    if element.buffers:
+        options.append("BUFFERS")
+    return f"EXPLAIN ({', '.join(options)}) " + compiler.process(element.statement, **kw)
+
+
+def plan_rows(plan: Any) -> int:
+    """
+    Planner row estimate of the top plan node.
+    """
+    return int(plan[0]["Plan"]["Plan Rows"])
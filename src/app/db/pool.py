@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import bisect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from app.db.query_stats import record_pool_wait
+
+PrePing = Literal["always", "idle", "never"]
+
+# upper bounds (ms) of the checkout wait buckets; the last bucket is +Inf
+WAIT_BUCKETS_MS: tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+@dataclass(slots=True)
+class WaitHistogram:
+    """
+    Checkout wait times of one pool (cumulative, Prometheus-style buckets).
+    """
+
+    counts: list[int] = field(default_factory=lambda: [0] * (len(WAIT_BUCKETS_MS) + 1))
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    timeouts: int = 0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+# keyed by pool logging name; survives pool.recreate()
+wait_histograms: dict[str, WaitHistogram] = {}
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records how long each checkout waited for a connection.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        histogram = wait_histograms.setdefault(self._orig_logging_name or "default", WaitHistogram())
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            histogram.timeouts += 1
+            raise
+        waited_ms = (time.perf_counter() - started) * 1000
+        histogram.observe(waited_ms)
+        record_pool_wait(waited_ms)
+        return entry
+
+
+def install_idle_pre_ping(engine: Engine, *, idle_s: float) -> None:
+    """
+    Pings a pooled connection on checkout only if it sat idle for `idle_s` or more.
+
+    pool_pre_ping=True costs a round trip on every checkout; connections reused
+    within a burst of traffic are almost never dead, so only stale ones are checked.
+    A failed ping raises DisconnectionError, which makes the pool discard the
+    connection and retry with a fresh one.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection: Any, record: Any) -> None:
+        record.info["idle_since"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection: Any, record: Any, proxy: Any) -> None:
+        idle_since = record.info.pop("idle_since", None)
+        if idle_since is None or time.monotonic() - idle_since < idle_s:
+            return
+        try:
+            alive = engine.dialect.do_ping(dbapi_connection)
+        except engine.dialect.loaded_dbapi.Error as e:
+            raise exc.DisconnectionError(str(e)) from e
+        if not alive:
+            raise exc.DisconnectionError("pre-ping failed")
+
+
+@dataclass(frozen=True, slots=True)
+class PoolSnapshot:
+    name: str
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    waits: int
+    wait_total_ms: float
+    wait_max_ms: float
+    wait_buckets_ms: dict[str, int]
+    timeouts: int
+
+
+def pool_snapshot(engine: Engine) -> PoolSnapshot:
+    pool = engine.pool
+    assert isinstance(pool, InstrumentedPool)
+    name = pool._orig_logging_name or "default"
+    histogram = wait_histograms.get(name, WaitHistogram())
+
+    buckets: dict[str, int] = {}
+    running = 0
+    for bound, n in zip((*WAIT_BUCKETS_MS, float("inf")), histogram.counts, strict=True):
+        running += n
+        buckets["+Inf" if bound == float("inf") else f"{bound:g}"] = running
+
+    return PoolSnapshot(
+        name=name,
+        size=pool.size(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        # QueuePool reports overflow relative to size (negative while the pool fills up)
+        overflow=max(pool.overflow(), 0),
+        max_overflow=pool._max_overflow,
+        waits=histogram.count,
+        wait_total_ms=round(histogram.total_ms, 3),
+        wait_max_ms=round(histogram.max_ms, 3),
+        wait_buckets_ms=buckets,
+        timeouts=histogram.timeouts,
+    )
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.errors import StatementBudgetExceeded
+
+BudgetAction = Literal["warn", "raise"]
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """
+    Database work done on behalf of one request.
+
+    Shared by reference with every task and greenlet spawned while handling it,
+    so concurrent queries of the same request add up here.
+    """
+
+    # "METHOD /path" of the request, for logs
+    origin: str = ""
+    statements: int = 0
+    db_ms: float = 0.0
+    rows: int = 0
+    pool_wait_ms: float = 0.0
+    # executions per SQL string, for N+1 detection
+    repeats: Counter[str] = field(default_factory=Counter)
+
+    def most_repeated(self) -> tuple[str, int]:
+        if not self.repeats:
+            return "", 0
+        return self.repeats.most_common(1)[0]
+
+
+current_stats: ContextVar[QueryStats | None] = ContextVar("current_stats", default=None)
+
+
+def record_pool_wait(ms: float) -> None:
+    stats = current_stats.get()
+    if stats is not None:
+        stats.pool_wait_ms += ms
+
+
+def install_query_stats(engine: Engine, *, budget: int, action: BudgetAction) -> None:
+    """
+    Accumulates statement count, DB time and rows into the current request's QueryStats.
+
+    With `action="raise"`, the statement that would exceed `budget` fails with
+    StatementBudgetExceeded instead of running, so tests catch N+1 regressions;
+    "warn" is reported by the middleware once the request is done.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        stats = current_stats.get()
+        if stats is None:
+            return
+        if action == "raise" and budget and stats.statements >= budget:
+            raise StatementBudgetExceeded(message=f"Request exceeded its budget of {budget} SQL statements")
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        stats = current_stats.get()
+        started = conn.info.get("query_started")
+        if stats is None or not started:
+            return
+        stats.db_ms += (time.perf_counter() - started.pop()) * 1000
+        stats.statements += 1
+        # SELECT: rows in the result (-1 for server-side cursors); DML: rows affected
+        stats.rows += max(cursor.rowcount, 0)
+        stats.repeats[statement] += 1
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(ctx: Any) -> None:
+        started = ctx.connection.info.get("query_started") if ctx.connection is not None else None
+        if started:
+            started.pop()
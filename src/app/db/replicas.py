@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from sqlalchemy import Delete, Insert, Update, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+
+ReplicaStrategy = Literal["round_robin", "least_busy"]
+
+# Seconds behind the primary; 0 when the WAL receiver is streaming and replay has
+# caught up with everything received (replay timestamps alone would report an idle
+# primary as growing lag). Without a streaming receiver "caught up" only means
+# nothing new arrived, so the age of the last replayed transaction counts, and a
+# replica that never replayed anything is infinitely behind. `status` reads as NULL
+# without pg_read_all_stats; a running receiver is then taken as streaming.
+LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (
+                 SELECT 1 FROM pg_stat_wal_receiver
+                 WHERE coalesce(status, 'streaming') = 'streaming'
+             )
+        THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8,
+            'Infinity'::float8
+        )
+    END
+    """
+)
+
+
+@dataclass(slots=True)
+class Replica:
+    name: str
+    engine: AsyncEngine
+    healthy: bool = False
+    lag_s: float | None = None
+
+
+class ReplicaSet:
+    """
+    Read replicas with health and lag tracking.
+
+    A replica serves reads only after a successful check with lag within
+    `max_lag_s`; with none eligible, `pick()` returns None and reads go to the primary.
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[AsyncEngine],
+        *,
+        strategy: ReplicaStrategy,
+        max_lag_s: float,
+    ) -> None:
+        self.replicas = [Replica(name=f"replica{i}", engine=e) for i, e in enumerate(engines)]
+        self.strategy = strategy
+        self.max_lag_s = max_lag_s
+        self._rr = itertools.count()
+
+    def pick(self) -> Engine | None:
+        candidates = [r for r in self.replicas if r.healthy]
+        if not candidates:
+            return None
+        if self.strategy == "least_busy":
+            chosen = min(candidates, key=lambda r: r.engine.sync_engine.pool.checkedout())  # type: ignore[attr-defined]
+        else:
+            chosen = candidates[next(self._rr) % len(candidates)]
+        return chosen.engine.sync_engine
+
+    async def check(self) -> None:
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    lag = float(await conn.scalar(LAG_SQL) or 0)
+            except (SQLAlchemyError, OSError) as e:
+                if replica.healthy:
+                    log.warning("%s unavailable, reads fall back: %s", replica.name, e)
+                replica.healthy, replica.lag_s = False, None
+                continue
+
+            replica.lag_s = lag
+            healthy = lag <= self.max_lag_s
+            if healthy != replica.healthy:
+                log.warning("%s %s (lag %.1fs)", replica.name, "in rotation" if healthy else "lagging", lag)
+            replica.healthy = healthy
+
+    async def monitor(self, *, interval_s: float) -> None:
+        """
+        Re-checks all replicas every `interval_s` until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval_s)
+            await self.check()
+
+
+class RoutingSession(Session):
+    """
+    Sends reads to a replica chosen once per session; anything that writes,
+    and every statement after it in the same session, goes to the primary.
+    """
+
+    def __init__(self, *args: Any, replicas: ReplicaSet | None = None, **kw: Any) -> None:
+        super().__init__(*args, **kw)
+        self.replicas = replicas
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Any:
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        if self.replicas is None:
+            return primary
+
+        if self._flushing or isinstance(clause, Insert | Update | Delete):
+            self.info["read_bind"] = primary
+            return primary
+
+        if "read_bind" not in self.info:
+            self.info["read_bind"] = self.replicas.pick() or primary
+        return self.info["read_bind"]
+
+    def reads_from_replica(self) -> bool:
+        """
+        Pins the read bind (as the first read would) and tells whether it is a replica.
+        """
+        if self.replicas is None:
+            return False
+        return self.get_bind() is not super().get_bind()
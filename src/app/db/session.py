@@ -1,29 +1,124 @@
 from __future__ import annotations
 
 from collections.abc import AsyncIterator
+from typing import Any
 
+from sqlalchemy import event, make_url
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
 from app.core.settings import get_settings
+from app.db.pool import InstrumentedPool, install_idle_pre_ping
+from app.db.query_stats import install_query_stats
+from app.db.replicas import ReplicaSet, RoutingSession
+from app.db.slow_queries import SlowQueryLog
+from app.db.statement_cache import install_statement_cache_stats
 
 settings = get_settings()
 
-engine = create_async_engine(
+
+def _server_options(*, statement_timeout_ms: int) -> str:
+    options = [f"-c pg_trgm.similarity_threshold={settings.search_similarity_threshold}"]
+    if statement_timeout_ms:
+        options.append(f"-c statement_timeout={statement_timeout_ms}")
+    return " ".join(options)
+
+
+def _tune_connection(dbapi_connection: Any, record: Any) -> None:
+    dbapi_connection.driver_connection.prepared_max = settings.db_prepared_max
+
+
+slow_queries = SlowQueryLog(
+    threshold_ms=settings.slow_query_ms,
+    explain_sample=settings.slow_query_explain_sample,
+    max_entries=settings.slow_query_buffer_size,
+)
+
+
+def _make_engine(
+    url: str,
+    *,
+    name: str,
+    pool_size: int = settings.db_pool_size,
+    statement_timeout_ms: int = settings.db_statement_timeout_ms,
+) -> AsyncEngine:
+    """
+    Engine with the configured pool, pre-ping strategy and instrumentation.
+    """
+    engine = create_async_engine(
+        url,
+        echo=settings.debug,
+        poolclass=InstrumentedPool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_s,
+        pool_recycle=settings.db_pool_recycle_s,
+        pool_pre_ping=settings.db_pre_ping == "always",
+        query_cache_size=settings.db_compiled_cache_size,
+        connect_args={
+            "options": _server_options(statement_timeout_ms=statement_timeout_ms),
+            "prepare_threshold": settings.db_prepare_threshold,
+        },
+    )
+    if settings.db_pre_ping == "idle":
+        install_idle_pre_ping(engine.sync_engine, idle_s=settings.db_pre_ping_idle_s)
+    install_statement_cache_stats(engine.sync_engine)
+    install_query_stats(
+        engine.sync_engine,
+        budget=settings.sql_statement_budget,
+        action=settings.sql_budget_action,
+    )
+    if settings.slow_query_ms:
+        slow_queries.install(engine.sync_engine, name=name)
+    event.listen(engine.sync_engine, "connect", _tune_connection)
+    return engine
+
+
+engine = _make_engine(settings.database_url, name="primary")
+
+replicas: ReplicaSet | None = None
+if settings.database_replica_urls:
+    replicas = ReplicaSet(
+        [_make_engine(url, name=f"replica{i}") for i, url in enumerate(settings.database_replica_urls)],
+        strategy=settings.replica_strategy,
+        max_lag_s=settings.replica_max_lag_s,
+    )
+
+# Autocomplete: connections carry the suggest timeout as a server option, so a
+# lookup is bounded without SET / RESET round trips of its own.
+suggest_engine = _make_engine(
     settings.database_url,
-    echo=settings.debug,
-    pool_pre_ping=True,
+    name="suggest",
+    pool_size=settings.suggest_pool_size,
+    statement_timeout_ms=settings.suggest_timeout_ms,
 )
 
+
+def all_engines() -> list[AsyncEngine]:
+    return [engine, suggest_engine, *(r.engine for r in (replicas.replicas if replicas is not None else []))]
+
+
+# Primary only: scripts and anything that writes.
 AsyncSessionMaker = async_sessionmaker(
     bind=engine,
     autoflush=False,
     expire_on_commit=False,
 )
 
+# API requests: reads go to a healthy replica when configured, writes to the primary.
+ReadSessionMaker = async_sessionmaker(
+    bind=engine,
+    autoflush=False,
+    expire_on_commit=False,
+    sync_session_class=RoutingSession,
+    replicas=replicas,
+)
+
 
 async def get_session() -> AsyncIterator[AsyncSession]:
     """
@@ -31,6 +126,26 @@ async def get_session() -> AsyncIterator[AsyncSession]:
 
     Provides an AsyncSession and guarantees proper close.
     Transaction boundaries are managed by caller.
+    No connection is checked out until the first query.
     """
-    async with AsyncSessionMaker() as session:
+    async with ReadSessionMaker() as session:
         yield session
+
+
+SuggestSessionMaker = async_sessionmaker(
+    bind=suggest_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_suggest_session() -> AsyncIterator[AsyncSession]:
+    async with SuggestSessionMaker() as session:
+        yield session
+
+
+def libpq_dsn(url: str) -> str:
+    """
+    SQLAlchemy URL (postgresql+psycopg://...) -> plain libpq URL for direct psycopg connections.
+    """
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.db.query_stats import current_stats
+
+log = logging.getLogger(__name__)
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+
+@dataclass(frozen=True, slots=True)
+class SlowQuery:
+    at: datetime
+    engine: str
+    origin: str
+    duration_ms: float
+    statement: str
+    params: Any
+    plan: Any | None
+
+
+def redact(params: Any) -> Any:
+    """
+    Bound parameters safe to log: numbers, booleans and NULLs are kept (ids,
+    coordinates, limits); strings are replaced by their length.
+    """
+    if isinstance(params, Mapping):
+        return {k: redact(v) for k, v in params.items()}
+    if isinstance(params, Sequence) and not isinstance(params, str | bytes):
+        return [redact(v) for v in params]
+    if params is None or isinstance(params, bool | int | float):
+        return params
+    if isinstance(params, str | bytes):
+        return f"<{type(params).__name__} len={len(params)}>"
+    return f"<{type(params).__name__}>"
+
+
+class SlowQueryLog:
+    """
+    Logs statements slower than `threshold_ms` and keeps the latest ones in a ring buffer.
+
+    A fraction `explain_sample` of slow SELECTs is re-run right away as
+    EXPLAIN (ANALYZE, BUFFERS) on the same connection, inside a savepoint, so the
+    plan comes with the buffer. That repeats the query, so the sampled request pays
+    for it twice. DML is never re-run.
+    """
+
+    def __init__(self, *, threshold_ms: float, explain_sample: float, max_entries: int) -> None:
+        self.threshold_ms = threshold_ms
+        self.explain_sample = explain_sample
+        self.entries: deque[SlowQuery] = deque(maxlen=max_entries)
+
+    def install(self, engine: Engine, *, name: str) -> None:
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(
+            conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+        ) -> None:
+            conn.info["slow_query_started"] = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(
+            conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+        ) -> None:
+            started = conn.info.pop("slow_query_started", None)
+            if started is None:
+                return
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= self.threshold_ms:
+                self._record(conn, name, statement, parameters, context, executemany, duration_ms)
+
+    def _record(
+        self,
+        conn: Any,
+        engine_name: str,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+        duration_ms: float,
+    ) -> None:
+        stats = current_stats.get()
+        origin = stats.origin if stats is not None else ""
+        params = redact(parameters)
+        log.warning(
+            "slow query %.1f ms on %s [%s]: %s params=%s",
+            duration_ms,
+            engine_name,
+            origin or "-",
+            " ".join(statement.split()),
+            params,
+        )
+
+        plan = None
+        if (
+            not executemany
+            and self.explain_sample > 0
+            and random.random() < self.explain_sample
+            and _is_select(statement, context)
+        ):
+            plan = _explain(conn, statement, parameters)
+
+        self.entries.append(
+            SlowQuery(
+                at=datetime.now(UTC),
+                engine=engine_name,
+                origin=origin,
+                duration_ms=round(duration_ms, 2),
+                statement=statement,
+                params=params,
+                plan=plan,
+            )
+        )
+
+    def recent(self) -> list[SlowQuery]:
+        return list(reversed(self.entries))
+
+
+def _is_select(statement: str, context: Any) -> bool:
+    if context is not None and (
+        context.isinsert or context.isupdate or context.isdelete or getattr(context, "is_server_side", False)
+    ):
+        return False
+    return statement.lstrip().upper().startswith(("SELECT", "WITH"))
+
+
+def _explain(conn: Any, statement: str, parameters: Any) -> Any | None:
+    # raw DBAPI cursor: no engine events, so this does not count as a request statement
+    dbapi_conn = conn.connection.dbapi_connection
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(EXPLAIN_PREFIX + statement, parameters)
+            row = cursor.fetchone()
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        except Exception as e:
+            # keep the request's transaction usable
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            log.warning("EXPLAIN of a slow query failed: %s", e)
+            return None
+    except Exception as e:
+        log.warning("EXPLAIN of a slow query skipped: %s", e)
+        return None
+    finally:
+        cursor.close()
+
+    plan = row[0] if row else None
+    return json.loads(plan) if isinstance(plan, str) else plan
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.util import LRUCache
+
+
+@dataclass(frozen=True, slots=True)
+class StatementCacheSnapshot:
+    hits: int
+    misses: int
+    uncached: int
+    compiled_cache_size: int
+    compiled_cache_max: int
+    prepare_threshold: int | None
+
+
+# SQLAlchemy compiled-cache outcome of every executed statement
+cache_outcomes: Counter[CacheStats] = Counter()
+
+
+def install_statement_cache_stats(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        if context is not None:
+            cache_outcomes[context.cache_hit] += 1
+
+
+def statement_cache_snapshot(engine: Engine, *, prepare_threshold: int | None) -> StatementCacheSnapshot:
+    cache = engine._compiled_cache
+    return StatementCacheSnapshot(
+        hits=cache_outcomes[CacheStats.CACHE_HIT],
+        misses=cache_outcomes[CacheStats.CACHE_MISS],
+        uncached=sum(
+            n for k, n in cache_outcomes.items() if k not in (CacheStats.CACHE_HIT, CacheStats.CACHE_MISS)
+        ),
+        compiled_cache_size=len(cache) if cache is not None else 0,
+        compiled_cache_max=cache.capacity if isinstance(cache, LRUCache) else 0,
+        prepare_threshold=prepare_threshold,
+    )
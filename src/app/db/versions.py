@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Sequence
+from typing import Any
+
+import psycopg
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.replicas import RoutingSession
+from app.models.dataset_version import DatasetVersion
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "dataset_versions"
+
+# Session setting that makes the bump_dataset_version trigger a no-op. Parallel
+# loaders would otherwise serialize on the dataset_versions row lock of each
+# table they write; they call bump_versions once after their last commit instead.
+BULK_LOAD_SQL = "SET app.bulk_load = on"
+
+BUMP_SQL = f"""
+WITH bumped AS (
+    INSERT INTO dataset_versions (name, version)
+    SELECT name, 1 FROM unnest(%(tables)s::text[]) AS t(name)
+    ON CONFLICT (name) DO UPDATE SET version = dataset_versions.version + 1
+    RETURNING name, version
+)
+SELECT pg_notify('{CHANNEL}', name || ':' || version) FROM bumped
+"""
+
+
+def _on_replica(session: AsyncSession) -> bool:
+    sync = session.sync_session
+    return isinstance(sync, RoutingSession) and sync.reads_from_replica()
+
+
+class DatasetVersions:
+    """
+    Process-local view of the `dataset_versions` counters.
+
+    While the LISTEN connection is up the counters are served from memory;
+    otherwise `current()` falls back to reading the counter row.
+
+    Sessions reading from a replica always read the counters on that replica:
+    the listener follows the primary, and a lagging replica would otherwise have
+    its older rows cached and tagged under the primary's newer versions. Versions
+    are read before the data in the same session (pinned to one replica), so the
+    data is never older than the versions it is stored under.
+    """
+
+    def __init__(self) -> None:
+        self._versions: dict[str, int] = {}
+        self.live = False
+
+    def cached(self, name: str) -> int | None:
+        """
+        In-memory version, or None when it cannot be trusted (listener down).
+        """
+        if not self.live:
+            return None
+        return self._versions.get(name, 0)
+
+    async def current(self, session: AsyncSession, name: str) -> int:
+        version = self.cached(name)
+        if version is not None and not _on_replica(session):
+            return version
+        stmt = select(DatasetVersion.version).where(DatasetVersion.name == name)
+        return int(await session.scalar(stmt) or 0)
+
+    async def snapshot(self, session: AsyncSession, names: Sequence[str]) -> dict[str, int]:
+        """
+        Versions of several tables; at most one query when the listener is down
+        or the session reads from a replica.
+        """
+        if self.live and not _on_replica(session):
+            return {name: self._versions.get(name, 0) for name in names}
+        stmt = select(DatasetVersion.name, DatasetVersion.version).where(DatasetVersion.name.in_(names))
+        found = {name: int(version) for name, version in await session.execute(stmt)}
+        return {name: found.get(name, 0) for name in names}
+
+    def _bump(self, name: str, version: int) -> None:
+        if version > self._versions.get(name, 0):
+            self._versions[name] = version
+
+    async def listen(self, dsn: str, *, retry_delay_s: float = 1.0) -> None:
+        """
+        Keeps the counters fresh from NOTIFY until cancelled; reconnects on failure.
+        """
+        delay = retry_delay_s
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    # notifications missed while disconnected are covered by a full reload
+                    cur = await conn.execute("SELECT name, version FROM dataset_versions")
+                    for name, version in await cur.fetchall():
+                        self._versions[name] = int(version)
+                    self.live = True
+                    delay = retry_delay_s
+
+                    async for notify in conn.notifies():
+                        name, _, version = notify.payload.rpartition(":")
+                        if name and version.isdigit():
+                            self._bump(name, int(version))
+            except psycopg.Error as e:
+                log.warning("dataset versions listener disconnected: %s", e)
+            finally:
+                self.live = False
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+async def bump_versions(conn: psycopg.AsyncConnection[Any], tables: Sequence[str]) -> None:
+    """
+    Bumps each of `tables` once and notifies listeners, as the trigger would have.
+    """
+    await conn.execute(BUMP_SQL, {"tables": list(tables)})
+    if not conn.autocommit:
+        await conn.commit()
+
+
+versions = DatasetVersions()
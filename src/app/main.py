@@ -1,23 +1,80 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.api.error_handlers import install_error_handlers
+from app.api.metrics import MetricsMiddleware, metrics, render_metrics
 from app.api.router import router as api_router
+from app.api.server_timing import ServerTimingMiddleware
 from app.core.settings import get_settings
+from app.db.session import AsyncSessionMaker, all_engines, libpq_dsn, replicas
+from app.db.versions import versions
+from app.repos.activities import ActivitiesRepo
+from app.services.taxonomy import taxonomy_cache
+
+log = logging.getLogger(__name__)
 
 settings = get_settings()
 
+
+@contextlib.asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    tasks: list[asyncio.Task[None]] = []
+    if settings.dataset_versions_listen:
+        tasks.append(asyncio.create_task(versions.listen(libpq_dsn(settings.database_url))))
+    if replicas is not None:
+        # first check before serving, so replicas take reads from the first request
+        await replicas.check()
+        tasks.append(asyncio.create_task(replicas.monitor(interval_s=settings.replica_check_interval_s)))
+
+    try:
+        async with AsyncSessionMaker() as session:
+            await taxonomy_cache.get(ActivitiesRepo(session))
+    except SQLAlchemyError as e:
+        log.warning("activity taxonomy not preloaded: %s", e)
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
 app = FastAPI(
     title="Organizations API",
     version="0.1.0",
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 install_error_handlers(app)
+app.add_middleware(
+    ServerTimingMiddleware,
+    header=settings.server_timing_header,
+    budget=settings.sql_statement_budget,
+    repeat_warn=settings.sql_repeat_warn,
+)
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router)
 
 
 @app.get("/health")
 async def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(all_engines()), media_type="text/plain; version=0.0.4")
+
+
+# after every route is added: label sets are fixed up front
+metrics.register_routes(app.routes)
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-from .activity import Activity
+from .activity import Activity, activity_closure
 from .building import Building
+from .dataset_version import DatasetVersion
 from .organization import Organization, OrganizationPhone, organization_activities
 
 __all__ = [
     "Activity",
     "Building",
+    "DatasetVersion",
     "Organization",
     "OrganizationPhone",
+    "activity_closure",
     "organization_activities",
 ]
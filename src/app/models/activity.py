@@ -1,10 +1,32 @@
 from __future__ import annotations
 
-from sqlalchemy import CheckConstraint, ForeignKey, SmallInteger, String
+import sqlalchemy as sa
+from sqlalchemy import CheckConstraint, ForeignKey, SmallInteger, String, Table
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
+# Transitive closure of activities.parent_id, maintained by triggers
+# (see migration 9d41b07e5a62); read-only from the application side.
+activity_closure = Table(
+    "activity_closure",
+    Base.metadata,
+    sa.Column(
+        "ancestor_id",
+        sa.Integer,
+        ForeignKey("activities.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    sa.Column(
+        "descendant_id",
+        sa.Integer,
+        ForeignKey("activities.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
+    sa.Column("depth", sa.SmallInteger, nullable=False),
+)
+
 
 class Activity(Base):
     __tablename__ = "activities"
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from geoalchemy2 import Geography
-from sqlalchemy import String
+from geoalchemy2 import Geography, Geometry
+from sqlalchemy import Computed, Float, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -9,6 +9,9 @@ from app.db.base import Base
 
 class Building(Base):
     __tablename__ = "buildings"
+    __table_args__ = (
+        Index("ix_buildings_geom_pt_gist", "geom_pt", postgresql_using="gist"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     address: Mapped[str] = mapped_column(String(500), nullable=False)
@@ -18,6 +21,14 @@ class Building(Base):
         nullable=False,
     )
 
+    # generated from geom; bbox/tile queries use geom_pt so they hit its own gist index
+    geom_pt: Mapped[object] = mapped_column(
+        Geometry(geometry_type="POINT", srid=4326, spatial_index=False),
+        Computed("geom::geometry", persisted=True),
+    )
+    lat: Mapped[float] = mapped_column(Float, Computed("ST_Y(geom::geometry)", persisted=True))
+    lon: Mapped[float] = mapped_column(Float, Computed("ST_X(geom::geometry)", persisted=True))
+
     organizations: Mapped[list[Organization]] = relationship(
         back_populates="building",
         cascade="all, delete-orphan",
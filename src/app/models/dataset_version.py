@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DatasetVersion(Base):
+    """
+    Change counter per table, maintained by the `bump_dataset_version` trigger.
+    """
+
+    __tablename__ = "dataset_versions"
+
+    name: Mapped[str] = mapped_column(String(63), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
@@ -1,58 +1,51 @@
 from __future__ import annotations
 
-from sqlalchemy import func, select
+from collections.abc import AsyncIterator
+from functools import cache
+from typing import Any
+
+from sqlalchemy import Integer, Select, bindparam, select
 
 from app.models.activity import Activity
 from app.repos.base import Repo
-from app.repos.dto import ActivityRow, Page
+from app.repos.dto import ActivityRow, Page, PageParams
+
+
+@cache
+def _list_stmt() -> Select[Any]:
+    return select(
+        Activity.id.label("id"),
+        Activity.name.label("name"),
+        Activity.parent_id.label("parent_id"),
+        Activity.depth.label("depth"),
+    ).where(Activity.depth <= bindparam("max_depth", type_=Integer))
 
 
 class ActivitiesRepo(Repo):
-    async def list(self, *, limit: int, offset: int, max_depth: int = 3) -> Page[ActivityRow]:
-        total_stmt = select(func.count()).select_from(
-            select(Activity.id).where(Activity.depth <= max_depth).subquery()
+    async def list(self, *, page: PageParams, max_depth: int = 3) -> Page[ActivityRow]:
+        rows = await self._paginate(
+            _list_stmt(),
+            keys=(("depth", False), ("id", False)),
+            page=page,
+            params={"max_depth": max_depth},
         )
-        total = int(await self.session.scalar(total_stmt) or 0)
-
-        stmt = (
-            select(Activity)
-            .where(Activity.depth <= max_depth)
-            .order_by(Activity.depth.asc(), Activity.id.asc())
-            .limit(limit)
-            .offset(offset)
+        return rows.map(
+            lambda r: ActivityRow(id=int(r.id), name=str(r.name), parent_id=r.parent_id, depth=int(r.depth))
         )
-        items_orm = (await self.session.scalars(stmt)).all()
-        items = [
-            ActivityRow(id=a.id, name=a.name, parent_id=a.parent_id, depth=int(a.depth))
-            for a in items_orm
-        ]
-        return Page(total=total, items=items)
 
-    async def list_all(self, *, max_depth: int = 3) -> list[ActivityRow]:
-        stmt = (
-            select(Activity)
-            .where(Activity.depth <= max_depth)
-            .order_by(Activity.depth.asc(), Activity.id.asc())
-        )
+    async def list_all(self) -> list[ActivityRow]:
+        stmt = select(Activity).order_by(Activity.depth.asc(), Activity.id.asc())
         items_orm = (await self.session.scalars(stmt)).all()
         return [
             ActivityRow(id=a.id, name=a.name, parent_id=a.parent_id, depth=int(a.depth))
             for a in items_orm
         ]
 
-    async def subtree_ids(self, *, root_id: int, max_depth: int = 3) -> list[int]:
-        """
-        Returns ids of root activity and descendants (recursive CTE).
-        """
-        base = select(Activity.id, Activity.parent_id, Activity.depth).where(Activity.id == root_id)
-        tree = base.cte(name="activity_tree", recursive=True)
-
-        step = (
-            select(Activity.id, Activity.parent_id, Activity.depth)
-            .join(tree, Activity.parent_id == tree.c.id)
-            .where(Activity.depth <= max_depth)
+    async def stream_export(self, *, max_depth: int, batch_size: int) -> AsyncIterator[ActivityRow]:
+        stmt = _list_stmt().order_by(Activity.depth.asc(), Activity.id.asc())
+        result = await self.session.stream(
+            stmt.execution_options(yield_per=batch_size),
+            {"max_depth": max_depth},
         )
-        tree = tree.union_all(step)
-
-        stmt = select(tree.c.id)
-        return list((await self.session.scalars(stmt)).all())
+        async for r in result:
+            yield ActivityRow(id=int(r.id), name=str(r.name), parent_id=r.parent_id, depth=int(r.depth))
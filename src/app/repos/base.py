@@ -1,10 +1,141 @@
 from __future__ import annotations
 
 from abc import ABC
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any
 
+from sqlalchemy import Integer, Row, Select, bindparam, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.explain import Explain, plan_rows
+from app.repos.dto import Page, PageParams
+from app.repos.keyset import SortKey, decode_cursor, encode_cursor, seek_after
+
+TOTAL_COLUMN = "total_count"
+
+
+@lru_cache(maxsize=512)
+def _page_statement(
+    stmt: Select[Any],
+    keys: tuple[SortKey, ...],
+    *,
+    exact: bool,
+    seek: bool,
+    offset: bool,
+) -> Select[Any]:
+    """
+    Page wrapper around `stmt`, built once per statement shape.
+
+    Limit, offset and seek values are bind parameters (`page_limit`,
+    `page_offset`, `seek_<i>`), so repeated calls reuse both the Python
+    construct and its compiled form.
+    """
+    counted = stmt.add_columns(func.count().over().label(TOTAL_COLUMN)) if exact else stmt
+
+    base = counted.subquery()
+    columns = [base.c[name] for name, _ in keys]
+    descending = [desc for _, desc in keys]
+
+    page_stmt = select(base).order_by(
+        *(c.desc() if desc else c.asc() for c, desc in zip(columns, descending, strict=True))
+    )
+    if seek:
+        after = [bindparam(f"seek_{i}", type_=c.type) for i, c in enumerate(columns)]
+        page_stmt = page_stmt.where(seek_after(columns, descending, after))
+    elif offset:
+        page_stmt = page_stmt.offset(bindparam("page_offset", type_=Integer))
+    return page_stmt.limit(bindparam("page_limit", type_=Integer))
+
+
+@lru_cache(maxsize=256)
+def _count_statement(stmt: Select[Any]) -> Select[Any]:
+    return select(func.count()).select_from(stmt.subquery())
+
 
 class Repo(ABC):
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
+
+    async def _paginate(
+        self,
+        stmt: Select[Any],
+        *,
+        keys: tuple[SortKey, ...],
+        page: PageParams,
+        params: Mapping[str, Any] | None = None,
+    ) -> Page[Row[Any]]:
+        """
+        Runs `stmt` (filtered, unordered, with labeled columns) as one page.
+
+        `stmt` should be a cached construct taking its values from `params`
+        (bind parameters), so the page wrapper is cached along with it.
+
+        Ordering is by `keys`; with a cursor the page seeks past the last seen
+        key instead of using OFFSET, so an index on the keys serves deep pages
+        as cheaply as the first one.
+
+        An exact total on a first or offset page is a window count in the page
+        statement itself (one pass over the filter). On a cursor page it is a
+        separate count, because a window would make the page read and sort the
+        whole filtered set before seeking; that is why cursor requests default
+        to no total (see `get_page_params`). An estimate comes from the planner,
+        and "none" skips counting. `has_more` always comes from fetching one
+        extra row.
+        """
+        exact = page.total == "exact"
+        params = params or {}
+        bound = {**params, "page_limit": page.limit + 1}
+        after = decode_cursor(page.cursor, size=len(keys)) if page.cursor is not None else None
+        if after is not None:
+            bound.update({f"seek_{i}": v for i, v in enumerate(after)})
+        elif page.offset:
+            bound["page_offset"] = page.offset
+
+        page_stmt = _page_statement(
+            stmt,
+            keys,
+            exact=exact and after is None,
+            seek=after is not None,
+            offset=after is None and bool(page.offset),
+        )
+        rows = (await self.session.execute(page_stmt, bound)).all()
+        has_more = len(rows) > page.limit
+        rows = rows[: page.limit]
+
+        total: int | None = None
+        if exact:
+            if after is not None:
+                total = await self._count(stmt, params)
+            elif rows:
+                total = int(getattr(rows[0], TOTAL_COLUMN))
+            elif not page.offset:
+                total = 0
+            else:
+                # paged past the end: the window saw no rows, count separately
+                total = await self._count(stmt, params)
+        elif page.total == "estimate":
+            total = await self._estimate(stmt, params)
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor([getattr(last, name) for name, _ in keys])
+
+        return Page(total=total, items=list(rows), next_cursor=next_cursor, has_more=has_more)
+
+    def _empty_page(self, *, keys: tuple[SortKey, ...], page: PageParams) -> Page[Any]:
+        """
+        What `_paginate` returns for a filter known to match nothing, without a
+        query: the cursor is still validated and `total` follows the requested mode.
+        """
+        if page.cursor is not None:
+            decode_cursor(page.cursor, size=len(keys))
+        return Page(total=None if page.total == "none" else 0, items=[])
+
+    async def _count(self, stmt: Select[Any], params: Mapping[str, Any]) -> int:
+        return int(await self.session.scalar(_count_statement(stmt), params) or 0)
+
+    async def _estimate(self, stmt: Select[Any], params: Mapping[str, Any]) -> int:
+        plan = await self.session.scalar(Explain(stmt), params)
+        return plan_rows(plan)
@@ -1,39 +1,111 @@
 from __future__ import annotations
 
-from geoalchemy2 import Geometry
-from sqlalchemy import cast, func, select
+import builtins
+from collections.abc import AsyncIterator
+from functools import cache
+from typing import Any
+
+from sqlalchemy import Float, Integer, Select, bindparam, func, select
 
 from app.models.building import Building
 from app.repos.base import Repo
-from app.repos.dto import BuildingRow, Page
+from app.repos.dto import BuildingGeoRow, BuildingRow, Page, PageParams
+from app.repos.geo import geog_point_param, knn_distance
+
+
+@cache
+def _list_stmt() -> Select[Any]:
+    return select(
+        Building.id.label("id"),
+        Building.address.label("address"),
+        Building.lat.label("lat"),
+        Building.lon.label("lon"),
+    )
+
+
+@cache
+def _nearest_stmt(bounded: bool) -> Select[Any]:
+    point = geog_point_param()
+
+    knn = (
+        select(
+            Building.id.label("id"),
+            Building.address.label("address"),
+            Building.lat.label("lat"),
+            Building.lon.label("lon"),
+            Building.geom.label("geom"),
+        )
+        .order_by(knn_distance(Building.geom, point), Building.id.asc())
+        .limit(bindparam("k", type_=Integer))
+    )
+    if bounded:
+        knn = knn.where(func.ST_DWithin(Building.geom, point, bindparam("max_radius_m", type_=Float)))
+    nearest = knn.subquery()
+
+    distance = func.ST_Distance(nearest.c.geom, point).label("distance_m")
+    return select(
+        nearest.c.id,
+        nearest.c.address,
+        nearest.c.lat,
+        nearest.c.lon,
+        distance,
+    ).order_by(distance.asc(), nearest.c.id.asc())
 
 
 class BuildingsRepo(Repo):
-    async def list(self, *, limit: int, offset: int) -> Page[BuildingRow]:
-        total_stmt = select(func.count()).select_from(select(Building.id).subquery())
-        total = int(await self.session.scalar(total_stmt) or 0)
-
-        geom_as_geom = cast(Building.geom, Geometry(geometry_type="POINT", srid=4326))
-
-        stmt = (
-            select(
-                Building.id.label("id"),
-                Building.address.label("address"),
-                func.ST_Y(geom_as_geom).label("lat"),
-                func.ST_X(geom_as_geom).label("lon"),
+    async def list(self, *, page: PageParams) -> Page[BuildingRow]:
+        rows = await self._paginate(_list_stmt(), keys=(("id", False),), page=page)
+        return rows.map(
+            lambda r: BuildingRow(
+                id=int(r.id),
+                address=str(r.address),
+                lat=float(r.lat),
+                lon=float(r.lon),
             )
-            .order_by(Building.id.asc())
-            .limit(limit)
-            .offset(offset)
         )
-        rows = (await self.session.execute(stmt)).all()
-        items = [
-            BuildingRow(
+
+    async def nearest(
+        self,
+        *,
+        lat: float,
+        lon: float,
+        k: int,
+        max_radius_m: float | None = None,
+    ) -> builtins.list[BuildingGeoRow]:
+        """
+        Reverse lookup: k buildings closest to the point, in GiST KNN order.
+        """
+        params: dict[str, Any] = {"lat": lat, "lon": lon, "k": k}
+        if max_radius_m is not None:
+            params["max_radius_m"] = max_radius_m
+
+        rows = (await self.session.execute(_nearest_stmt(max_radius_m is not None), params)).all()
+        return [
+            BuildingGeoRow(
                 id=int(r.id),
                 address=str(r.address),
                 lat=float(r.lat),
                 lon=float(r.lon),
+                distance_m=float(r.distance_m),
             )
             for r in rows
         ]
-        return Page(total=total, items=items)
+
+    async def stream_export(
+        self,
+        *,
+        bbox: tuple[float, float, float, float] | None,
+        batch_size: int,
+    ) -> AsyncIterator[BuildingRow]:
+        """
+        Buildings in id order through a server-side cursor; `bbox` is (min_lat, min_lon, max_lat, max_lon).
+        """
+        stmt = _list_stmt().order_by(Building.id.asc())
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            envelope = func.ST_MakeEnvelope(min_lon, min_lat, max_lon, max_lat, 4326)
+            stmt = stmt.where(func.ST_Intersects(Building.geom_pt, envelope))
+
+        result = await self.session.stream(stmt.execution_options(yield_per=batch_size))
+        async for r in result:
+            yield BuildingRow(id=int(r.id), address=str(r.address), lat=float(r.lat), lon=float(r.lon))
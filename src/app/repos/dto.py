@@ -1,15 +1,42 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Generic, TypeVar
+from typing import Generic, Literal, TypeVar
 
 T = TypeVar("T")
+U = TypeVar("U")
+
+# exact: count in the page statement; estimate: planner statistics; none: has_more only
+TotalMode = Literal["exact", "estimate", "none"]
+
+# contains: substring (ILIKE); fuzzy: trigram similarity
+NameMatch = Literal["contains", "fuzzy"]
+
+
+@dataclass(frozen=True, slots=True)
+class PageParams:
+    limit: int
+    offset: int = 0
+    # opaque keyset cursor; takes precedence over offset
+    cursor: str | None = None
+    total: TotalMode = "exact"
 
 
 @dataclass(frozen=True, slots=True)
 class Page(Generic[T]):
-    total: int
+    total: int | None
     items: list[T]
+    next_cursor: str | None = None
+    has_more: bool = False
+
+    def map(self, fn: Callable[[T], U]) -> Page[U]:
+        return Page(
+            total=self.total,
+            items=[fn(x) for x in self.items],
+            next_cursor=self.next_cursor,
+            has_more=self.has_more,
+        )
 
 
 @dataclass(frozen=True, slots=True)
@@ -20,6 +47,11 @@ class BuildingRow:
     lon: float
 
 
+@dataclass(frozen=True, slots=True)
+class BuildingGeoRow(BuildingRow):
+    distance_m: float
+
+
 @dataclass(frozen=True, slots=True)
 class ActivityRow:
     id: int
@@ -35,6 +67,19 @@ class OrganizationRow:
     building_id: int
 
 
+@dataclass(frozen=True, slots=True)
+class OrganizationSuggestRow:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class SuggestResult:
+    items: list[OrganizationSuggestRow]
+    # the lookup hit its statement timeout; `items` is empty but not a "no matches"
+    timed_out: bool = False
+
+
 @dataclass(frozen=True, slots=True)
 class OrganizationGeoRow(OrganizationRow):
     distance_m: float | None
@@ -47,3 +92,69 @@ class OrganizationCardRow:
     building_id: int
     phones: list[str]
     activities: list[str]
+
+
+@dataclass(frozen=True, slots=True)
+class OrganizationGeoCardRow(OrganizationCardRow):
+    distance_m: float | None
+
+
+@dataclass(frozen=True, slots=True)
+class CardBatch:
+    items: list[OrganizationCardRow]
+    missing: list[int]
+
+
+@dataclass(frozen=True, slots=True)
+class OrganizationFilter:
+    """
+    Filters shared by the search endpoints; unset fields do not filter.
+    """
+
+    name: str | None = None
+    match: NameMatch = "contains"
+    activity_id: int | None = None
+    include_descendants: bool = True
+    building_id: int | None = None
+    # (lat, lon, radius_m)
+    radius: tuple[float, float, float] | None = None
+    # (min_lat, min_lon, max_lat, max_lon)
+    bbox: tuple[float, float, float, float] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ClusterRow:
+    # organizations in one grid cell of the requested bbox
+    count: int
+    # mean position of those organizations
+    lat: float
+    lon: float
+    # extent of the points in the cell, to zoom into it
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+    # set when the cell holds a single organization
+    organization_id: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class ClusterSet:
+    zoom: int
+    cell_deg: float
+    # (min_lat, min_lon, max_lat, max_lon) snapped out to the cell grid
+    bbox: tuple[float, float, float, float]
+    total: int
+    items: list[ClusterRow]
+
+
+@dataclass(frozen=True, slots=True)
+class OrganizationExportRow:
+    id: int
+    name: str
+    building_id: int
+    address: str
+    lat: float
+    lon: float
+    phones: list[str]
+    activities: list[str]
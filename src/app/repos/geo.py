@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any
+
+from geoalchemy2 import Geography
+from sqlalchemy import ColumnElement, Float, bindparam, cast, func
+from sqlalchemy.orm import QueryableAttribute
+
+
+def geog_point(lat: float | ColumnElement[float], lon: float | ColumnElement[float]) -> ColumnElement[Any]:
+    return cast(
+        func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326),
+        Geography(geometry_type="POINT", srid=4326),
+    )
+
+
+def geog_point_param() -> ColumnElement[Any]:
+    """
+    Point built from the `lat` / `lon` bind parameters, for cached statements.
+    """
+    return geog_point(bindparam("lat", type_=Float), bindparam("lon", type_=Float))
+
+
+def knn_distance(
+    geom: ColumnElement[Any] | QueryableAttribute[Any], point: ColumnElement[Any]
+) -> ColumnElement[float]:
+    """
+    `geom <-> point`: index-assisted (GiST) nearest-neighbour ordering.
+    """
+    return geom.op("<->", return_type=Float)(point)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from sqlalchemy import ColumnElement, and_, literal, or_, tuple_
+
+from app.core.errors import ValidationError
+
+KeyValue = int | float
+
+# (column label, descending)
+SortKey = tuple[str, bool]
+
+
+def encode_cursor(values: Sequence[KeyValue]) -> str:
+    """
+    Opaque cursor: urlsafe base64 of the last row's sort key values.
+    """
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *, size: int) -> tuple[KeyValue, ...]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        values = None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(v, int | float) and not isinstance(v, bool) for v in values)
+    ):
+        raise ValidationError(message="Invalid pagination cursor", code="CURSOR_INVALID")
+    return tuple(values)
+
+
+def seek_after(
+    columns: Sequence[ColumnElement[KeyValue]],
+    descending: Sequence[bool],
+    values: Sequence[KeyValue | ColumnElement[KeyValue]],
+) -> ColumnElement[bool]:
+    """
+    Predicate selecting rows strictly after `values` in (columns, descending) order.
+    `values` may be literals or bind parameters.
+
+    Uniform direction uses a row comparison (index friendly), mixed direction
+    falls back to the expanded lexicographic form.
+    """
+    if all(descending) or not any(descending):
+        lhs = tuple_(*columns)
+        rhs = tuple_(*(v if isinstance(v, ColumnElement) else literal(v) for v in values))
+        return lhs < rhs if descending[0] else lhs > rhs
+
+    clauses = []
+    for i, (col, desc, value) in enumerate(zip(columns, descending, values, strict=True)):
+        step = col < value if desc else col > value
+        equal_prefix = [c == v for c, v in zip(columns[:i], values[:i], strict=True)]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
@@ -1,122 +1,540 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Literal
 
-from geoalchemy2 import Geography, Geometry
-from sqlalchemy import cast, distinct, func, select
+from psycopg.errors import QueryCanceled
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Integer,
+    LargeBinary,
+    Row,
+    Select,
+    String,
+    any_,
+    bindparam,
+    cast,
+    distinct,
+    func,
+    literal,
+    null,
+    or_,
+    select,
+)
 from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
 
-from app.models.activity import Activity
+from app.models.activity import Activity, activity_closure
 from app.models.building import Building
 from app.models.organization import Organization, OrganizationPhone, organization_activities
 from app.repos.base import Repo
-from app.repos.dto import OrganizationCardRow, OrganizationGeoRow, OrganizationRow, Page
+from app.repos.dto import (
+    ClusterRow,
+    NameMatch,
+    OrganizationCardRow,
+    OrganizationExportRow,
+    OrganizationFilter,
+    OrganizationGeoRow,
+    OrganizationRow,
+    OrganizationSuggestRow,
+    Page,
+    PageParams,
+    SuggestResult,
+)
+from app.repos.geo import geog_point_param, knn_distance
+from app.repos.keyset import SortKey
 
+# Mapbox Vector Tile grid: tile coordinate units and the edge buffer around each tile
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
 
-class OrganizationsRepo(Repo):
-    async def get_card(self, *, org_id: int) -> OrganizationCardRow | None:
-        phones_agg = func.array_remove(func.array_agg(distinct(OrganizationPhone.phone)), None)
-        acts_agg = func.array_remove(func.array_agg(distinct(Activity.name)), None)
 
-        empty_text_array = cast(
-            postgresql.array([], type_=postgresql.TEXT),
-            postgresql.ARRAY(postgresql.TEXT),
-        )
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _org_row(r: Row[Any]) -> OrganizationRow:
+    return OrganizationRow(id=int(r.id), name=str(r.name), building_id=int(r.building_id))
+
+
+def _org_geo_row(r: Row[Any]) -> OrganizationGeoRow:
+    return OrganizationGeoRow(
+        id=int(r.id),
+        name=str(r.name),
+        building_id=int(r.building_id),
+        distance_m=float(r.distance_m) if r.distance_m is not None else None,
+    )
+
+
+# Statements are built once per shape; values arrive as bind parameters at execute time.
+
+
+def _org_columns() -> tuple[Any, ...]:
+    return (
+        Organization.id.label("id"),
+        Organization.name.label("name"),
+        Organization.building_id.label("building_id"),
+    )
+
+
+def _card_columns() -> tuple[Any, ...]:
+    """
+    Phones and activity names as arrays, aggregated in correlated subqueries.
+    """
+    empty_text_array = cast(
+        postgresql.array([], type_=postgresql.TEXT),
+        postgresql.ARRAY(postgresql.TEXT),
+    )
+
+    phones = (
+        select(func.array_agg(distinct(OrganizationPhone.phone)))
+        .where(OrganizationPhone.organization_id == Organization.id)
+        .scalar_subquery()
+    )
+    activities = (
+        select(func.array_agg(distinct(Activity.name)))
+        .join(organization_activities, organization_activities.c.activity_id == Activity.id)
+        .where(organization_activities.c.organization_id == Organization.id)
+        .scalar_subquery()
+    )
+    return (
+        func.coalesce(phones, empty_text_array).label("phones"),
+        func.coalesce(activities, empty_text_array).label("activities"),
+    )
+
 
-        stmt = (
-            select(
-                Organization.id.label("id"),
-                Organization.name.label("name"),
-                Organization.building_id.label("building_id"),
-                func.coalesce(phones_agg, empty_text_array).label("phones"),
-                func.coalesce(acts_agg, empty_text_array).label("activities"),
+def _activity_filter(activity_id: Any, *, include_descendants: bool) -> ColumnElement[bool]:
+    link = select(organization_activities.c.organization_id).where(
+        organization_activities.c.organization_id == Organization.id
+    )
+    if include_descendants:
+        link = link.join(
+            activity_closure,
+            activity_closure.c.descendant_id == organization_activities.c.activity_id,
+        ).where(activity_closure.c.ancestor_id == activity_id)
+    else:
+        link = link.where(organization_activities.c.activity_id == activity_id)
+    return link.exists()
+
+
+@cache
+def _cards_stmt() -> Select[Any]:
+    return select(*_org_columns(), *_card_columns()).where(
+        Organization.id == any_(bindparam("org_ids", type_=postgresql.ARRAY(Integer)))
+    )
+
+
+@cache
+def _search_stmt(match: NameMatch) -> Select[Any]:
+    name = bindparam("name", type_=String)
+    if match == "fuzzy":
+        return select(
+            *_org_columns(),
+            Organization.name.op("<->", return_type=Float)(name).label("rank"),
+        ).where(Organization.name.op("%")(name))
+    return select(
+        *_org_columns(),
+        func.similarity(Organization.name, name).label("rank"),
+    ).where(Organization.name.ilike(bindparam("pattern", type_=String)))
+
+
+@cache
+def _suggest_stmt() -> Select[Any]:
+    return (
+        select(Organization.id, Organization.name)
+        .where(
+            or_(
+                Organization.name.ilike(bindparam("prefix", type_=String), escape="\\"),
+                Organization.name.ilike(bindparam("word_prefix", type_=String), escape="\\"),
             )
-            .outerjoin(OrganizationPhone, OrganizationPhone.organization_id == Organization.id)
-            .outerjoin(organization_activities, organization_activities.c.organization_id == Organization.id)
-            .outerjoin(Activity, Activity.id == organization_activities.c.activity_id)
-            .where(Organization.id == org_id)
-            .group_by(Organization.id, Organization.name, Organization.building_id)
         )
+        .order_by(
+            Organization.name.op("<->", return_type=Float)(bindparam("q", type_=String)),
+            Organization.id.asc(),
+        )
+        .limit(bindparam("limit", type_=Integer))
+    )
+
+
+@cache
+def _by_building_stmt() -> Select[Any]:
+    return select(*_org_columns()).where(
+        Organization.building_id == bindparam("building_id", type_=Integer)
+    )
+
+
+@cache
+def _by_activity_stmt(include_descendants: bool) -> Select[Any]:
+    activity_id = bindparam("activity_id", type_=Integer)
+    return select(*_org_columns()).where(
+        _activity_filter(activity_id, include_descendants=include_descendants)
+    )
+
+
+@cache
+def _radius_stmt() -> Select[Any]:
+    point = geog_point_param()
+    return (
+        select(*_org_columns(), func.ST_Distance(Building.geom, point).label("distance_m"))
+        .join(Building, Building.id == Organization.building_id)
+        .where(func.ST_DWithin(Building.geom, point, bindparam("radius_m", type_=Float)))
+    )
+
 
-        row = (await self.session.execute(stmt)).one_or_none()
-        if row is None:
-            return None
-
-        phones = [str(x) for x in (row.phones or [])]
-        activities = [str(x) for x in (row.activities or [])]
-        return OrganizationCardRow(
-            id=int(row.id),
-            name=str(row.name),
-            building_id=int(row.building_id),
-            phones=phones,
-            activities=activities,
+@cache
+def _bbox_stmt() -> Select[Any]:
+    return (
+        select(*_org_columns(), null().label("distance_m"))
+        .join(Building, Building.id == Organization.building_id)
+        .where(func.ST_Intersects(Building.geom_pt, _bbox_envelope()))
+    )
+
+
+@cache
+def _nearest_stmt(bounded: bool) -> Select[Any]:
+    point = geog_point_param()
+    knn = (
+        select(*_org_columns(), Building.geom.label("geom"))
+        .join(Building, Building.id == Organization.building_id)
+        .order_by(knn_distance(Building.geom, point), Organization.id.asc())
+        .limit(bindparam("k", type_=Integer))
+    )
+    if bounded:
+        knn = knn.where(func.ST_DWithin(Building.geom, point, bindparam("max_radius_m", type_=Float)))
+    nearest = knn.subquery()
+
+    distance = func.ST_Distance(nearest.c.geom, point).label("distance_m")
+    return select(nearest.c.id, nearest.c.name, nearest.c.building_id, distance).order_by(
+        distance.asc(), nearest.c.id.asc()
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class _FilterShape:
+    """
+    Which filters of an OrganizationFilter are set: the cache key of the
+    statements built from it (values are bound separately, see `_filter_params`).
+    """
+
+    name: NameMatch | None
+    activity: Literal["exact", "subtree"] | None
+    building: bool
+    geo: Literal["radius", "bbox"] | None
+
+    @classmethod
+    def of(cls, f: OrganizationFilter) -> _FilterShape:
+        activity: Literal["exact", "subtree"] | None = None
+        if f.activity_id is not None:
+            activity = "subtree" if f.include_descendants else "exact"
+        geo: Literal["radius", "bbox"] | None = None
+        if f.radius is not None:
+            geo = "radius"
+        elif f.bbox is not None:
+            geo = "bbox"
+        return cls(
+            name=f.match if f.name is not None else None,
+            activity=activity,
+            building=f.building_id is not None,
+            geo=geo,
+        )
+
+
+def _filter_params(f: OrganizationFilter) -> dict[str, Any]:
+    params: dict[str, Any] = {}
+    if f.name is not None:
+        params["name"] = f.name
+        if f.match == "contains":
+            params["pattern"] = f"%{f.name}%"
+    if f.activity_id is not None:
+        params["activity_id"] = f.activity_id
+    if f.building_id is not None:
+        params["building_id"] = f.building_id
+    if f.radius is not None:
+        params["lat"], params["lon"], params["radius_m"] = f.radius
+    elif f.bbox is not None:
+        params["min_lat"], params["min_lon"], params["max_lat"], params["max_lon"] = f.bbox
+    return params
+
+
+def _bbox_envelope() -> ColumnElement[Any]:
+    return func.ST_MakeEnvelope(
+        bindparam("min_lon", type_=Float),
+        bindparam("min_lat", type_=Float),
+        bindparam("max_lon", type_=Float),
+        bindparam("max_lat", type_=Float),
+        4326,
+    )
+
+
+def _filter_clauses(shape: _FilterShape, point: ColumnElement[Any]) -> list[ColumnElement[bool]]:
+    """
+    One index-backed predicate per filter, ANDed: trigram GiST on the name,
+    the activity closure / link indexes, organizations.building_id, GiST on the
+    building point. Every predicate can drive an index scan on its own, so the
+    planner starts from whichever its statistics say is most selective and
+    checks the rest as filters.
+    """
+    clauses: list[ColumnElement[bool]] = []
+    if shape.name == "fuzzy":
+        clauses.append(Organization.name.op("%")(bindparam("name", type_=String)))
+    elif shape.name == "contains":
+        clauses.append(Organization.name.ilike(bindparam("pattern", type_=String)))
+    if shape.activity is not None:
+        activity_id = bindparam("activity_id", type_=Integer)
+        clauses.append(_activity_filter(activity_id, include_descendants=shape.activity == "subtree"))
+    if shape.building:
+        clauses.append(Organization.building_id == bindparam("building_id", type_=Integer))
+    if shape.geo == "radius":
+        clauses.append(func.ST_DWithin(Building.geom, point, bindparam("radius_m", type_=Float)))
+    elif shape.geo == "bbox":
+        clauses.append(func.ST_Intersects(Building.geom_pt, _bbox_envelope()))
+    return clauses
+
+
+def _combined_keys(shape: _FilterShape) -> tuple[SortKey, ...]:
+    # nearest first within a radius, else best name match first, else by id
+    if shape.geo == "radius":
+        return (("distance_m", False), ("id", False))
+    if shape.name == "fuzzy":
+        return (("rank", False), ("id", False))
+    if shape.name == "contains":
+        return (("rank", True), ("id", False))
+    return (("id", False),)
+
+
+@cache
+def _combined_stmt(shape: _FilterShape) -> Select[Any]:
+    point = geog_point_param()
+    columns = [*_org_columns()]
+    if shape.geo == "radius":
+        columns.append(func.ST_Distance(Building.geom, point).label("distance_m"))
+    else:
+        columns.append(null().label("distance_m"))
+    if shape.name == "fuzzy":
+        distance = Organization.name.op("<->", return_type=Float)(bindparam("name", type_=String))
+        columns.append(distance.label("rank"))
+    elif shape.name == "contains":
+        columns.append(func.similarity(Organization.name, bindparam("name", type_=String)).label("rank"))
+
+    stmt = select(*columns)
+    if shape.geo is not None:
+        stmt = stmt.join(Building, Building.id == Organization.building_id)
+    return stmt.where(*_filter_clauses(shape, point))
+
+
+@cache
+def _clusters_stmt(activity: Literal["exact", "subtree"] | None) -> Select[Any]:
+    cell = bindparam("cell_deg", type_=Float)
+    points = (
+        select(
+            func.floor(Building.lon / cell).label("cx"),
+            func.floor(Building.lat / cell).label("cy"),
+            Building.lat,
+            Building.lon,
+            Organization.id,
         )
+        .join(Building, Building.id == Organization.building_id)
+        .where(func.ST_Intersects(Building.geom_pt, _bbox_envelope()))
+    )
+    if activity is not None:
+        activity_id = bindparam("activity_id", type_=Integer)
+        points = points.where(_activity_filter(activity_id, include_descendants=activity == "subtree"))
+    p = points.subquery()
 
-    async def search_by_name(self, *, name: str, limit: int, offset: int) -> Page[OrganizationRow]:
-        pattern = f"%{name}%"
-        where = Organization.name.ilike(pattern)
+    return (
+        select(
+            func.count().label("n"),
+            func.avg(p.c.lat).label("lat"),
+            func.avg(p.c.lon).label("lon"),
+            func.min(p.c.lat).label("min_lat"),
+            func.min(p.c.lon).label("min_lon"),
+            func.max(p.c.lat).label("max_lat"),
+            func.max(p.c.lon).label("max_lon"),
+            func.min(p.c.id).label("organization_id"),
+        )
+        .group_by(p.c.cx, p.c.cy)
+        .order_by(p.c.cx, p.c.cy)
+    )
+
+
+@cache
+def _tile_stmt(activity: Literal["exact", "subtree"] | None) -> Select[Any]:
+    """
+    One MVT tile with two layers: `buildings` (organization count per building)
+    and `organizations` (one point per organization), each capped at
+    `max_features`, concatenated into one bytea.
+    """
+    tile = func.ST_TileEnvelope(
+        bindparam("z", type_=Integer), bindparam("x", type_=Integer), bindparam("y", type_=Integer)
+    )
+    # the tile plus its buffer, in the buildings' SRID so the geom_pt GiST index applies
+    margin = (func.ST_XMax(tile) - func.ST_XMin(tile)) * (MVT_BUFFER / MVT_EXTENT)
+    area = func.ST_Transform(func.ST_Expand(tile, margin), 4326)
+
+    def mvt_geom(geom: Any) -> Any:
+        return func.ST_AsMVTGeom(func.ST_Transform(geom, 3857), tile, MVT_EXTENT, MVT_BUFFER, True).label("geom")
 
-        total_stmt = select(func.count()).select_from(select(Organization.id).where(where).subquery())
-        total = int(await self.session.scalar(total_stmt) or 0)
+    limit = bindparam("max_features", type_=Integer)
+    orgs = (
+        select(Organization.id, Organization.name, Organization.building_id, Building.geom_pt)
+        .join(Building, Building.id == Organization.building_id)
+        .where(func.ST_Intersects(Building.geom_pt, area))
+    )
+    if activity is not None:
+        activity_id = bindparam("activity_id", type_=Integer)
+        orgs = orgs.where(_activity_filter(activity_id, include_descendants=activity == "subtree"))
+    tile_orgs = orgs.cte("tile_orgs")
 
-        stmt = (
-            select(Organization.id, Organization.name, Organization.building_id)
-            .where(where)
-            .order_by(func.similarity(Organization.name, name).desc(), Organization.id.asc())
-            .limit(limit)
-            .offset(offset)
+    per_building = (
+        select(tile_orgs.c.building_id, func.count().label("organizations"))
+        .group_by(tile_orgs.c.building_id)
+        .subquery("per_building")
+    )
+    buildings_layer = (
+        select(
+            Building.id.label("id"),
+            Building.address.label("address"),
+            per_building.c.organizations,
+            mvt_geom(Building.geom_pt),
         )
-        rows = (await self.session.execute(stmt)).all()
-        items = [OrganizationRow(id=int(r.id), name=str(r.name), building_id=int(r.building_id)) for r in rows]
-        return Page(total=total, items=items)
-
-    async def list_by_building(self, *, building_id: int, limit: int, offset: int) -> Page[OrganizationRow]:
-        where = Organization.building_id == building_id
-
-        total_stmt = select(func.count()).select_from(select(Organization.id).where(where).subquery())
-        total = int(await self.session.scalar(total_stmt) or 0)
-
-        stmt = (
-            select(Organization.id, Organization.name, Organization.building_id)
-            .where(where)
-            .order_by(Organization.id.asc())
-            .limit(limit)
-            .offset(offset)
+        .join(per_building, per_building.c.building_id == Building.id)
+        .order_by(per_building.c.organizations.desc(), Building.id.asc())
+        .limit(limit)
+        .subquery("buildings_layer")
+    )
+    orgs_layer = (
+        select(tile_orgs.c.id, tile_orgs.c.name, tile_orgs.c.building_id, mvt_geom(tile_orgs.c.geom_pt))
+        .order_by(tile_orgs.c.id.asc())
+        .limit(limit)
+        .subquery("organizations_layer")
+    )
+
+    def as_mvt(layer: Any, name: str) -> Any:
+        mvt = select(func.ST_AsMVT(layer.table_valued(), name, MVT_EXTENT, "geom", "id")).scalar_subquery()
+        return func.coalesce(mvt, literal(b"", LargeBinary))
+
+    return select(
+        as_mvt(buildings_layer, "buildings").op("||", return_type=LargeBinary)(as_mvt(orgs_layer, "organizations"))
+    )
+
+
+@cache
+def _export_stmt(shape: _FilterShape) -> Select[Any]:
+    return (
+        select(
+            *_org_columns(),
+            Building.address.label("address"),
+            Building.lat.label("lat"),
+            Building.lon.label("lon"),
+            *_card_columns(),
         )
-        rows = (await self.session.execute(stmt)).all()
-        items = [OrganizationRow(id=int(r.id), name=str(r.name), building_id=int(r.building_id)) for r in rows]
-        return Page(total=total, items=items)
+        .join(Building, Building.id == Organization.building_id)
+        .where(*_filter_clauses(shape, geog_point_param()))
+        .order_by(Organization.id.asc())
+    )
+
+
+class OrganizationsRepo(Repo):
+    async def get_cards(self, *, org_ids: Sequence[int]) -> dict[int, OrganizationCardRow]:
+        """
+        Cards for `org_ids` in one statement, keyed by id (missing ids are absent).
 
-    async def list_by_activity_ids(
+        Phones and activities are aggregated in separate correlated subqueries,
+        so an organization is one row regardless of phones x activities.
+        """
+        if not org_ids:
+            return {}
+
+        rows = (await self.session.execute(_cards_stmt(), {"org_ids": list(org_ids)})).all()
+        return {
+            int(r.id): OrganizationCardRow(
+                id=int(r.id),
+                name=str(r.name),
+                building_id=int(r.building_id),
+                phones=[str(x) for x in r.phones],
+                activities=[str(x) for x in r.activities],
+            )
+            for r in rows
+        }
+
+    async def get_card(self, *, org_id: int) -> OrganizationCardRow | None:
+        cards = await self.get_cards(org_ids=[org_id])
+        return cards.get(org_id)
+
+    async def search_by_name(
         self,
         *,
-        activity_ids: Sequence[int],
-        limit: int,
-        offset: int,
+        name: str,
+        page: PageParams,
+        match: NameMatch = "contains",
     ) -> Page[OrganizationRow]:
-        if not activity_ids:
-            return Page(total=0, items=[])
-
-        org_ids_subq = (
-            select(distinct(Organization.id).label("id"))
-            .join(organization_activities, organization_activities.c.organization_id == Organization.id)
-            .where(organization_activities.c.activity_id.in_(list(activity_ids)))
-            .subquery()
-        )
+        """
+        contains: substring match ranked by similarity.
+        fuzzy: trigram match above pg_trgm.similarity_threshold (tolerates typos),
+        ranked by trigram distance so the GiST index can return top-k in order.
+        """
+        if match == "fuzzy":
+            keys: tuple[SortKey, ...] = (("rank", False), ("id", False))
+            params = {"name": name}
+        else:
+            keys = (("rank", True), ("id", False))
+            params = {"name": name, "pattern": f"%{name}%"}
+
+        rows = await self._paginate(_search_stmt(match), keys=keys, page=page, params=params)
+        return rows.map(_org_row)
 
-        total_stmt = select(func.count()).select_from(org_ids_subq)
-        total = int(await self.session.scalar(total_stmt) or 0)
+    async def suggest(self, *, q: str, limit: int) -> SuggestResult:
+        """
+        Autocomplete: names with a word starting with `q`, closest first.
 
-        stmt = (
-            select(Organization.id, Organization.name, Organization.building_id)
-            .join(org_ids_subq, org_ids_subq.c.id == Organization.id)
-            .order_by(Organization.id.asc())
-            .limit(limit)
-            .offset(offset)
+        Meant for a session on the suggest pool, whose connections carry the
+        suggest statement timeout; a lookup that cannot finish in time yields
+        `timed_out` instead of holding the connection.
+        """
+        prefix = _escape_like(q)
+        params = {"prefix": f"{prefix}%", "word_prefix": f"% {prefix}%", "q": q, "limit": limit}
+
+        try:
+            rows = (await self.session.execute(_suggest_stmt(), params)).all()
+        except DBAPIError as e:
+            if not isinstance(e.orig, QueryCanceled):
+                raise
+            await self.session.rollback()
+            return SuggestResult(items=[], timed_out=True)
+        return SuggestResult(items=[OrganizationSuggestRow(id=int(r.id), name=str(r.name)) for r in rows])
+
+    async def list_by_building(self, *, building_id: int, page: PageParams) -> Page[OrganizationRow]:
+        rows = await self._paginate(
+            _by_building_stmt(),
+            keys=(("id", False),),
+            page=page,
+            params={"building_id": building_id},
+        )
+        return rows.map(_org_row)
+
+    async def list_by_activity(
+        self,
+        *,
+        activity_id: int,
+        include_descendants: bool,
+        page: PageParams,
+    ) -> Page[OrganizationRow]:
+        rows = await self._paginate(
+            _by_activity_stmt(include_descendants),
+            keys=(("id", False),),
+            page=page,
+            params={"activity_id": activity_id},
         )
-        rows = (await self.session.execute(stmt)).all()
-        items = [OrganizationRow(id=int(r.id), name=str(r.name), building_id=int(r.building_id)) for r in rows]
-        return Page(total=total, items=items)
+        return rows.map(_org_row)
+
+    def empty_by_activity(self, *, page: PageParams) -> Page[OrganizationRow]:
+        """
+        `list_by_activity` for an activity that does not exist.
+        """
+        return self._empty_page(keys=(("id", False),), page=page)
 
     async def geo_search_radius(
         self,
@@ -124,48 +542,15 @@ class OrganizationsRepo(Repo):
         lat: float,
         lon: float,
         radius_m: float,
-        limit: int,
-        offset: int,
+        page: PageParams,
     ) -> Page[OrganizationGeoRow]:
-        point = cast(
-            func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326),
-            Geography(geometry_type="POINT", srid=4326),
+        rows = await self._paginate(
+            _radius_stmt(),
+            keys=(("distance_m", False), ("id", False)),
+            page=page,
+            params={"lat": lat, "lon": lon, "radius_m": radius_m},
         )
-
-        where = func.ST_DWithin(Building.geom, point, radius_m)
-
-        base = (
-            select(
-                Organization.id.label("id"),
-                Organization.name.label("name"),
-                Organization.building_id.label("building_id"),
-                func.ST_Distance(Building.geom, point).label("distance_m"),
-            )
-            .join(Building, Building.id == Organization.building_id)
-            .where(where)
-            .subquery()
-        )
-
-        total_stmt = select(func.count()).select_from(select(base.c.id).subquery())
-        total = int(await self.session.scalar(total_stmt) or 0)
-
-        stmt = (
-            select(base.c.id, base.c.name, base.c.building_id, base.c.distance_m)
-            .order_by(base.c.distance_m.asc(), base.c.id.asc())
-            .limit(limit)
-            .offset(offset)
-        )
-        rows = (await self.session.execute(stmt)).all()
-        items = [
-            OrganizationGeoRow(
-                id=int(r.id),
-                name=str(r.name),
-                building_id=int(r.building_id),
-                distance_m=float(r.distance_m),
-            )
-            for r in rows
-        ]
-        return Page(total=total, items=items)
+        return rows.map(_org_geo_row)
 
     async def geo_search_bbox(
         self,
@@ -174,41 +559,135 @@ class OrganizationsRepo(Repo):
         min_lon: float,
         max_lat: float,
         max_lon: float,
-        limit: int,
-        offset: int,
+        page: PageParams,
     ) -> Page[OrganizationGeoRow]:
-        envelope = func.ST_MakeEnvelope(min_lon, min_lat, max_lon, max_lat, 4326)
-        geom_as_geom = cast(Building.geom, Geometry(geometry_type="POINT", srid=4326))
-        where = func.ST_Intersects(geom_as_geom, envelope)
-
-        base = (
-            select(
-                Organization.id.label("id"),
-                Organization.name.label("name"),
-                Organization.building_id.label("building_id"),
-            )
-            .join(Building, Building.id == Organization.building_id)
-            .where(where)
-            .subquery()
+        rows = await self._paginate(
+            _bbox_stmt(),
+            keys=(("id", False),),
+            page=page,
+            params={"min_lat": min_lat, "min_lon": min_lon, "max_lat": max_lat, "max_lon": max_lon},
         )
+        return rows.map(_org_geo_row)
+
+    async def clusters(
+        self,
+        *,
+        bbox: tuple[float, float, float, float],
+        cell_deg: float,
+        activity_id: int | None,
+        include_descendants: bool,
+    ) -> list[ClusterRow]:
+        """
+        Organizations in `bbox` counted per `cell_deg` grid cell, in one
+        aggregate statement: the response grows with the number of cells,
+        not with the number of organizations.
+        """
+        activity: Literal["exact", "subtree"] | None = None
+        params: dict[str, Any] = {"cell_deg": cell_deg}
+        params["min_lat"], params["min_lon"], params["max_lat"], params["max_lon"] = bbox
+        if activity_id is not None:
+            activity = "subtree" if include_descendants else "exact"
+            params["activity_id"] = activity_id
+
+        rows = (await self.session.execute(_clusters_stmt(activity), params)).all()
+        return [
+            ClusterRow(
+                count=int(r.n),
+                lat=float(r.lat),
+                lon=float(r.lon),
+                min_lat=float(r.min_lat),
+                min_lon=float(r.min_lon),
+                max_lat=float(r.max_lat),
+                max_lon=float(r.max_lon),
+                organization_id=int(r.organization_id) if r.n == 1 else None,
+            )
+            for r in rows
+        ]
+
+    async def tile(
+        self,
+        *,
+        z: int,
+        x: int,
+        y: int,
+        max_features: int,
+        activity_id: int | None,
+        include_descendants: bool,
+    ) -> bytes:
+        """
+        Mapbox Vector Tile `z/x/y` (Web Mercator) of organizations and their
+        buildings, encoded by PostGIS; empty bytes for an empty tile.
+        """
+        activity: Literal["exact", "subtree"] | None = None
+        params: dict[str, Any] = {"z": z, "x": x, "y": y, "max_features": max_features}
+        if activity_id is not None:
+            activity = "subtree" if include_descendants else "exact"
+            params["activity_id"] = activity_id
+        return bytes((await self.session.execute(_tile_stmt(activity), params)).scalar_one())
 
-        total_stmt = select(func.count()).select_from(select(base.c.id).subquery())
-        total = int(await self.session.scalar(total_stmt) or 0)
+    async def search(self, *, filters: OrganizationFilter, page: PageParams) -> Page[OrganizationGeoRow]:
+        """
+        Any combination of name, activity, building and radius/bbox filters as a
+        single statement, so pagination and totals are over the intersection.
 
-        stmt = (
-            select(base.c.id, base.c.name, base.c.building_id)
-            .order_by(base.c.id.asc())
-            .limit(limit)
-            .offset(offset)
+        Within a radius results come nearest first (with distances), otherwise
+        by name rank when a name is given, otherwise by id.
+        """
+        shape = _FilterShape.of(filters)
+        rows = await self._paginate(
+            _combined_stmt(shape),
+            keys=_combined_keys(shape),
+            page=page,
+            params=_filter_params(filters),
         )
-        rows = (await self.session.execute(stmt)).all()
-        items = [
-            OrganizationGeoRow(
+        return rows.map(_org_geo_row)
+
+    def empty_search(self, *, filters: OrganizationFilter, page: PageParams) -> Page[OrganizationGeoRow]:
+        """
+        `search` for filters known to match nothing (e.g. an unknown activity).
+        """
+        return self._empty_page(keys=_combined_keys(_FilterShape.of(filters)), page=page)
+
+    async def nearest(
+        self,
+        *,
+        lat: float,
+        lon: float,
+        k: int,
+        max_radius_m: float | None = None,
+    ) -> list[OrganizationGeoRow]:
+        """
+        k organizations closest to the point.
+
+        Buildings are walked in GiST KNN order (`<->`) and the scan stops after
+        k organizations, so cost depends on k rather than on how many
+        organizations lie within the radius. Exact distances are computed for
+        the k winners only.
+        """
+        params: dict[str, Any] = {"lat": lat, "lon": lon, "k": k}
+        if max_radius_m is not None:
+            params["max_radius_m"] = max_radius_m
+        stmt = _nearest_stmt(max_radius_m is not None)
+        rows = (await self.session.execute(stmt, params)).all()
+        return [_org_geo_row(r) for r in rows]
+
+    async def stream_export(
+        self, *, filters: OrganizationFilter, batch_size: int
+    ) -> AsyncIterator[OrganizationExportRow]:
+        """
+        Full organization records in id order, read through a server-side cursor
+        `batch_size` rows at a time, so memory stays flat however many rows match.
+        """
+        stmt = _export_stmt(_FilterShape.of(filters)).execution_options(yield_per=batch_size)
+        result = await self.session.stream(stmt, _filter_params(filters))
+        async for r in result:
+            yield OrganizationExportRow(
                 id=int(r.id),
                 name=str(r.name),
                 building_id=int(r.building_id),
-                distance_m=None,
+                address=str(r.address),
+                lat=float(r.lat),
+                lon=float(r.lon),
+                phones=[str(x) for x in r.phones],
+                activities=[str(x) for x in r.activities],
             )
-            for r in rows
-        ]
-        return Page(total=total, items=items)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class PoolStatsOut(BaseModel):
+    name: str
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    waits: int = Field(description="Checkouts observed since start")
+    wait_total_ms: float
+    wait_max_ms: float
+    wait_buckets_ms: dict[str, int] = Field(
+        description="Cumulative checkout wait counts per upper bound (ms)"
+    )
+    timeouts: int = Field(description="Checkouts that gave up after db_pool_timeout_s")
+
+
+class StatementCacheOut(BaseModel):
+    hits: int = Field(description="Executions served from the compiled statement cache")
+    misses: int
+    uncached: int = Field(description="Executions of statements that cannot be cached")
+    compiled_cache_size: int
+    compiled_cache_max: int
+    prepare_threshold: int | None = Field(
+        description="Executions before psycopg prepares a statement server-side (null: never)"
+    )
+
+
+class SlowQueryOut(BaseModel):
+    at: datetime
+    engine: str = Field(description="primary, suggest or replicaN")
+    origin: str = Field(description="Request that issued the statement, empty outside requests")
+    duration_ms: float
+    statement: str
+    params: Any = Field(description="Bound parameters; strings are redacted to their length")
+    plan: Any | None = Field(description="EXPLAIN (ANALYZE, BUFFERS) JSON, for sampled statements")
@@ -8,3 +8,7 @@ class BuildingOut(BaseModel):
     address: str
     lat: float = Field(ge=-90, le=90)
     lon: float = Field(ge=-180, le=180)
+
+
+class BuildingGeoOut(BuildingOut):
+    distance_m: float = Field(ge=0)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Generic, TypeVar
+from typing import Generic, Literal, TypeVar
 
 from pydantic import BaseModel, Field
 
@@ -10,8 +10,21 @@ T = TypeVar("T")
 class Pagination(BaseModel):
     limit: int = Field(default=50, ge=1, le=200)
     offset: int = Field(default=0, ge=0)
+    cursor: str | None = Field(
+        default=None,
+        description="Opaque `next_cursor` from the previous page; replaces offset",
+    )
+    include_total: Literal["exact", "estimate", "none"] | None = Field(
+        default=None,
+        description=(
+            "exact count, planner estimate, or no total (use has_more); "
+            "default: exact on the first page, none on cursor pages"
+        ),
+    )
 
 
 class ListResponse(BaseModel, Generic[T]):
-    total: int
+    total: int | None
     items: list[T]
+    next_cursor: str | None = None
+    has_more: bool = False
@@ -9,6 +9,11 @@ class OrganizationOut(BaseModel):
     building_id: int
 
 
+class OrganizationSuggestOut(BaseModel):
+    id: int
+    name: str
+
+
 class OrganizationCardOut(BaseModel):
     id: int
     name: str
@@ -19,3 +24,33 @@ class OrganizationCardOut(BaseModel):
 
 class OrganizationGeoOut(OrganizationOut):
     distance_m: float | None = Field(default=None, ge=0)
+
+
+class OrganizationGeoCardOut(OrganizationCardOut):
+    distance_m: float | None = Field(default=None, ge=0)
+
+
+class OrganizationCardsOut(BaseModel):
+    items: list[OrganizationCardOut]
+    missing: list[int]
+
+
+class ClusterOut(BaseModel):
+    count: int = Field(ge=1)
+    lat: float = Field(description="Mean position of the cell's organizations")
+    lon: float
+    min_lat: float = Field(description="Extent of the cell's points")
+    min_lon: float
+    max_lat: float
+    max_lon: float
+    organization_id: int | None = Field(description="Set when the cell holds a single organization")
+
+
+class ClustersOut(BaseModel):
+    zoom: int
+    cell_deg: float = Field(description="Grid cell size in degrees")
+    bbox: tuple[float, float, float, float] = Field(
+        description="(min_lat, min_lon, max_lat, max_lon), widened to whole cells"
+    )
+    total: int
+    items: list[ClusterOut]
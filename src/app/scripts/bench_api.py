@@ -0,0 +1,485 @@
+"""
+End-to-end latency benchmark of the /api/v1 routes.
+
+Runs against a live API and the database behind it:
+
+    docker compose up -d db && alembic upgrade head
+    python -m app.scripts.generate --scale 1000000 --truncate
+    uvicorn app.main:app --app-dir src --workers 4
+    python -m app.scripts.bench_api --concurrency 1,16,64 --duration 15
+    python -m app.scripts.bench_api --baseline bench-results/api-<previous>.json
+
+Request parameters are drawn from a random sample of the dataset (ids,
+coordinates, name fragments), so every request is a realistic, mostly uncached one.
+Each scenario runs closed-loop at each concurrency level. Throughput and
+p50/p95/p99 go to a JSON file. With --baseline, a scenario whose p95 grew or
+whose throughput fell by more than --threshold is flagged, and the exit status is 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+import psycopg
+
+from app.core.asyncio_win import install_windows_selector_event_loop
+from app.core.settings import get_settings
+from app.db.session import libpq_dsn
+from app.scripts.bench_tiles import tile_of
+
+install_windows_selector_event_loop()
+
+SAMPLE_SIZE = 2000
+# p95 changes below this are noise whatever the ratio
+NOISE_FLOOR_MS = 1.0
+
+SAMPLE_SQL = {
+    "buildings": "SELECT id, lat, lon FROM buildings ORDER BY random() LIMIT %s",
+    "organizations": "SELECT id, name, building_id FROM organizations ORDER BY random() LIMIT %s",
+    "activities": "SELECT id, depth FROM activities",
+}
+
+DATASET_SQL = """
+SELECT relname, reltuples::bigint
+FROM pg_class
+WHERE relname IN ('activities', 'buildings', 'organizations', 'organization_phones', 'organization_activities')
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class Sample:
+    points: list[tuple[float, float]]
+    building_ids: list[int]
+    org_ids: list[int]
+    words: list[str]
+    activity_ids: list[int]
+
+
+Request = tuple[str, dict[str, Any]]
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    name: str
+    build: Callable[[random.Random, Sample], Request]
+    # whole-table exports and similar; only with --heavy
+    heavy: bool = False
+
+
+@dataclass(slots=True)
+class Result:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    statuses: dict[str, int] = field(default_factory=dict)
+
+
+def _page(rng: random.Random) -> dict[str, Any]:
+    return {
+        "limit": rng.choice((20, 50, 50, 100)),
+        "include_total": rng.choice(("exact", "estimate", "none")),
+    }
+
+
+def _expand(rng: random.Random) -> dict[str, Any]:
+    return {"expand": "card"} if rng.random() < 0.3 else {}
+
+
+def _point(rng: random.Random, s: Sample) -> tuple[float, float]:
+    # jitter so neighbouring requests do not share a quantized cache key
+    lat, lon = rng.choice(s.points)
+    return lat + rng.uniform(-0.002, 0.002), lon + rng.uniform(-0.002, 0.002)
+
+
+def _bbox(rng: random.Random, s: Sample) -> dict[str, Any]:
+    lat, lon = _point(rng, s)
+    half = rng.choice((0.002, 0.01, 0.03))
+    return {"min_lat": lat - half, "min_lon": lon - half, "max_lat": lat + half, "max_lon": lon + half}
+
+
+def _typo(rng: random.Random, word: str) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+
+
+def _orgs_by_name(rng: random.Random, s: Sample) -> Request:
+    word = rng.choice(s.words)
+    if rng.random() < 0.3:
+        return "/organizations", {"name": _typo(rng, word), "match": "fuzzy", **_page(rng)}
+    return "/organizations", {"name": word[: rng.randint(3, len(word))], **_page(rng), **_expand(rng)}
+
+
+def _orgs_by_activity(rng: random.Random, s: Sample) -> Request:
+    params = {"include_descendants": rng.random() < 0.7, **_page(rng), **_expand(rng)}
+    return f"/organizations/by-activity/{rng.choice(s.activity_ids)}", params
+
+
+def _orgs_geo_radius(rng: random.Random, s: Sample) -> Request:
+    lat, lon = _point(rng, s)
+    radius = rng.choice((250, 1000, 1000, 5000))
+    return "/organizations/geo", {"lat": lat, "lon": lon, "radius_m": radius, **_page(rng), **_expand(rng)}
+
+
+def _orgs_geo_bbox(rng: random.Random, s: Sample) -> Request:
+    return "/organizations/geo", {**_bbox(rng, s), **_page(rng), **_expand(rng)}
+
+
+def _orgs_search(rng: random.Random, s: Sample) -> Request:
+    # name within a radius, activity within a bbox, or all three
+    word = rng.choice(s.words)
+    lat, lon = _point(rng, s)
+    combos: list[dict[str, Any]] = [
+        {"name": word[:4], "lat": lat, "lon": lon, "radius_m": rng.choice((1000, 2000, 5000))},
+        {"activity_id": rng.choice(s.activity_ids), **_bbox(rng, s)},
+        {"name": word[:4], "activity_id": rng.choice(s.activity_ids), "lat": lat, "lon": lon, "radius_m": 5000},
+    ]
+    return "/organizations/search", {**rng.choice(combos), **_page(rng), **_expand(rng)}
+
+
+def _orgs_clusters(rng: random.Random, s: Sample) -> Request:
+    # a viewport around a sample point: whole city at low zoom, a few streets at high zoom
+    lat, lon = _point(rng, s)
+    zoom = rng.choice((10, 12, 14, 16))
+    half_lat, half_lon = 270 / 2**zoom, 480 / 2**zoom
+    params: dict[str, Any] = {
+        "min_lat": lat - half_lat, "min_lon": lon - half_lon,
+        "max_lat": lat + half_lat, "max_lon": lon + half_lon,
+        "zoom": zoom,
+    }
+    if rng.random() < 0.3:
+        params["activity_id"] = rng.choice(s.activity_ids)
+    return "/organizations/clusters", params
+
+
+def _tile(rng: random.Random, s: Sample) -> Request:
+    lat, lon = _point(rng, s)
+    zoom = rng.choice((12, 14, 16))
+    x, y = tile_of(lat, lon, zoom)
+    return f"/tiles/{zoom}/{x}/{y}.mvt", {}
+
+
+def _orgs_suggest(rng: random.Random, s: Sample) -> Request:
+    word = rng.choice(s.words)
+    return "/organizations/suggest", {"q": word[: rng.randint(2, min(len(word), 6))], "limit": 10}
+
+
+def _orgs_nearest(rng: random.Random, s: Sample) -> Request:
+    lat, lon = _point(rng, s)
+    return "/organizations/nearest", {"lat": lat, "lon": lon, "k": rng.choice((5, 10, 20))}
+
+
+def _orgs_cards(rng: random.Random, s: Sample) -> Request:
+    ids = rng.sample(s.org_ids, min(len(s.org_ids), rng.choice((5, 20, 50))))
+    return "/organizations/cards", {"ids": ",".join(map(str, ids))}
+
+
+def _org_card(rng: random.Random, s: Sample) -> Request:
+    return f"/organizations/{rng.choice(s.org_ids)}", {}
+
+
+def _buildings_list(rng: random.Random, s: Sample) -> Request:
+    return "/buildings", {**_page(rng), "offset": rng.choice((0, 0, 0, 1000))}
+
+
+def _buildings_nearest(rng: random.Random, s: Sample) -> Request:
+    lat, lon = _point(rng, s)
+    return "/buildings/nearest", {"lat": lat, "lon": lon, "k": rng.choice((1, 5, 10))}
+
+
+def _building_orgs(rng: random.Random, s: Sample) -> Request:
+    return f"/buildings/{rng.choice(s.building_ids)}/organizations", {**_page(rng), **_expand(rng)}
+
+
+def _activities_list(rng: random.Random, s: Sample) -> Request:
+    return "/activities", {"max_depth": rng.choice((1, 2, 3)), **_page(rng)}
+
+
+def _activities_tree(rng: random.Random, s: Sample) -> Request:
+    return "/activities/tree", {"max_depth": rng.choice((1, 2, 3))}
+
+
+def _export_orgs_radius(rng: random.Random, s: Sample) -> Request:
+    lat, lon = _point(rng, s)
+    return "/export/organizations", {"lat": lat, "lon": lon, "radius_m": 500, "format": rng.choice(("ndjson", "csv"))}
+
+
+def _export_building_orgs(rng: random.Random, s: Sample) -> Request:
+    return "/export/organizations", {"building_id": rng.choice(s.building_ids)}
+
+
+def _export_activities(rng: random.Random, s: Sample) -> Request:
+    return "/export/activities", {"gzip": rng.random() < 0.5}
+
+
+def _export_buildings(rng: random.Random, s: Sample) -> Request:
+    return "/export/buildings", {"gzip": True}
+
+
+def _admin_pool(rng: random.Random, s: Sample) -> Request:
+    return "/admin/pool", {}
+
+
+SCENARIOS: tuple[Scenario, ...] = (
+    Scenario("organizations.by_name", _orgs_by_name),
+    Scenario("organizations.by_activity", _orgs_by_activity),
+    Scenario("organizations.geo_radius", _orgs_geo_radius),
+    Scenario("organizations.geo_bbox", _orgs_geo_bbox),
+    Scenario("organizations.search", _orgs_search),
+    Scenario("organizations.clusters", _orgs_clusters),
+    Scenario("organizations.suggest", _orgs_suggest),
+    Scenario("organizations.nearest", _orgs_nearest),
+    Scenario("organizations.cards", _orgs_cards),
+    Scenario("organizations.card", _org_card),
+    Scenario("buildings.list", _buildings_list),
+    Scenario("buildings.nearest", _buildings_nearest),
+    Scenario("buildings.organizations", _building_orgs),
+    Scenario("tiles.mvt", _tile),
+    Scenario("activities.list", _activities_list),
+    Scenario("activities.tree", _activities_tree),
+    Scenario("export.organizations_radius", _export_orgs_radius),
+    Scenario("export.building_organizations", _export_building_orgs),
+    Scenario("export.activities", _export_activities),
+    Scenario("export.buildings", _export_buildings, heavy=True),
+    Scenario("admin.pool", _admin_pool),
+)
+
+
+def _mixed(scenarios: list[Scenario]) -> Scenario:
+    """
+    Uniform mix of the given scenarios, closer to real traffic than any single route.
+    """
+    builders = [s.build for s in scenarios]
+    return Scenario("mixed", lambda rng, s: rng.choice(builders)(rng, s))
+
+
+async def _sample(dsn: str) -> tuple[Sample, dict[str, int]]:
+    async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+        buildings = await (await conn.execute(SAMPLE_SQL["buildings"], (SAMPLE_SIZE,))).fetchall()
+        orgs = await (await conn.execute(SAMPLE_SQL["organizations"], (SAMPLE_SIZE,))).fetchall()
+        activities = await (await conn.execute(SAMPLE_SQL["activities"])).fetchall()
+        dataset = {name: int(n) for name, n in await (await conn.execute(DATASET_SQL)).fetchall()}
+
+    if not buildings or not orgs or not activities:
+        raise SystemExit("the database is empty; seed it first (python -m app.scripts.generate)")
+
+    words = sorted({w for _, name, _ in orgs for w in re.findall(r"[^\W\d_]{4,}", name)})
+    sample = Sample(
+        points=[(float(lat), float(lon)) for _, lat, lon in buildings],
+        # organizations' buildings: popular buildings come up proportionally more often
+        building_ids=[int(b) for _, _, b in orgs],
+        org_ids=[int(i) for i, _, _ in orgs],
+        words=words,
+        activity_ids=[int(i) for i, _ in activities],
+    )
+    return sample, dataset
+
+
+def _percentile(sorted_ms: list[float], q: int) -> float:
+    if len(sorted_ms) == 1:
+        return sorted_ms[0]
+    return statistics.quantiles(sorted_ms, n=100, method="inclusive")[q - 1]
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    sample: Sample,
+    *,
+    concurrency: int,
+    duration_s: float,
+    seed: int,
+) -> tuple[list[float], Counter[str], float]:
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    deadline = time.perf_counter() + duration_s
+
+    async def worker(i: int) -> None:
+        rng = random.Random(f"{seed}:{scenario.name}:{concurrency}:{i}")
+        while time.perf_counter() < deadline:
+            path, params = scenario.build(rng, sample)
+            started = time.perf_counter()
+            try:
+                resp = await client.get(path, params=params)
+                status = str(resp.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def _measure(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    sample: Sample,
+    *,
+    concurrency: int,
+    duration_s: float,
+    warmup_s: float,
+    seed: int,
+) -> Result:
+    if warmup_s > 0:
+        await _drive(client, scenario, sample, concurrency=concurrency, duration_s=warmup_s, seed=seed + 1)
+    latencies, statuses, elapsed = await _drive(
+        client, scenario, sample, concurrency=concurrency, duration_s=duration_s, seed=seed
+    )
+    ordered = sorted(latencies)
+    errors = sum(n for status, n in statuses.items() if not status.isdigit() or int(status) >= 400)
+    return Result(
+        scenario=scenario.name,
+        concurrency=concurrency,
+        requests=len(ordered),
+        errors=errors,
+        rps=round(len(ordered) / elapsed, 1),
+        p50_ms=round(_percentile(ordered, 50), 2),
+        p95_ms=round(_percentile(ordered, 95), 2),
+        p99_ms=round(_percentile(ordered, 99), 2),
+        max_ms=round(ordered[-1], 2),
+        statuses=dict(sorted(statuses.items())),
+    )
+
+
+def _compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]], *, threshold: float) -> list[str]:
+    """
+    Human-readable regressions of `results` against `baseline`.
+    """
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = before.get((r["scenario"], r["concurrency"]))
+        if b is None:
+            continue
+        key = f"{r['scenario']} @{r['concurrency']}"
+        if r["p95_ms"] - b["p95_ms"] > NOISE_FLOOR_MS and r["p95_ms"] > b["p95_ms"] * (1 + threshold):
+            regressions.append(f"{key}: p95 {b['p95_ms']} -> {r['p95_ms']} ms")
+        if b["rps"] and r["rps"] < b["rps"] * (1 - threshold):
+            regressions.append(f"{key}: throughput {b['rps']} -> {r['rps']} req/s")
+        if r["errors"] > b["errors"]:
+            regressions.append(f"{key}: errors {b['errors']} -> {r['errors']}")
+    return regressions
+
+
+def _print_result(r: Result) -> None:
+    print(
+        f"{r.scenario:<34} c={r.concurrency:<4} {r.rps:>9.1f} req/s  "
+        f"p50 {r.p50_ms:>8.2f}  p95 {r.p95_ms:>8.2f}  p99 {r.p99_ms:>8.2f} ms  "
+        f"errors {r.errors}"
+    )
+
+
+async def run(
+    *,
+    base_url: str,
+    scenarios: list[Scenario],
+    concurrency: list[int],
+    duration_s: float,
+    warmup_s: float,
+    seed: int,
+) -> dict[str, Any]:
+    settings = get_settings()
+    sample, dataset = await _sample(libpq_dsn(settings.database_url))
+
+    results: list[Result] = []
+    limits = httpx.Limits(max_connections=max(concurrency), max_keepalive_connections=max(concurrency))
+    async with httpx.AsyncClient(
+        base_url=base_url.rstrip("/") + "/api/v1",
+        headers={"X-API-Key": settings.api_key},
+        limits=limits,
+        timeout=60,
+    ) as client:
+        for c in concurrency:
+            for scenario in scenarios:
+                result = await _measure(
+                    client, scenario, sample, concurrency=c, duration_s=duration_s, warmup_s=warmup_s, seed=seed
+                )
+                _print_result(result)
+                results.append(result)
+
+    return {
+        "meta": {
+            "started_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "base_url": base_url,
+            "duration_s": duration_s,
+            "warmup_s": warmup_s,
+            "seed": seed,
+            "dataset": dataset,
+        },
+        "results": [asdict(r) for r in results],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the /api/v1 routes")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", default="1,16,64", help="Comma-separated levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario and level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--only", help="Regex over scenario names")
+    parser.add_argument("--heavy", action="store_true", help="Include whole-table exports")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, help="Default: bench-results/api-<timestamp>.json")
+    parser.add_argument("--baseline", type=Path, help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if args.heavy or not s.heavy]
+    if args.only:
+        scenarios = [s for s in scenarios if re.search(args.only, s.name)]
+    if not scenarios:
+        raise SystemExit("no scenarios selected")
+    if len(scenarios) > 1:
+        scenarios.append(_mixed([s for s in scenarios if not s.heavy]))
+
+    report = asyncio.run(
+        run(
+            base_url=args.base_url,
+            scenarios=scenarios,
+            concurrency=[int(c) for c in args.concurrency.split(",") if c.strip()],
+            duration_s=args.duration,
+            warmup_s=args.warmup,
+            seed=args.seed,
+        )
+    )
+
+    out: Path = args.out or Path("bench-results") / f"api-{datetime.now(UTC):%Y%m%dT%H%M%SZ}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results: {out}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = _compare(report["results"], baseline["results"], threshold=args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
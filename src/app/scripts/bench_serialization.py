@@ -0,0 +1,128 @@
+"""
+CPU cost of encoding one response: the previous model path vs `dto_response`.
+
+The model path reproduces what the routes used to do: asdict() -> Pydantic model,
+then FastAPI's response_model validation + serialization + json.dumps.
+
+    python -m app.scripts.bench_serialization --items 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+from collections.abc import Callable
+from dataclasses import asdict
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.api.responses import dto_response
+from app.repos.dto import ActivityRow, OrganizationCardRow, Page
+from app.schemas.activity import ActivityNode
+from app.schemas.common import ListResponse
+from app.schemas.organization import OrganizationCardOut, OrganizationOut
+from app.services.taxonomy import ActivityNodeDTO, ActivityTaxonomy
+
+
+def _cards_page(n: int) -> Page[OrganizationCardRow]:
+    return Page(
+        total=n * 10,
+        items=[
+            OrganizationCardRow(
+                id=i,
+                name=f"Organization {i}",
+                building_id=i % 97,
+                phones=[f"8-800-555-{i:04d}", f"2-{i:03d}-{i:03d}"],
+                activities=["Food", "Meat products", "Dairy"],
+            )
+            for i in range(n)
+        ],
+        next_cursor="eyJrIjpbMTAsMjBdfQ",
+        has_more=True,
+    )
+
+
+def _tree(per_level: int) -> list[ActivityNodeDTO]:
+    rows: list[ActivityRow] = []
+    next_id = 1
+    for a in range(per_level):
+        root = next_id
+        rows.append(ActivityRow(id=root, name=f"Activity {a}", parent_id=None, depth=1))
+        next_id += 1
+        for b in range(per_level):
+            child = next_id
+            rows.append(ActivityRow(id=child, name=f"Activity {a}.{b}", parent_id=root, depth=2))
+            next_id += 1
+            for c in range(per_level):
+                rows.append(ActivityRow(id=next_id, name=f"Activity {a}.{b}.{c}", parent_id=child, depth=3))
+                next_id += 1
+    return ActivityTaxonomy.build(1, rows).tree(max_depth=3)
+
+
+def _model_path_page(page: Page[OrganizationCardRow]) -> bytes:
+    adapter = _PAGE_ADAPTER
+    model = ListResponse[OrganizationCardOut](
+        total=page.total,
+        items=[OrganizationCardOut(**asdict(x)) for x in page.items],
+        next_cursor=page.next_cursor,
+        has_more=page.has_more,
+    )
+    validated = adapter.validate_python(model, from_attributes=True)
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+
+def _model_path_tree(tree: list[ActivityNodeDTO]) -> bytes:
+    def map_node(n: ActivityNodeDTO) -> ActivityNode:
+        return ActivityNode(
+            id=n.id,
+            name=n.name,
+            parent_id=n.parent_id,
+            depth=n.depth,
+            children=[map_node(c) for c in n.children],
+        )
+
+    validated = _TREE_ADAPTER.validate_python([map_node(n) for n in tree], from_attributes=True)
+    return json.dumps(_TREE_ADAPTER.dump_python(validated, mode="json")).encode()
+
+
+_PAGE_ADAPTER: TypeAdapter[Any] = TypeAdapter(
+    ListResponse[OrganizationCardOut] | ListResponse[OrganizationOut]
+)
+_TREE_ADAPTER: TypeAdapter[Any] = TypeAdapter(list[ActivityNode])
+
+
+def _bench(label: str, fn: Callable[[], Any], repeat: int) -> float:
+    per_call = min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat
+    print(f"  {label:<12} {per_call * 1e6:10.1f} us/response")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200, help="Cards per page")
+    parser.add_argument("--tree-fanout", type=int, default=8, help="Children per activity node")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    page = _cards_page(args.items)
+    tree = _tree(args.tree_fanout)
+    sub = Response()
+
+    assert json.loads(_model_path_page(page)) == json.loads(dto_response(page, sub).encode())
+    assert json.loads(_model_path_tree(tree)) == json.loads(dto_response(tree, sub).encode())
+
+    for label, old, new in (
+        (f"page of {args.items} cards", lambda: _model_path_page(page), lambda: dto_response(page, sub).encode()),
+        ("activity tree", lambda: _model_path_tree(tree), lambda: dto_response(tree, sub).encode()),
+    ):
+        print(label)
+        before = _bench("model path", old, args.repeat)
+        after = _bench("dto_response", new, args.repeat)
+        print(f"  speedup      {before / after:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Python-side cost of producing an executable page statement, before and after
+the statement builders were cached.
+
+"rebuilt" constructs the radius-search page statement from scratch on every
+call, as the repos used to; "cached" reuses the per-shape construct and only
+binds values. Each shape `Repo._paginate` builds is measured: the first page,
+an offset page and a cursor page. Both go through SQLAlchemy's compiled cache lookup, as execution
+does, so the difference is construction plus cache-key generation.
+
+    python -m app.scripts.bench_statements
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.dialects.postgresql.psycopg import PGDialectAsync_psycopg
+
+from app.models.building import Building
+from app.models.organization import Organization
+from app.repos.base import TOTAL_COLUMN, _page_statement
+from app.repos.geo import geog_point
+from app.repos.keyset import seek_after
+from app.repos.organizations import _radius_stmt
+
+DIALECT = PGDialectAsync_psycopg()  # type: ignore[no-untyped-call]
+
+
+@dataclass(frozen=True, slots=True)
+class Shape:
+    """
+    A page statement shape as `Repo._paginate` builds it.
+    """
+
+    exact: bool
+    seek: bool
+    offset: bool
+
+
+# first page (window total), offset page (window total + OFFSET) and cursor page
+# (seek, no window: its total, if asked for, is a separate count)
+SHAPES = {
+    "first": Shape(exact=True, seek=False, offset=False),
+    "offset": Shape(exact=True, seek=False, offset=True),
+    "cursor": Shape(exact=False, seek=True, offset=False),
+}
+
+KEYS = (("distance_m", False), ("id", False))
+
+
+def _rebuilt(shape: Shape, lat: float, lon: float, radius_m: float) -> Select[Any]:
+    point = geog_point(lat, lon)
+    stmt = (
+        select(
+            Organization.id.label("id"),
+            Organization.name.label("name"),
+            Organization.building_id.label("building_id"),
+            func.ST_Distance(Building.geom, point).label("distance_m"),
+        )
+        .join(Building, Building.id == Organization.building_id)
+        .where(func.ST_DWithin(Building.geom, point, radius_m))
+    )
+    if shape.exact:
+        stmt = stmt.add_columns(func.count().over().label(TOTAL_COLUMN))
+    base = stmt.subquery()
+    page = select(base).order_by(base.c.distance_m.asc(), base.c.id.asc())
+    if shape.seek:
+        page = page.where(seek_after([base.c.distance_m, base.c.id], [False, False], (120.5, 42)))
+    elif shape.offset:
+        page = page.offset(50)
+    return page.limit(51)
+
+
+def _cached(shape: Shape) -> Select[Any]:
+    return _page_statement(_radius_stmt(), KEYS, exact=shape.exact, seek=shape.seek, offset=shape.offset)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    repeat: int = args.repeat
+
+    compiled_cache: dict[Any, Any] = {}
+
+    def run(build: Callable[[], Select[Any]]) -> None:
+        build()._compile_w_cache(DIALECT, compiled_cache=compiled_cache, column_keys=[])
+
+    def per_call(build: Callable[[], Select[Any]]) -> float:
+        run(build)  # warm the compiled cache for this shape
+        return min(timeit.repeat(partial(run, build), number=repeat, repeat=5)) / repeat
+
+    for name, shape in SHAPES.items():
+        rebuilt = per_call(partial(_rebuilt, shape, 55.75, 37.61, 1000.0))
+        cached = per_call(partial(_cached, shape))
+        print(
+            f"{name:<7} rebuilt {rebuilt * 1e6:8.1f} us  cached {cached * 1e6:8.1f} us  "
+            f"speedup {rebuilt / cached:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
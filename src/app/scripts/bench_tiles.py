@@ -0,0 +1,203 @@
+"""
+Vector tile generation time in PostGIS, per zoom level, without the tile cache.
+
+Tiles are the ones holding the buildings of randomly sampled organizations, so busy
+areas come up as often as they are busy, which is where a map spends its requests:
+
+    python -m app.scripts.generate --scale 1000000 --truncate
+    python -m app.scripts.bench_tiles --zooms 10,12,14,16 --tiles 200
+
+Every tile is rendered once, through the same statement as /tiles/{z}/{x}/{y}.mvt,
+and p50/p95/max time plus tile sizes go to a JSON file. With --activity-share, that
+fraction of the tiles also filters by a random activity (with descendants).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import text
+
+from app.core.asyncio_win import install_windows_selector_event_loop
+from app.core.settings import get_settings
+from app.db.session import AsyncSessionMaker, engine
+from app.repos.organizations import OrganizationsRepo
+
+install_windows_selector_event_loop()
+
+SAMPLE_SQL = text(
+    """
+    SELECT b.lat, b.lon
+    FROM organizations o
+    JOIN buildings b ON b.id = o.building_id
+    ORDER BY random()
+    LIMIT :n
+    """
+)
+ACTIVITIES_SQL = text("SELECT id FROM activities WHERE depth = 1")
+
+
+@dataclass(slots=True)
+class ZoomResult:
+    zoom: int
+    tiles: int
+    empty: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    mean_kib: float
+    max_kib: float
+
+
+def tile_of(lat: float, lon: float, zoom: int) -> tuple[int, int]:
+    """
+    Web Mercator (slippy map) tile containing a point.
+    """
+    n = 2**zoom
+    lat_r = math.radians(max(min(lat, 85.0511), -85.0511))
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(lat_r)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def _percentile(sorted_ms: list[float], q: int) -> float:
+    if len(sorted_ms) == 1:
+        return sorted_ms[0]
+    return statistics.quantiles(sorted_ms, n=100, method="inclusive")[q - 1]
+
+
+async def _sample(n: int) -> tuple[list[tuple[float, float]], list[int]]:
+    async with AsyncSessionMaker() as session:
+        points = (await session.execute(SAMPLE_SQL, {"n": n})).all()
+        activities = (await session.execute(ACTIVITIES_SQL)).scalars().all()
+    if not points:
+        raise SystemExit("the database is empty; seed it first (python -m app.scripts.generate)")
+    return [(float(lat), float(lon)) for lat, lon in points], [int(a) for a in activities]
+
+
+async def _bench_zoom(
+    zoom: int,
+    points: list[tuple[float, float]],
+    activities: list[int],
+    *,
+    tiles: int,
+    activity_share: float,
+    max_features: int,
+    rng: random.Random,
+) -> ZoomResult:
+    coords = list(dict.fromkeys(tile_of(lat, lon, zoom) for lat, lon in points))
+    rng.shuffle(coords)
+    coords = coords[:tiles]
+
+    timings: list[float] = []
+    sizes: list[int] = []
+    async with AsyncSessionMaker() as session:
+        repo = OrganizationsRepo(session)
+        for x, y in coords:
+            activity_id = rng.choice(activities) if activities and rng.random() < activity_share else None
+            started = time.perf_counter()
+            tile = await repo.tile(
+                z=zoom,
+                x=x,
+                y=y,
+                max_features=max_features,
+                activity_id=activity_id,
+                include_descendants=True,
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+            sizes.append(len(tile))
+
+    timings.sort()
+    return ZoomResult(
+        zoom=zoom,
+        tiles=len(timings),
+        empty=sum(1 for s in sizes if s == 0),
+        p50_ms=round(_percentile(timings, 50), 2),
+        p95_ms=round(_percentile(timings, 95), 2),
+        max_ms=round(timings[-1], 2),
+        mean_kib=round(statistics.fmean(sizes) / 1024, 1),
+        max_kib=round(max(sizes) / 1024, 1),
+    )
+
+
+async def run(
+    *,
+    zooms: list[int],
+    tiles: int,
+    activity_share: float,
+    max_features: int,
+    seed: int,
+) -> dict[str, Any]:
+    rng = random.Random(seed)
+    points, activities = await _sample(tiles * 4)
+
+    results: list[ZoomResult] = []
+    try:
+        for zoom in zooms:
+            r = await _bench_zoom(
+                zoom,
+                points,
+                activities,
+                tiles=tiles,
+                activity_share=activity_share,
+                max_features=max_features,
+                rng=rng,
+            )
+            print(
+                f"z={r.zoom:<3} tiles {r.tiles:>5} (empty {r.empty:>4})  "
+                f"p50 {r.p50_ms:>8.2f}  p95 {r.p95_ms:>8.2f}  max {r.max_ms:>8.2f} ms  "
+                f"mean {r.mean_kib:>7.1f} KiB  max {r.max_kib:>7.1f} KiB"
+            )
+            results.append(r)
+    finally:
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "started_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "max_features": max_features,
+            "activity_share": activity_share,
+            "seed": seed,
+        },
+        "results": [asdict(r) for r in results],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark vector tile generation")
+    parser.add_argument("--zooms", default="10,12,14,16", help="Comma-separated zoom levels")
+    parser.add_argument("--tiles", type=int, default=200, help="Distinct tiles rendered per zoom level")
+    parser.add_argument("--activity-share", type=float, default=0.0, help="Fraction of tiles filtered by activity")
+    parser.add_argument("--max-features", type=int, default=get_settings().tile_max_features)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, help="Default: bench-results/tiles-<timestamp>.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        run(
+            zooms=[int(z) for z in args.zooms.split(",") if z.strip()],
+            tiles=args.tiles,
+            activity_share=args.activity_share,
+            max_features=args.max_features,
+            seed=args.seed,
+        )
+    )
+
+    out: Path = args.out or Path("bench-results") / f"tiles-{datetime.now(UTC):%Y%m%dT%H%M%SZ}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results: {out}")
+
+
+if __name__ == "__main__":
+    main()
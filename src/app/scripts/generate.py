@@ -0,0 +1,402 @@
+"""
+Synthetic dataset for load tests and query-plan work.
+
+    python -m app.scripts.generate --scale 1000000 --seed 42 --truncate
+
+`--scale` is the number of organizations; buildings, phones and activity links
+follow from it (roughly scale/4, 1.7*scale and 1.5*scale rows).
+
+Distributions:
+- buildings cluster around city centres and, within a city, around districts;
+- organizations per building are heavy-tailed (Pareto), so a few buildings hold many;
+- the activity taxonomy is wide and three levels deep, and activity popularity is Zipf-like;
+- names mix a brand vocabulary with activity nouns, so trigram search has realistic overlap.
+
+The output depends only on `--seed` and `--scale`. Rows are streamed with COPY
+using explicit ids, so the tables must be empty (see `--truncate`).
+
+The parallel COPY connections run with app.bulk_load on, so the dataset version
+trigger does not serialize them on its dataset_versions row locks; the loaded
+tables are bumped once at the end instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import math
+import random
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+import psycopg
+
+from app.core.asyncio_win import install_windows_selector_event_loop
+from app.core.settings import get_settings
+from app.db.session import libpq_dsn
+from app.db.versions import BULK_LOAD_SQL, bump_versions
+
+install_windows_selector_event_loop()
+
+
+@dataclass(frozen=True, slots=True)
+class City:
+    name: str
+    lat: float
+    lon: float
+    weight: float
+    spread_km: float
+    phone_code: str
+
+
+CITIES: tuple[City, ...] = (
+    City("Sofia", 42.6977, 23.3219, 12, 6.0, "+359"),
+    City("Plovdiv", 42.1354, 24.7453, 4, 3.5, "+359"),
+    City("Varna", 43.2141, 27.9147, 3.5, 4.0, "+359"),
+    City("Burgas", 42.5048, 27.4626, 2, 3.0, "+359"),
+    City("Ruse", 43.8356, 25.9657, 1.5, 2.5, "+359"),
+    City("Belgrade", 44.7866, 20.4489, 12, 6.0, "+381"),
+    City("Bucharest", 44.4268, 26.1025, 18, 7.0, "+40"),
+    City("Athens", 37.9838, 23.7275, 30, 9.0, "+30"),
+    City("Istanbul", 41.0082, 28.9784, 60, 14.0, "+90"),
+    City("Berlin", 52.5200, 13.4050, 36, 10.0, "+49"),
+    City("Moscow", 55.7558, 37.6173, 70, 14.0, "+7"),
+    City("Saint Petersburg", 59.9343, 30.3351, 28, 9.0, "+7"),
+)
+
+DISTRICTS_PER_CITY = 16
+DISTRICT_SPREAD_KM = 0.7
+
+STREET_KINDS = ("ul.", "Blvd.", "pl.")
+STREETS = (
+    "Vitosha", "Graf Ignatiev", "Rakovski", "Tsar Osvoboditel", "Shipka", "Oborishte",
+    "Vasil Levski", "Hristo Botev", "Slivnitsa", "Bulgaria", "Cherni Vrah", "Tsarigradsko Shose",
+    "Maria Luiza", "Alabin", "Patriarh Evtimiy", "Dondukov", "Hristo Smirnenski", "Stamboliyski",
+    "Evlogi Georgiev", "Praga", "Lyulin", "Gotse Delchev", "Sveta Nedelya", "Pirotska",
+    "Solunska", "Neofit Rilski", "Angel Kanchev", "Tsar Samuil", "Lavele", "Serdika",
+    "Knyaz Boris", "Kiril i Metodiy", "Han Asparuh", "Moskovska", "Pozitano", "Aksakov",
+)
+
+# root -> level-2 activities; level 3 is a modifier applied to a level-2 name
+TAXONOMY: dict[str, tuple[str, ...]] = {
+    "Food": ("Cafe", "Restaurant", "Bakery", "Pizzeria", "Bar", "Fast food", "Catering", "Grocery", "Butcher", "Confectionery"),
+    "Services": ("Barber", "Repair", "Laundry", "Dry cleaning", "Tailor", "Locksmith", "Courier", "Printing", "Photo studio"),
+    "Health": ("Pharmacy", "Dentist", "Clinic", "Laboratory", "Optician", "Physiotherapy", "Veterinary", "Psychotherapy"),
+    "Auto": ("Car wash", "Tyre service", "Car repair", "Car parts", "Car rental", "Driving school", "Parking"),
+    "Retail": ("Clothing", "Shoes", "Electronics", "Furniture", "Books", "Toys", "Jewelry", "Flowers", "Hardware", "Cosmetics"),
+    "Education": ("Kindergarten", "School", "Language courses", "Music school", "Tutoring", "Dance studio", "Art studio"),
+    "Sport": ("Gym", "Swimming pool", "Yoga", "Martial arts", "Climbing", "Tennis", "Sports shop"),
+    "Finance": ("Bank", "Insurance", "Exchange office", "Accounting", "Pawnshop", "Leasing"),
+    "Real estate": ("Agency", "Property management", "Coworking", "Storage", "Hostel", "Hotel"),
+    "Construction": ("Building materials", "Renovation", "Plumbing", "Electrician", "Windows", "Roofing", "Interior design"),
+    "IT": ("Software", "Web studio", "Computer repair", "Hosting", "IT training", "Telecom"),
+    "Leisure": ("Cinema", "Theatre", "Museum", "Night club", "Bowling", "Escape room", "Karaoke", "Travel agency"),
+}
+
+MODIFIERS = (
+    "Premium", "Budget", "24/7", "Express", "Family", "Eco", "Mobile", "Wholesale",
+    "Kids", "Vegan", "Home", "Online", "Vintage", "Luxury", "Student",
+)
+MODIFIERS_PER_ACTIVITY = (2, 7)
+
+BRANDS = (
+    "Luna", "Orion", "Vitosha", "Sirius", "Aurora", "Helios", "Atlas", "Nova", "Zenit", "Delta",
+    "Iskra", "Rila", "Pirin", "Balkan", "Dunav", "Struma", "Iris", "Lotus", "Magnolia", "Lavanda",
+    "Kamelia", "Jasmin", "Maestro", "Prima", "Optima", "Vega", "Polaris", "Kosmos", "Sunrise", "Horizon",
+    "Metro", "City", "Central", "Royal", "Golden", "Silver", "Blue", "Green", "Red", "White",
+    "Happy", "Smart", "Fresh", "Quick", "Best", "Star", "Alpha", "Omega", "Titan", "Phoenix",
+)
+SYLLABLES = ("ka", "lo", "mi", "ra", "to", "ve", "ni", "sa", "do", "ri", "zo", "be", "lu", "ta", "mo", "ge")
+NAME_PATTERNS = ("{brand} {noun}", "{noun} {brand}", "{brand} {noun}", "{brand} & {brand2}", "{brand} {noun} {n}")
+
+# share of organizations with 1, 2, 3 phones / activities
+PHONE_COUNTS = ((1, 2, 3), (50, 35, 15))
+ACTIVITY_COUNTS = ((1, 2, 3), (60, 30, 10))
+
+ORGS_PER_BUILDING = 4
+PARETO_ALPHA = 1.16  # ~80/20
+# caps a building's weight (mean ~7) so a single draw cannot take a large share of all orgs
+PARETO_CAP = 300.0
+ZIPF_S = 1.1
+
+COPY_SQL = {
+    "activities": "COPY activities (id, name, parent_id, depth) FROM STDIN",
+    "buildings": "COPY buildings (id, address, geom) FROM STDIN",
+    "organizations": "COPY organizations (id, name, building_id) FROM STDIN",
+    "organization_phones": "COPY organization_phones (organization_id, phone) FROM STDIN",
+    "organization_activities": "COPY organization_activities (organization_id, activity_id) FROM STDIN",
+}
+
+TRUNCATE_SQL = (
+    "TRUNCATE organization_phones, organization_activities, organizations, buildings, "
+    "activity_closure, activities RESTART IDENTITY"
+)
+
+SETVAL_SQL = """
+SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT max(id) FROM {table}), 1))
+"""
+
+# a copy job: table -> COPY text payload, loaded in one transaction
+Block = dict[str, bytes]
+
+
+@dataclass(slots=True)
+class Stats:
+    started: float = field(default_factory=time.perf_counter)
+    rows: dict[str, int] = field(default_factory=dict)
+
+    def add(self, block: Block) -> None:
+        for table, payload in block.items():
+            self.rows[table] = self.rows.get(table, 0) + payload.count(b"\n")
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        total = sum(self.rows.values())
+        per_table = " ".join(f"{t}={n}" for t, n in self.rows.items())
+        return f"{per_table} total={total} {total / elapsed if elapsed else 0:,.0f} rows/s"
+
+
+@dataclass(frozen=True, slots=True)
+class Activities:
+    rows: list[tuple[int, str, int | None, int]]
+    # organizations pick from level 2 and 3; Zipf weights over a shuffled order
+    pick_ids: list[int]
+    pick_cum: list[float]
+    names: dict[int, str]
+
+
+def _encode(rows: Iterator[tuple[Any, ...]]) -> bytes:
+    # generated values never contain tabs, newlines or backslashes
+    return "".join(
+        "\t".join(r"\N" if v is None else str(v) for v in row) + "\n" for row in rows
+    ).encode()
+
+
+def _cumulative(weights: Iterator[float]) -> list[float]:
+    return list(itertools.accumulate(weights))
+
+
+def _activities(rng: random.Random) -> Activities:
+    rows: list[tuple[int, str, int | None, int]] = []
+    ids = itertools.count(1)
+    for root, children in TAXONOMY.items():
+        root_id = next(ids)
+        rows.append((root_id, root, None, 1))
+        for child in children:
+            child_id = next(ids)
+            rows.append((child_id, child, root_id, 2))
+            for mod in rng.sample(MODIFIERS, rng.randint(*MODIFIERS_PER_ACTIVITY)):
+                rows.append((next(ids), f"{mod} {child.lower()}", child_id, 3))
+
+    pick_ids = [r[0] for r in rows if r[3] > 1]
+    rng.shuffle(pick_ids)
+    pick_cum = _cumulative(1 / (rank ** ZIPF_S) for rank in range(1, len(pick_ids) + 1))
+    return Activities(rows=rows, pick_ids=pick_ids, pick_cum=pick_cum, names={r[0]: r[1] for r in rows})
+
+
+def _km_to_deg(lat: float, dy_km: float, dx_km: float) -> tuple[float, float]:
+    return dy_km / 111.32, dx_km / (111.32 * math.cos(math.radians(lat)))
+
+
+def _buildings(rng: random.Random, n: int, block_size: int, *, phone_codes: list[str]) -> Iterator[Block]:
+    """
+    Yields building blocks; appends each building's city phone code to `phone_codes`.
+    """
+    districts: list[tuple[City, float, float]] = []
+    district_cum: list[float] = []
+    total = 0.0
+    for city in CITIES:
+        for _ in range(DISTRICTS_PER_CITY):
+            dlat, dlon = _km_to_deg(city.lat, rng.gauss(0, city.spread_km), rng.gauss(0, city.spread_km))
+            districts.append((city, city.lat + dlat, city.lon + dlon))
+            # district sizes are skewed too; the city weight is shared between them
+            total += city.weight * rng.paretovariate(1.5) / DISTRICTS_PER_CITY
+            district_cum.append(total)
+
+    # sequential house numbers per street keep addresses unique
+    house_numbers: dict[tuple[str, str], Iterator[int]] = {}
+
+    for start in range(1, n + 1, block_size):
+        rows = []
+        for building_id in range(start, min(start + block_size, n + 1)):
+            city, lat, lon = districts[bisect.bisect_left(district_cum, rng.random() * total)]
+            dlat, dlon = _km_to_deg(lat, rng.gauss(0, DISTRICT_SPREAD_KM), rng.gauss(0, DISTRICT_SPREAD_KM))
+            street = f"{rng.choice(STREET_KINDS)} {rng.choice(STREETS)}"
+            number = next(house_numbers.setdefault((city.name, street), itertools.count(1)))
+            phone_codes.append(city.phone_code)
+            rows.append(
+                (
+                    building_id,
+                    f"{city.name}, {street} {number}",
+                    f"SRID=4326;POINT({lon + dlon:.6f} {lat + dlat:.6f})",
+                )
+            )
+        yield {"buildings": _encode(iter(rows))}
+
+
+def _org_name(rng: random.Random, noun: str) -> str:
+    if rng.random() < 0.7:
+        brand = rng.choice(BRANDS)
+    else:
+        brand = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+    return rng.choice(NAME_PATTERNS).format(
+        brand=brand,
+        brand2=rng.choice(BRANDS),
+        noun=noun,
+        n=rng.randint(1, 99),
+    )
+
+
+def _organizations(
+    rng: random.Random,
+    n: int,
+    *,
+    buildings: int,
+    phone_codes: list[str],
+    activities: Activities,
+    block_size: int,
+) -> Iterator[Block]:
+    building_cum = _cumulative(min(rng.paretovariate(PARETO_ALPHA), PARETO_CAP) for _ in range(buildings))
+    building_total = building_cum[-1]
+    activity_total = activities.pick_cum[-1]
+
+    for start in range(1, n + 1, block_size):
+        orgs: list[tuple[int, str, int]] = []
+        phones: list[tuple[int, str]] = []
+        links: list[tuple[int, int]] = []
+        for org_id in range(start, min(start + block_size, n + 1)):
+            building_id = bisect.bisect_left(building_cum, rng.random() * building_total) + 1
+
+            picked: list[int] = []
+            for _ in range(rng.choices(*ACTIVITY_COUNTS)[0]):
+                idx = bisect.bisect_left(activities.pick_cum, rng.random() * activity_total)
+                if (activity_id := activities.pick_ids[idx]) not in picked:
+                    picked.append(activity_id)
+            links.extend((org_id, a) for a in picked)
+
+            orgs.append((org_id, _org_name(rng, activities.names[picked[0]]), building_id))
+
+            code = phone_codes[building_id - 1]
+            numbers = {f"{code}{rng.randrange(10**8, 10**9)}" for _ in range(rng.choices(*PHONE_COUNTS)[0])}
+            phones.extend((org_id, p) for p in sorted(numbers))
+
+        yield {
+            "organizations": _encode(iter(orgs)),
+            "organization_phones": _encode(iter(phones)),
+            "organization_activities": _encode(iter(links)),
+        }
+
+
+async def _copy_block(conn: psycopg.AsyncConnection[Any], block: Block) -> None:
+    async with conn.transaction(), conn.cursor() as cur:
+        for table, payload in block.items():
+            async with cur.copy(COPY_SQL[table]) as copy:
+                await copy.write(payload)
+
+
+async def _worker(dsn: str, queue: asyncio.Queue[Block | None], stats: Stats) -> None:
+    async with await psycopg.AsyncConnection.connect(dsn) as conn:
+        await conn.execute(BULK_LOAD_SQL)
+        await conn.commit()
+        while (block := await queue.get()) is not None:
+            await _copy_block(conn, block)
+            stats.add(block)
+            print(stats.line(), file=sys.stderr)
+
+
+async def _load(dsn: str, blocks: Iterator[Block], *, jobs: int, stats: Stats) -> None:
+    """
+    COPYs `blocks` over `jobs` connections; returns once all of them are committed.
+    """
+    queue: asyncio.Queue[Block | None] = asyncio.Queue(maxsize=jobs)
+    workers = [asyncio.create_task(_worker(dsn, queue, stats)) for _ in range(jobs)]
+    try:
+        for block in itertools.chain(blocks, itertools.repeat(None, jobs)):
+            put = asyncio.ensure_future(queue.put(block))
+            await asyncio.wait({put, *workers}, return_when=asyncio.FIRST_COMPLETED)
+            if not put.done():
+                put.cancel()
+                break
+        await asyncio.gather(*workers)
+    finally:
+        for w in workers:
+            w.cancel()
+
+
+async def run(*, scale: int, seed: int, jobs: int, block_size: int, truncate: bool) -> Stats:
+    dsn = libpq_dsn(get_settings().database_url)
+    rng = random.Random(seed)
+    stats = Stats()
+
+    async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+        if truncate:
+            await conn.execute(TRUNCATE_SQL)
+        else:
+            for table in ("activities", "buildings", "organizations"):
+                if await (await conn.execute(f"SELECT 1 FROM {table} LIMIT 1")).fetchone():
+                    raise SystemExit(f"{table} is not empty; rerun with --truncate")
+
+        # single COPY in id order: the closure trigger sees every parent before its children
+        activities = _activities(rng)
+        block = {"activities": _encode(iter(activities.rows))}
+        await _copy_block(conn, block)
+        stats.add(block)
+
+    # organizations reference buildings, so they are loaded once every building is committed
+    n_buildings = max(1, scale // ORGS_PER_BUILDING)
+    phone_codes: list[str] = []
+    await _load(dsn, _buildings(rng, n_buildings, block_size, phone_codes=phone_codes), jobs=jobs, stats=stats)
+
+    org_blocks = _organizations(
+        rng,
+        scale,
+        buildings=n_buildings,
+        phone_codes=phone_codes,
+        activities=activities,
+        block_size=block_size,
+    )
+    await _load(dsn, org_blocks, jobs=jobs, stats=stats)
+
+    async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+        for table in ("activities", "buildings", "organizations"):
+            await conn.execute(SETVAL_SQL.format(table=table))
+        # activities went through the trigger; the worker-loaded tables did not
+        await bump_versions(
+            conn, ("buildings", "organizations", "organization_phones", "organization_activities")
+        )
+        # fresh statistics, otherwise the first plans are made for empty tables
+        await conn.execute(
+            "ANALYZE activities, activity_closure, buildings, organizations, "
+            "organization_phones, organization_activities"
+        )
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset of the given size")
+    parser.add_argument("--scale", type=int, default=100_000, help="Number of organizations")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--jobs", type=int, default=4, help="Parallel COPY connections")
+    parser.add_argument("--block-size", type=int, default=20_000, help="Rows per COPY transaction")
+    parser.add_argument("--truncate", action="store_true", help="Delete all rows from our tables first")
+    args = parser.parse_args()
+
+    stats = asyncio.run(
+        run(
+            scale=max(1, args.scale),
+            seed=args.seed,
+            jobs=max(1, args.jobs),
+            block_size=max(1, args.block_size),
+            truncate=bool(args.truncate),
+        )
+    )
+    print(f"Generate done: {stats.line()}")
+
+
+if __name__ == "__main__":
+    main()
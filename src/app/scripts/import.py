@@ -0,0 +1,479 @@
+"""
+Bulk import of organizations from CSV or NDJSON.
+
+    python -m app.scripts.import organizations.ndjson --jobs 4 --batch-size 50000
+
+Input records use the export layout (`/api/v1/export/organizations`):
+name, address, lat, lon, phones, activities, optionally id and building_id.
+In CSV, phones and activities are "; "-separated.
+
+Each worker COPYs a batch into a session temp table, then resolves it set-wise:
+buildings are matched by address (missing ones are created), activities by name,
+organizations are upserted by id (new ones take ids from the sequence), and
+phones / activity links are synced to the input.
+
+Rows naming a building_id that does not exist are rejected, as are rows whose
+explicit id falls in a block of ids this run already gave to new organizations.
+
+Workers load with app.bulk_load on, which turns off the per-statement dataset
+version trigger: its row lock on dataset_versions would make the parallel
+batches run one at a time. Each touched table is bumped (and announced to the
+API's cache listeners) once, after the last batch commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal, TextIO
+
+import psycopg
+
+from app.core.asyncio_win import install_windows_selector_event_loop
+from app.core.settings import get_settings
+from app.db.session import libpq_dsn
+from app.db.versions import BULK_LOAD_SQL, bump_versions
+
+install_windows_selector_event_loop()
+
+InputFormat = Literal["csv", "ndjson"]
+
+# (line, id, name, building_id, address, lat, lon, phones, activities)
+StageRow = tuple[int, int | None, str, int | None, str | None, float | None, float | None, list[str], list[str]]
+
+STAGE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS import_orgs (
+    line        bigint NOT NULL,
+    id          integer,
+    name        text NOT NULL,
+    building_id integer,
+    address     text,
+    lat         double precision,
+    lon         double precision,
+    phones      text[] NOT NULL,
+    activities  text[] NOT NULL
+)
+"""
+
+# column lengths of organizations.name, buildings.address and organization_phones.phone;
+# a longer value would fail the whole batch at the upsert
+NAME_MAX = 300
+ADDRESS_MAX = 500
+PHONE_MAX = 32
+
+COPY_SQL = (
+    "COPY import_orgs (line, id, name, building_id, address, lat, lon, phones, activities) FROM STDIN"
+)
+
+# Buildings are created under a transaction-level advisory lock so parallel
+# workers never create the same address twice (addresses are not unique-indexed).
+CREATE_BUILDINGS_SQL = """
+INSERT INTO buildings (address, geom)
+SELECT DISTINCT ON (s.address)
+       s.address, ST_SetSRID(ST_MakePoint(s.lon, s.lat), 4326)::geography
+FROM import_orgs s
+WHERE s.building_id IS NULL
+  AND NOT EXISTS (SELECT 1 FROM buildings b WHERE b.address = s.address)
+ORDER BY s.address, s.line
+"""
+
+RESOLVE_BUILDINGS_SQL = """
+UPDATE import_orgs s
+SET building_id = b.id
+FROM (
+    SELECT DISTINCT ON (address) id, address
+    FROM buildings
+    WHERE address IN (SELECT address FROM import_orgs WHERE building_id IS NULL)
+    ORDER BY address, id
+) b
+WHERE s.building_id IS NULL AND b.address = s.address
+"""
+
+# unknown building_id, or no address to resolve one from: set-wise FK check before the upsert
+REJECT_UNRESOLVED_SQL = """
+DELETE FROM import_orgs s
+WHERE NOT EXISTS (SELECT 1 FROM buildings b WHERE b.id = s.building_id)
+"""
+
+# explicit ids inside blocks already reserved for new organizations of this run
+REJECT_COLLISIONS_SQL = """
+DELETE FROM import_orgs s
+USING unnest(%(lo)s::integer[], %(hi)s::integer[]) AS r(lo, hi)
+WHERE s.id BETWEEN r.lo AND r.hi
+"""
+
+# moves the sequence past every explicit id of the batch plus `n`; returns the block's last id
+RESERVE_IDS_SQL = """
+SELECT setval(
+    'organizations_id_seq',
+    GREATEST(
+        (SELECT last_value FROM organizations_id_seq),
+        (SELECT coalesce(max(id), 0) FROM import_orgs)
+    ) + %(n)s
+)
+"""
+
+ASSIGN_IDS_SQL = """
+UPDATE import_orgs s
+SET id = %(lo)s + r.n - 1
+FROM (SELECT line, row_number() OVER (ORDER BY line) AS n FROM import_orgs WHERE id IS NULL) r
+WHERE s.line = r.line
+"""
+
+# last occurrence of an id within the batch wins, for the organization and its
+# phones and activities alike
+DEDUPE_IDS_SQL = """
+DELETE FROM import_orgs s
+USING import_orgs later
+WHERE later.id = s.id AND later.line > s.line
+"""
+
+UPSERT_ORGS_SQL = """
+INSERT INTO organizations (id, name, building_id)
+SELECT id, name, building_id
+FROM import_orgs
+ON CONFLICT (id) DO UPDATE
+SET name = EXCLUDED.name, building_id = EXCLUDED.building_id
+WHERE (organizations.name, organizations.building_id)
+      IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.building_id)
+"""
+
+SYNC_PHONES_SQL = (
+    """
+    DELETE FROM organization_phones p
+    USING import_orgs s
+    WHERE p.organization_id = s.id AND p.phone <> ALL (s.phones)
+    """,
+    """
+    INSERT INTO organization_phones (organization_id, phone)
+    SELECT DISTINCT s.id, phone
+    FROM import_orgs s, unnest(s.phones) AS phone
+    ON CONFLICT ON CONSTRAINT org_phone_unique DO NOTHING
+    """,
+)
+
+# names map to the deepest activity carrying them
+STAGE_ACTIVITIES_SQL = """
+CREATE TEMP TABLE import_links ON COMMIT DROP AS
+SELECT DISTINCT s.id AS organization_id, a.id AS activity_id
+FROM import_orgs s
+CROSS JOIN LATERAL unnest(s.activities) AS n(name)
+JOIN LATERAL (
+    SELECT id FROM activities WHERE name = n.name ORDER BY depth DESC, id LIMIT 1
+) a ON true
+"""
+
+UNKNOWN_ACTIVITIES_SQL = """
+SELECT count(*)
+FROM import_orgs s, unnest(s.activities) AS n(name)
+WHERE NOT EXISTS (SELECT 1 FROM activities a WHERE a.name = n.name)
+"""
+
+SYNC_ACTIVITIES_SQL = (
+    """
+    DELETE FROM organization_activities oa
+    USING import_orgs s
+    WHERE oa.organization_id = s.id
+      AND NOT EXISTS (
+          SELECT 1 FROM import_links l
+          WHERE l.organization_id = oa.organization_id AND l.activity_id = oa.activity_id
+      )
+    """,
+    """
+    INSERT INTO organization_activities (organization_id, activity_id)
+    SELECT organization_id, activity_id FROM import_links
+    ON CONFLICT DO NOTHING
+    """,
+)
+
+# explicit ids may run past the sequence
+BUMP_SEQUENCE_SQL = """
+SELECT setval('organizations_id_seq', GREATEST((SELECT max(id) FROM organizations), 1))
+"""
+
+TRUNCATE_SQL = "TRUNCATE organization_phones, organization_activities, organizations, buildings"
+
+# written by the workers, whose statements do not bump dataset versions
+LOADED_TABLES = ("buildings", "organizations", "organization_phones", "organization_activities")
+
+
+@dataclass(slots=True)
+class Stats:
+    started: float = field(default_factory=time.perf_counter)
+    read: int = 0
+    rejected: int = 0
+    imported: int = 0
+    unknown_activities: int = 0
+    id_collisions: int = 0
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.imported / elapsed if elapsed else 0.0
+        return (
+            f"read={self.read} imported={self.imported} rejected={self.rejected} "
+            f"(id_collisions={self.id_collisions}) "
+            f"unknown_activities={self.unknown_activities} {rate:,.0f} rows/s"
+        )
+
+
+@dataclass(slots=True)
+class IdBlocks:
+    """
+    Ranges of sequence ids handed to new organizations during this run.
+
+    Each block starts past every explicit id seen before it, so an explicit id can
+    only collide with a block reserved earlier; such rows are rejected, not upserted
+    over the new organization.
+    """
+
+    lo: list[int] = field(default_factory=list)
+    hi: list[int] = field(default_factory=list)
+    # check + reserve must not interleave between workers
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    async def assign(self, conn: psycopg.AsyncConnection[Any]) -> int:
+        """
+        Rejects colliding explicit ids, then numbers the rows without an id.
+        Returns the number of rejected rows.
+        """
+        async with self.lock:
+            cur = await conn.execute(REJECT_COLLISIONS_SQL, {"lo": self.lo, "hi": self.hi})
+            collisions = cur.rowcount
+            new = await (await conn.execute("SELECT count(*) FROM import_orgs WHERE id IS NULL")).fetchone()
+            n = int(new[0]) if new else 0
+            if not n:
+                return collisions
+            # setval is not transactional: the block stays reserved even if the batch rolls back
+            last = await (await conn.execute(RESERVE_IDS_SQL, {"n": n})).fetchone()
+            hi = int(last[0]) if last else 0
+            self.lo.append(hi - n + 1)
+            self.hi.append(hi)
+        await conn.execute(ASSIGN_IDS_SQL, {"lo": hi - n + 1})
+        return collisions
+
+
+def _split(value: Any) -> list[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).split(";") if v.strip()]
+
+
+def _opt_int(value: Any) -> int | None:
+    return None if value is None or value == "" else int(value)
+
+
+def _opt_float(value: Any) -> float | None:
+    return None if value is None or value == "" else float(value)
+
+
+def _stage_row(line: int, rec: dict[str, Any]) -> StageRow | None:
+    """
+    Input record -> staging tuple; None when it cannot be imported.
+    """
+    try:
+        name = str(rec.get("name") or "").strip()
+        building_id = _opt_int(rec.get("building_id"))
+        address = str(rec.get("address") or "").strip() or None
+        lat, lon = _opt_float(rec.get("lat")), _opt_float(rec.get("lon"))
+        phones = _split(rec.get("phones"))
+        row: StageRow = (
+            line,
+            _opt_int(rec.get("id")),
+            name,
+            building_id,
+            address,
+            lat,
+            lon,
+            phones,
+            _split(rec.get("activities")),
+        )
+    except (TypeError, ValueError):
+        return None
+
+    if not name or len(name) > NAME_MAX:
+        return None
+    if address is not None and len(address) > ADDRESS_MAX:
+        return None
+    if any(len(p) > PHONE_MAX for p in phones):
+        return None
+    if building_id is None and (address is None or lat is None or lon is None):
+        return None
+    return row
+
+
+def _records(fh: TextIO, fmt: InputFormat) -> Iterator[tuple[int, dict[str, Any] | None]]:
+    if fmt == "csv":
+        for i, rec in enumerate(csv.DictReader(fh), start=2):
+            yield i, rec
+        return
+    for i, raw in enumerate(fh, start=1):
+        if not raw.strip():
+            continue
+        try:
+            rec = json.loads(raw)
+        except ValueError:
+            yield i, None
+            continue
+        yield i, rec if isinstance(rec, dict) else None
+
+
+def _batches(fh: TextIO, fmt: InputFormat, size: int, stats: Stats) -> Iterator[list[StageRow]]:
+    batch: list[StageRow] = []
+    for line, rec in _records(fh, fmt):
+        stats.read += 1
+        row = _stage_row(line, rec) if rec is not None else None
+        if row is None:
+            stats.rejected += 1
+            continue
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _load_batch(
+    conn: psycopg.AsyncConnection[Any],
+    rows: list[StageRow],
+    stats: Stats,
+    ids: IdBlocks,
+) -> None:
+    async with conn.cursor() as cur:
+        await cur.execute("TRUNCATE import_orgs")
+        async with cur.copy(COPY_SQL) as copy:
+            for row in rows:
+                await copy.write_row(row)
+    await conn.commit()
+
+    # short transaction: buildings are shared between workers
+    async with conn.transaction():
+        await conn.execute("SELECT pg_advisory_xact_lock(hashtext('app.scripts.import:buildings'))")
+        await conn.execute(CREATE_BUILDINGS_SQL)
+    async with conn.transaction():
+        await conn.execute(RESOLVE_BUILDINGS_SQL)
+        cur = await conn.execute(REJECT_UNRESOLVED_SQL)
+        stats.rejected += cur.rowcount
+
+        collisions = await ids.assign(conn)
+        stats.rejected += collisions
+        stats.id_collisions += collisions
+        await conn.execute(DEDUPE_IDS_SQL)
+        await conn.execute(UPSERT_ORGS_SQL)
+        for sql in SYNC_PHONES_SQL:
+            await conn.execute(sql)
+
+        await conn.execute(STAGE_ACTIVITIES_SQL)
+        unknown = await (await conn.execute(UNKNOWN_ACTIVITIES_SQL)).fetchone()
+        for sql in SYNC_ACTIVITIES_SQL:
+            await conn.execute(sql)
+
+        imported = await (await conn.execute("SELECT count(*) FROM import_orgs")).fetchone()
+
+    stats.unknown_activities += int(unknown[0]) if unknown else 0
+    stats.imported += int(imported[0]) if imported else 0
+
+
+async def _worker(
+    dsn: str,
+    queue: asyncio.Queue[list[StageRow] | None],
+    stats: Stats,
+    ids: IdBlocks,
+) -> None:
+    async with await psycopg.AsyncConnection.connect(dsn) as conn:
+        await conn.execute(STAGE_DDL)
+        await conn.execute(BULK_LOAD_SQL)
+        await conn.commit()
+        while (rows := await queue.get()) is not None:
+            await _load_batch(conn, rows, stats, ids)
+            print(stats.line(), file=sys.stderr)
+
+
+async def _put(
+    queue: asyncio.Queue[list[StageRow] | None],
+    item: list[StageRow] | None,
+    workers: list[asyncio.Task[None]],
+) -> bool:
+    """
+    Enqueues `item` unless a worker fails first (a full queue would never drain).
+    """
+    put = asyncio.ensure_future(queue.put(item))
+    await asyncio.wait({put, *workers}, return_when=asyncio.FIRST_COMPLETED)
+    if put.done():
+        return True
+    put.cancel()
+    return False
+
+
+async def run(*, path: Path, fmt: InputFormat, jobs: int, batch_size: int, truncate: bool) -> Stats:
+    dsn = libpq_dsn(get_settings().database_url)
+    stats = Stats()
+    ids = IdBlocks()
+
+    if truncate:
+        async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+            await conn.execute(TRUNCATE_SQL)
+
+    # bounded: the reader stays at most `jobs` batches ahead of the workers
+    queue: asyncio.Queue[list[StageRow] | None] = asyncio.Queue(maxsize=jobs)
+    workers = [asyncio.create_task(_worker(dsn, queue, stats, ids)) for _ in range(jobs)]
+
+    try:
+        with path.open(encoding="utf-8", newline="") as fh:
+            batches = _batches(fh, fmt, batch_size, stats)
+            while True:
+                # parsing is CPU-bound; keep it off the loop so COPY keeps flowing
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None or not await _put(queue, batch, workers):
+                    break
+        for _ in workers:
+            if not await _put(queue, None, workers):
+                break
+        await asyncio.gather(*workers)
+    finally:
+        for w in workers:
+            w.cancel()
+        # also after a failure: batches committed so far are visible
+        async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+            await conn.execute(BUMP_SEQUENCE_SQL)
+            await bump_versions(conn, LOADED_TABLES)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import organizations from CSV or NDJSON")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Default: from the file extension")
+    parser.add_argument("--jobs", type=int, default=4, help="Parallel loader connections")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Rows per COPY batch")
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="Empty organizations, phones, links and buildings first (activities are kept)",
+    )
+    args = parser.parse_args()
+
+    fmt: InputFormat = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+    stats = asyncio.run(
+        run(
+            path=args.path,
+            fmt=fmt,
+            jobs=max(1, args.jobs),
+            batch_size=max(1, args.batch_size),
+            truncate=bool(args.truncate),
+        )
+    )
+    print(f"Import done: {stats.line()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,56 @@
 from __future__ import annotations
 
+import builtins
+
 from app.repos.buildings import BuildingsRepo
-from app.repos.dto import BuildingRow, OrganizationRow, Page
+from app.repos.dto import (
+    BuildingGeoRow,
+    BuildingRow,
+    OrganizationCardRow,
+    OrganizationRow,
+    Page,
+    PageParams,
+)
 from app.repos.organizations import OrganizationsRepo
+from app.services.organizations import RowPage, attach_cards
+from app.services.result_cache import ResultCache
 
 
 class BuildingsService:
-    def __init__(self, buildings: BuildingsRepo, orgs: OrganizationsRepo) -> None:
+    def __init__(
+        self,
+        buildings: BuildingsRepo,
+        orgs: OrganizationsRepo,
+        cache: ResultCache | None = None,
+    ) -> None:
         self.buildings = buildings
         self.orgs = orgs
+        self.cache = cache
+
+    async def list(self, *, page: PageParams) -> Page[BuildingRow]:
+        if self.cache is None:
+            return await self.buildings.list(page=page)
+        return await self.cache.get_or_load(
+            self.buildings.session,
+            key=("buildings.list", page),
+            tables=("buildings",),
+            load=lambda: self.buildings.list(page=page),
+        )
+
+    async def nearest(
+        self, *, lat: float, lon: float, k: int, max_radius_m: float | None = None
+    ) -> builtins.list[BuildingGeoRow]:
+        return await self.buildings.nearest(lat=lat, lon=lon, k=k, max_radius_m=max_radius_m)
 
-    async def list(self, *, limit: int, offset: int) -> Page[BuildingRow]:
-        return await self.buildings.list(limit=limit, offset=offset)
+    async def organizations(self, *, building_id: int, page: PageParams) -> Page[OrganizationRow]:
+        if self.cache is None:
+            return await self.orgs.list_by_building(building_id=building_id, page=page)
+        return await self.cache.get_or_load(
+            self.orgs.session,
+            key=("buildings.organizations", building_id, page),
+            tables=("organizations",),
+            load=lambda: self.orgs.list_by_building(building_id=building_id, page=page),
+        )
 
-    async def organizations(self, *, building_id: int, limit: int, offset: int) -> Page[OrganizationRow]:
-        return await self.orgs.list_by_building(building_id=building_id, limit=limit, offset=offset)
+    async def with_cards(self, page: RowPage) -> Page[OrganizationCardRow]:
+        return await attach_cards(self.orgs, page)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.repos.activities import ActivitiesRepo
+from app.repos.buildings import BuildingsRepo
+from app.repos.dto import (
+    ActivityRow,
+    BuildingRow,
+    NameMatch,
+    OrganizationExportRow,
+    OrganizationFilter,
+)
+from app.repos.organizations import OrganizationsRepo
+from app.services.organizations import GeoQuery, geo_filter
+
+
+class ExportService:
+    """
+    Bulk exports streamed row by row.
+
+    A streamed body outlives the request's session, so each export opens its
+    own session and holds it only while rows are being sent. Arguments are
+    validated when the export is requested, before the response starts.
+    """
+
+    def __init__(self, sessions: async_sessionmaker[AsyncSession], *, batch_size: int) -> None:
+        self.sessions = sessions
+        self.batch_size = batch_size
+
+    def organizations(
+        self,
+        *,
+        name: str | None,
+        match: NameMatch,
+        activity_id: int | None,
+        include_descendants: bool,
+        building_id: int | None,
+        geo: GeoQuery,
+    ) -> AsyncIterator[OrganizationExportRow]:
+        radius, bbox = geo_filter(geo)
+        filters = OrganizationFilter(
+            name=name,
+            match=match,
+            activity_id=activity_id,
+            include_descendants=include_descendants,
+            building_id=building_id,
+            radius=radius,
+            bbox=bbox,
+        )
+        return self._organizations(filters)
+
+    async def _organizations(self, filters: OrganizationFilter) -> AsyncIterator[OrganizationExportRow]:
+        async with self.sessions() as session:
+            async for row in OrganizationsRepo(session).stream_export(filters=filters, batch_size=self.batch_size):
+                yield row
+
+    def buildings(self, *, geo: GeoQuery) -> AsyncIterator[BuildingRow]:
+        # the route exposes bbox parameters only
+        _, bbox = geo_filter(geo)
+        return self._buildings(bbox)
+
+    async def _buildings(self, bbox: tuple[float, float, float, float] | None) -> AsyncIterator[BuildingRow]:
+        async with self.sessions() as session:
+            async for row in BuildingsRepo(session).stream_export(bbox=bbox, batch_size=self.batch_size):
+                yield row
+
+    async def activities(self, *, max_depth: int) -> AsyncIterator[ActivityRow]:
+        async with self.sessions() as session:
+            async for row in ActivitiesRepo(session).stream_export(max_depth=max_depth, batch_size=self.batch_size):
+                yield row
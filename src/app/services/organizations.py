@@ -1,11 +1,53 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from typing import Protocol
 
 from app.core.errors import NotFoundError, ValidationError
+from app.core.settings import get_settings
 from app.repos.activities import ActivitiesRepo
-from app.repos.dto import OrganizationCardRow, OrganizationGeoRow, OrganizationRow, Page
+from app.repos.dto import (
+    CardBatch,
+    ClusterSet,
+    NameMatch,
+    OrganizationCardRow,
+    OrganizationFilter,
+    OrganizationGeoCardRow,
+    OrganizationGeoRow,
+    OrganizationRow,
+    Page,
+    PageParams,
+    SuggestResult,
+)
 from app.repos.organizations import OrganizationsRepo
+from app.services.result_cache import ResultCache, quantize
+from app.services.taxonomy import TaxonomyCache
+
+MAX_CARDS_PER_REQUEST = 500
+
+# grid cells across one 256 px map tile, i.e. one cluster per 64 px
+CLUSTER_CELLS_PER_TILE = 4
+MAX_CLUSTER_CELLS = 4096
+
+
+def geo_params_invalid() -> ValidationError:
+    return ValidationError(
+        message="Specify either (lat, lon, radius_m) or (min_lat, min_lon, max_lat, max_lon)",
+        code="GEO_PARAMS_INVALID",
+    )
+
+
+def normalize_name(name: str) -> str:
+    """
+    Name search input as queried: both match modes are case-insensitive. Blank
+    input is rejected, since as a pattern it would match every organization.
+    """
+    normalized = name.strip().lower()
+    if not normalized:
+        raise ValidationError(message="name must not be blank", code="NAME_INVALID")
+    return normalized
 
 
 @dataclass(slots=True, frozen=True)
@@ -20,11 +62,110 @@ class GeoQuery:
     max_lat: float | None = None
     max_lon: float | None = None
 
+    @property
+    def is_radius(self) -> bool:
+        return self.lat is not None and self.lon is not None and self.radius_m is not None
+
+    @property
+    def is_bbox(self) -> bool:
+        return None not in (self.min_lat, self.min_lon, self.max_lat, self.max_lon)
+
+    @property
+    def is_empty(self) -> bool:
+        return all(
+            v is None
+            for v in (
+                self.lat, self.lon, self.radius_m,
+                self.min_lat, self.min_lon, self.max_lat, self.max_lon,
+            )
+        )
+
+    def quantized(self, step: float) -> GeoQuery:
+        if step <= 0:
+            return self
+
+        def q(v: float | None) -> float | None:
+            return None if v is None else quantize(v, step)
+
+        return replace(
+            self,
+            lat=q(self.lat), lon=q(self.lon),
+            min_lat=q(self.min_lat), min_lon=q(self.min_lon),
+            max_lat=q(self.max_lat), max_lon=q(self.max_lon),
+        )
+
+
+def geo_filter(
+    q: GeoQuery,
+) -> tuple[tuple[float, float, float] | None, tuple[float, float, float, float] | None]:
+    """
+    Optional geo parameters -> (radius, bbox) of an OrganizationFilter; at most one is set.
+    """
+    if q.is_empty:
+        return None, None
+    if q.is_radius == q.is_bbox:
+        raise geo_params_invalid()
+    if q.is_radius:
+        return (float(q.lat), float(q.lon), float(q.radius_m)), None  # type: ignore[arg-type]
+    return None, (float(q.min_lat), float(q.min_lon), float(q.max_lat), float(q.max_lon))  # type: ignore[arg-type]
+
+
+class RowPage(Protocol):
+    """
+    Read-only view of a Page of organization rows; Page[OrganizationGeoRow]
+    matches it too, which Page[OrganizationRow] (invariant) does not.
+    """
+
+    @property
+    def total(self) -> int | None: ...
+    @property
+    def items(self) -> Sequence[OrganizationRow]: ...
+    @property
+    def next_cursor(self) -> str | None: ...
+    @property
+    def has_more(self) -> bool: ...
+
+
+async def attach_cards(orgs: OrganizationsRepo, page: RowPage) -> Page[OrganizationCardRow]:
+    """
+    Replaces page items by their cards (one query for the whole page), keeping distances.
+    """
+    cards = await orgs.get_cards(org_ids=[o.id for o in page.items])
+
+    def to_card(o: OrganizationRow) -> OrganizationCardRow:
+        card = cards[o.id]
+        if isinstance(o, OrganizationGeoRow):
+            return OrganizationGeoCardRow(
+                id=card.id,
+                name=card.name,
+                building_id=card.building_id,
+                phones=card.phones,
+                activities=card.activities,
+                distance_m=o.distance_m,
+            )
+        return card
+
+    # an organization deleted between the two queries simply drops out of the page
+    return Page(
+        total=page.total,
+        items=[to_card(o) for o in page.items if o.id in cards],
+        next_cursor=page.next_cursor,
+        has_more=page.has_more,
+    )
+
 
 class OrganizationsService:
-    def __init__(self, orgs: OrganizationsRepo, acts: ActivitiesRepo) -> None:
+    def __init__(
+        self,
+        orgs: OrganizationsRepo,
+        acts: ActivitiesRepo,
+        taxonomy: TaxonomyCache,
+        cache: ResultCache | None = None,
+    ) -> None:
         self.orgs = orgs
         self.acts = acts
+        self.taxonomy = taxonomy
+        self.cache = cache
 
     async def get_card(self, *, org_id: int) -> OrganizationCardRow:
         row = await self.orgs.get_card(org_id=org_id)
@@ -32,41 +173,84 @@ class OrganizationsService:
             raise NotFoundError(message="Organization not found", code="ORG_NOT_FOUND")
         return row
 
-    async def search_by_name(self, *, name: str, limit: int, offset: int) -> Page[OrganizationRow]:
-        return await self.orgs.search_by_name(name=name, limit=limit, offset=offset)
+    async def get_cards(self, *, org_ids: list[int]) -> CardBatch:
+        ids = list(dict.fromkeys(org_ids))
+        if not ids:
+            raise ValidationError(message="At least one organization id is required", code="IDS_INVALID")
+        if len(ids) > MAX_CARDS_PER_REQUEST:
+            raise ValidationError(
+                message=f"At most {MAX_CARDS_PER_REQUEST} organization ids per request",
+                code="IDS_INVALID",
+            )
+
+        cards = await self.orgs.get_cards(org_ids=ids)
+        return CardBatch(
+            items=[cards[i] for i in ids if i in cards],
+            missing=[i for i in ids if i not in cards],
+        )
+
+    async def with_cards(self, page: RowPage) -> Page[OrganizationCardRow]:
+        return await attach_cards(self.orgs, page)
+
+    async def search_by_name(
+        self, *, name: str, page: PageParams, match: NameMatch = "contains"
+    ) -> Page[OrganizationRow]:
+        name = normalize_name(name)
+
+        async def load() -> Page[OrganizationRow]:
+            return await self.orgs.search_by_name(name=name, page=page, match=match)
+
+        if self.cache is None:
+            return await load()
+        return await self.cache.get_or_load(
+            self.orgs.session,
+            key=("organizations.search", name, match, page),
+            tables=("organizations",),
+            load=load,
+        )
+
+    async def suggest(self, *, q: str, limit: int) -> SuggestResult:
+        return await self.orgs.suggest(q=q, limit=limit)
 
     async def list_by_activity(
         self,
         *,
         activity_id: int,
         include_descendants: bool,
-        limit: int,
-        offset: int,
+        page: PageParams,
     ) -> Page[OrganizationRow]:
-        ids = (
-            await self.acts.subtree_ids(root_id=activity_id, max_depth=3)
-            if include_descendants
-            else [activity_id]
+        taxonomy = await self.taxonomy.get(self.acts)
+        if activity_id not in taxonomy.rows:
+            return self.orgs.empty_by_activity(page=page)
+        return await self.orgs.list_by_activity(
+            activity_id=activity_id,
+            include_descendants=include_descendants,
+            page=page,
         )
-        return await self.orgs.list_by_activity_ids(activity_ids=ids, limit=limit, offset=offset)
 
-    async def geo_search(self, *, q: GeoQuery, limit: int, offset: int) -> Page[OrganizationGeoRow]:
-        radius_mode = q.lat is not None and q.lon is not None and q.radius_m is not None
-        bbox_mode = None not in (q.min_lat, q.min_lon, q.max_lat, q.max_lon)
+    async def geo_search(self, *, q: GeoQuery, page: PageParams) -> Page[OrganizationGeoRow]:
+        radius_mode = q.is_radius
+        if radius_mode == q.is_bbox:
+            raise geo_params_invalid()
 
-        if radius_mode == bbox_mode:
-            raise ValidationError(
-                message="Specify either (lat, lon, radius_m) or (min_lat, min_lon, max_lat, max_lon)",
-                code="GEO_PARAMS_INVALID",
-            )
+        if self.cache is None:
+            return await self._geo_search(q=q, page=page, radius_mode=radius_mode)
 
+        q = q.quantized(get_settings().result_cache_coord_step)
+        return await self.cache.get_or_load(
+            self.orgs.session,
+            key=("organizations.geo", q, page),
+            tables=("organizations", "buildings"),
+            load=lambda: self._geo_search(q=q, page=page, radius_mode=radius_mode),
+        )
+
+    async def _geo_search(self, *, q: GeoQuery, page: PageParams, radius_mode: bool) -> Page[OrganizationGeoRow]:
         if radius_mode:
             return await self.orgs.geo_search_radius(
                 lat=float(q.lat),
                 lon=float(q.lon),
                 radius_m=float(q.radius_m),
-                limit=limit,
-                offset=offset,
+                page=page,
             )
 
         return await self.orgs.geo_search_bbox(
@@ -74,6 +258,119 @@ class OrganizationsService:
             min_lon=float(q.min_lon),
             max_lat=float(q.max_lat),
             max_lon=float(q.max_lon),
-            limit=limit,
-            offset=offset,
+            page=page,
+        )
+
+    async def search(
+        self,
+        *,
+        name: str | None,
+        match: NameMatch,
+        activity_id: int | None,
+        include_descendants: bool,
+        building_id: int | None,
+        geo: GeoQuery,
+        page: PageParams,
+    ) -> Page[OrganizationGeoRow]:
+        if self.cache is not None:
+            geo = geo.quantized(get_settings().result_cache_coord_step)
+        radius, bbox = geo_filter(geo)
+        filters = OrganizationFilter(
+            name=normalize_name(name) if name is not None else None,
+            match=match,
+            activity_id=activity_id,
+            include_descendants=include_descendants,
+            building_id=building_id,
+            radius=radius,
+            bbox=bbox,
+        )
+        if filters == OrganizationFilter(match=match, include_descendants=include_descendants):
+            raise ValidationError(
+                message="Specify at least one of name, activity_id, building_id or a geo filter",
+                code="SEARCH_FILTER_REQUIRED",
+            )
+
+        if activity_id is not None:
+            taxonomy = await self.taxonomy.get(self.acts)
+            if activity_id not in taxonomy.rows:
+                return self.orgs.empty_search(filters=filters, page=page)
+
+        async def load() -> Page[OrganizationGeoRow]:
+            return await self.orgs.search(filters=filters, page=page)
+
+        if self.cache is None:
+            return await load()
+        tables = ["organizations"]
+        if activity_id is not None:
+            tables += ["organization_activities", "activities"]
+        if radius is not None or bbox is not None:
+            tables.append("buildings")
+        return await self.cache.get_or_load(
+            self.orgs.session,
+            key=("organizations.combined", filters, page),
+            tables=tables,
+            load=load,
         )
+
+    async def clusters(
+        self,
+        *,
+        q: GeoQuery,
+        zoom: int,
+        activity_id: int | None,
+        include_descendants: bool,
+    ) -> ClusterSet:
+        if not q.is_bbox or q.min_lat >= q.max_lat or q.min_lon >= q.max_lon:  # type: ignore[operator]
+            raise ValidationError(
+                message="Specify a bbox (min_lat, min_lon, max_lat, max_lon) with min < max",
+                code="GEO_PARAMS_INVALID",
+            )
+
+        # the bbox is widened to whole cells: edge cells are complete, and
+        # nearby viewports at one zoom share a cache key
+        cell_deg = 360 / (2**zoom * CLUSTER_CELLS_PER_TILE)
+        lo_lat, hi_lat = math.floor(q.min_lat / cell_deg), math.ceil(q.max_lat / cell_deg)
+        lo_lon, hi_lon = math.floor(q.min_lon / cell_deg), math.ceil(q.max_lon / cell_deg)
+        if (hi_lat - lo_lat) * (hi_lon - lo_lon) > MAX_CLUSTER_CELLS:
+            raise ValidationError(
+                message=f"bbox spans more than {MAX_CLUSTER_CELLS} cells at zoom {zoom}; zoom in or narrow it",
+                code="CLUSTER_CELLS_EXCEEDED",
+            )
+        bbox = (lo_lat * cell_deg, lo_lon * cell_deg, hi_lat * cell_deg, hi_lon * cell_deg)
+
+        if activity_id is not None:
+            taxonomy = await self.taxonomy.get(self.acts)
+            if activity_id not in taxonomy.rows:
+                return ClusterSet(zoom=zoom, cell_deg=cell_deg, bbox=bbox, total=0, items=[])
+
+        async def load() -> ClusterSet:
+            items = await self.orgs.clusters(
+                bbox=bbox,
+                cell_deg=cell_deg,
+                activity_id=activity_id,
+                include_descendants=include_descendants,
+            )
+            return ClusterSet(
+                zoom=zoom,
+                cell_deg=cell_deg,
+                bbox=bbox,
+                total=sum(c.count for c in items),
+                items=items,
+            )
+
+        if self.cache is None:
+            return await load()
+        tables = ["organizations", "buildings"]
+        if activity_id is not None:
+            tables += ["organization_activities", "activities"]
+        return await self.cache.get_or_load(
+            self.orgs.session,
+            key=("organizations.clusters", bbox, zoom, activity_id, include_descendants),
+            tables=tables,
+            load=load,
+        )
+
+    async def nearest(
+        self, *, lat: float, lon: float, k: int, max_radius_m: float | None = None
+    ) -> list[OrganizationGeoRow]:
+        return await self.orgs.nearest(lat=lat, lon=lon, k=k, max_radius_m=max_radius_m)
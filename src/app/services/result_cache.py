@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, TypeVar, cast
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.db.versions import DatasetVersions, versions
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    invalidated: int = 0
+    evicted: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    expires_at: float
+    versions: tuple[int, ...]
+    value: Any
+
+
+def quantize(value: float, step: float) -> float:
+    """
+    Snaps a coordinate to a grid of `step` degrees (0 disables), so nearby map
+    views share cache entries.
+    """
+    if step <= 0:
+        return value
+    return round(round(value / step) * step, 9)
+
+
+class ResultCache:
+    """
+    Per-process TTL + LRU cache for read results.
+
+    Each entry remembers the dataset versions of the tables it was built from;
+    a version bump makes it stale on the next lookup, so writes invalidate
+    without any explicit purge. Swap the instance (see `get_result_cache`) to
+    plug in another backend with the same `get_or_load` contract.
+    """
+
+    def __init__(
+        self,
+        versions: DatasetVersions,
+        *,
+        max_entries: int,
+        ttl_s: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.versions = versions
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_load(
+        self,
+        session: AsyncSession,
+        *,
+        key: Hashable,
+        tables: Sequence[str],
+        load: Callable[[], Awaitable[T]],
+    ) -> T:
+        if self.max_entries <= 0 or self.ttl_s <= 0:
+            return await load()
+
+        snapshot = await self.versions.snapshot(session, tables)
+        current = tuple(snapshot[t] for t in tables)
+        now = self._clock()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.versions != current:
+                self.stats.invalidated += 1
+                del self._entries[key]
+            elif entry.expires_at <= now:
+                self.stats.expired += 1
+                del self._entries[key]
+            else:
+                self.stats.hits += 1
+                self._entries.move_to_end(key)
+                return cast(T, entry.value)
+
+        self.stats.misses += 1
+        value = await load()
+        self._entries[key] = _Entry(expires_at=now + self.ttl_s, versions=current, value=value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evicted += 1
+        return value
+
+
+@lru_cache
+def get_result_cache() -> ResultCache:
+    settings = get_settings()
+    return ResultCache(
+        versions,
+        max_entries=settings.result_cache_max_entries,
+        ttl_s=settings.result_cache_ttl_s,
+    )
+
+
+# Separate bound so map panning does not evict search results (and vice versa).
+@lru_cache
+def get_tile_cache() -> ResultCache:
+    settings = get_settings()
+    return ResultCache(
+        versions,
+        max_entries=settings.tile_cache_max_entries,
+        ttl_s=settings.tile_cache_ttl_s,
+    )
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+
+from app.db.versions import DatasetVersions, versions
+from app.repos.activities import ActivitiesRepo
+from app.repos.dto import ActivityRow
+
+
+@dataclass(slots=True)
+class ActivityNodeDTO:
+    id: int
+    name: str
+    parent_id: int | None
+    depth: int
+    children: list[ActivityNodeDTO]
+
+
+@dataclass(frozen=True, slots=True)
+class ActivityTaxonomy:
+    """
+    Immutable snapshot of the activity tree at one dataset version.
+    """
+
+    version: int
+    rows: dict[int, ActivityRow]
+    children: dict[int, tuple[int, ...]]
+    # root id -> ids of the root and all its descendants
+    descendants: dict[int, frozenset[int]]
+    # max_depth -> prebuilt tree
+    trees: dict[int, list[ActivityNodeDTO]]
+
+    @classmethod
+    def build(cls, version: int, rows: list[ActivityRow]) -> ActivityTaxonomy:
+        by_id = {a.id: a for a in rows}
+
+        children: dict[int, list[int]] = {a.id: [] for a in rows}
+        for a in rows:
+            if a.parent_id is not None and a.parent_id in children:
+                children[a.parent_id].append(a.id)
+        frozen_children = {k: tuple(sorted(v)) for k, v in children.items()}
+
+        descendants: dict[int, frozenset[int]] = {}
+
+        def collect(node_id: int) -> frozenset[int]:
+            found = descendants.get(node_id)
+            if found is None:
+                found = frozenset({node_id}).union(*(collect(c) for c in frozen_children[node_id]))
+                descendants[node_id] = found
+            return found
+
+        for a in rows:
+            collect(a.id)
+
+        max_depth = max((a.depth for a in rows), default=0)
+        trees = {d: _build_tree(rows, max_depth=d) for d in range(1, max_depth + 1)}
+
+        return cls(
+            version=version,
+            rows=by_id,
+            children=frozen_children,
+            descendants=descendants,
+            trees=trees,
+        )
+
+    def subtree_ids(self, root_id: int, *, max_depth: int | None = None) -> list[int]:
+        ids = self.descendants.get(root_id, frozenset())
+        if max_depth is not None:
+            ids = frozenset(i for i in ids if self.rows[i].depth <= max_depth)
+        return sorted(ids)
+
+    def tree(self, *, max_depth: int) -> list[ActivityNodeDTO]:
+        if not self.trees:
+            return []
+        return self.trees[min(max_depth, max(self.trees))]
+
+
+def _build_tree(items: list[ActivityRow], *, max_depth: int) -> list[ActivityNodeDTO]:
+    nodes: dict[int, ActivityNodeDTO] = {
+        a.id: ActivityNodeDTO(id=a.id, name=a.name, parent_id=a.parent_id, depth=a.depth, children=[])
+        for a in items
+        if a.depth <= max_depth
+    }
+
+    roots: list[ActivityNodeDTO] = []
+    for n in nodes.values():
+        if n.parent_id is None or n.parent_id not in nodes:
+            roots.append(n)
+        else:
+            nodes[n.parent_id].children.append(n)
+
+    def sort_tree(lst: list[ActivityNodeDTO]) -> None:
+        lst.sort(key=lambda x: x.id)
+        for x in lst:
+            sort_tree(x.children)
+
+    sort_tree(roots)
+    return roots
+
+
+class TaxonomyCache:
+    """
+    Per-process activity taxonomy, reloaded only when the `activities` version moves.
+    """
+
+    def __init__(self, versions: DatasetVersions) -> None:
+        self.versions = versions
+        self._snapshot: ActivityTaxonomy | None = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, repo: ActivitiesRepo) -> ActivityTaxonomy:
+        version = await self.versions.current(repo.session, "activities")
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            # version is read before the rows: a concurrent change can only make
+            # the snapshot newer than its label, which just triggers another reload
+            rows = await repo.list_all()
+            snapshot = ActivityTaxonomy.build(version, rows)
+            self._snapshot = snapshot
+            return snapshot
+
+
+taxonomy_cache = TaxonomyCache(versions)
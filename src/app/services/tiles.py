@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from app.core.errors import ValidationError
+from app.core.settings import get_settings
+from app.repos.activities import ActivitiesRepo
+from app.repos.organizations import OrganizationsRepo
+from app.services.result_cache import ResultCache
+from app.services.taxonomy import TaxonomyCache
+
+
+class TilesService:
+    def __init__(
+        self,
+        orgs: OrganizationsRepo,
+        acts: ActivitiesRepo,
+        taxonomy: TaxonomyCache,
+        cache: ResultCache | None = None,
+    ) -> None:
+        self.orgs = orgs
+        self.acts = acts
+        self.taxonomy = taxonomy
+        self.cache = cache
+
+    async def tile(self, *, z: int, x: int, y: int, activity_id: int | None, include_descendants: bool) -> bytes:
+        if not (0 <= x < 2**z and 0 <= y < 2**z):
+            raise ValidationError(message=f"Tile {z}/{x}/{y} is outside the zoom {z} grid", code="TILE_INVALID")
+
+        if activity_id is not None:
+            taxonomy = await self.taxonomy.get(self.acts)
+            if activity_id not in taxonomy.rows:
+                return b""
+
+        max_features = get_settings().tile_max_features
+
+        async def load() -> bytes:
+            return await self.orgs.tile(
+                z=z,
+                x=x,
+                y=y,
+                max_features=max_features,
+                activity_id=activity_id,
+                include_descendants=include_descendants,
+            )
+
+        if self.cache is None:
+            return await load()
+        tables = ["organizations", "buildings"]
+        if activity_id is not None:
+            tables += ["organization_activities", "activities"]
+        # entries carry the versions of `tables`: any write to them re-renders the tile
+        return await self.cache.get_or_load(
+            self.orgs.session,
+            key=("tiles.mvt", z, x, y, activity_id, include_descendants),
+            tables=tables,
+            load=load,
+        )
@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+import os
+
+# app.core.settings requires an API key; modules that build engines read settings on import
+os.environ.setdefault("API_KEY", "test-api-key")
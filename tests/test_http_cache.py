@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import http_cache
+from app.api.http_cache import conditional, etag_for, etag_matches
+from app.db.session import get_session
+from app.db.versions import DatasetVersions
+
+
+class StubVersions(DatasetVersions):
+    def __init__(self, **counters: int) -> None:
+        super().__init__()
+        self.counters = counters
+        self.snapshots = 0
+
+    async def snapshot(self, session: Any, names: Sequence[str]) -> dict[str, int]:
+        self.snapshots += 1
+        return {name: self.counters.get(name, 0) for name in names}
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "matches"),
+    [
+        ('W/"abc"', True),
+        ('"abc"', True),  # weak comparison ignores W/
+        ("*", True),
+        (' * ', True),
+        ('"x", W/"abc"', True),
+        ('"x",W/"abc" , "y"', True),
+        ('W/"abcd"', False),
+        ('"x", "y"', False),
+        ("", False),
+    ],
+)
+def test_etag_matches(if_none_match: str, matches: bool) -> None:
+    assert etag_matches(if_none_match, 'W/"abc"') is matches
+
+
+def test_etag_depends_on_versions_not_order() -> None:
+    assert etag_for({"a": 1, "b": 2}) == etag_for({"b": 2, "a": 1})
+    assert etag_for({"a": 1, "b": 2}) != etag_for({"a": 1, "b": 3})
+
+
+@pytest.fixture
+def stub_versions(monkeypatch: pytest.MonkeyPatch) -> StubVersions:
+    stub = StubVersions(organizations=3)
+    monkeypatch.setattr(http_cache, "versions", stub)
+    return stub
+
+
+@pytest.fixture
+def client(stub_versions: StubVersions) -> Iterator[tuple[TestClient, list[int]]]:
+    app = FastAPI()
+    calls: list[int] = []
+
+    @app.get("/items", dependencies=[conditional("organizations")])
+    async def items() -> dict[str, int]:
+        calls.append(1)
+        return {"n": len(calls)}
+
+    async def no_session() -> AsyncIterator[Any]:
+        yield None
+
+    app.dependency_overrides[get_session] = no_session
+    with TestClient(app) as c:
+        yield c, calls
+
+
+def test_first_request_gets_validator(client: tuple[TestClient, list[int]]) -> None:
+    c, calls = client
+    r = c.get("/items")
+
+    assert r.status_code == 200
+    assert r.headers["etag"] == etag_for({"organizations": 3})
+    assert "max-age=" in r.headers["cache-control"]
+    assert calls == [1]
+
+
+def test_matching_validator_is_304_without_running_the_route(
+    client: tuple[TestClient, list[int]],
+) -> None:
+    c, calls = client
+    etag = etag_for({"organizations": 3})
+
+    r = c.get("/items", headers={"If-None-Match": f'"other", {etag}'})
+
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+    assert r.content == b""
+    assert calls == []
+
+
+def test_version_bump_changes_validator(
+    client: tuple[TestClient, list[int]],
+    stub_versions: StubVersions,
+) -> None:
+    c, calls = client
+    old = c.get("/items").headers["etag"]
+    stub_versions.counters["organizations"] = 4
+
+    r = c.get("/items", headers={"If-None-Match": old})
+
+    assert r.status_code == 200
+    assert r.headers["etag"] != old
+    assert len(calls) == 2
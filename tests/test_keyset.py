@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import math
+from itertools import product
+
+import pytest
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    Table,
+    bindparam,
+    create_engine,
+    insert,
+    select,
+)
+from sqlalchemy.dialects import postgresql
+
+from app.core.errors import ValidationError
+from app.repos.keyset import decode_cursor, encode_cursor, seek_after
+
+metadata = MetaData()
+rows_table = Table(
+    "rows",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("score", Float, nullable=False),
+)
+
+# distances/ranks as they come out of PostGIS and pg_trgm, with ties
+SCORES = [0.1, 0.2, 0.1 + 0.2, 1 / 3, 0.3, 0.3, 1e-9, 12345.678901234567, 0.0, 0.3, -2.5, 1 / 3]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [1],
+        [0, 0],
+        [-7, 2**53 + 1],
+        [0.1 + 0.2, 42],
+        [1 / 3, 7],
+        [1e-300, 1],
+        [-0.0, 3],
+        [12345.678901234567, 2**31],
+    ],
+)
+def test_cursor_round_trip(values: list[float]) -> None:
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    decoded = decode_cursor(cursor, size=len(values))
+    assert decoded == tuple(values)
+    # floats must come back bit-for-bit, or the seek skips or repeats rows
+    assert [type(v) for v in decoded] == [type(v) for v in values]
+    assert all(math.copysign(1, a) == math.copysign(1, b) for a, b in zip(decoded, values, strict=True))
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not base64!",
+        encode_cursor([1, 2]),  # wrong size
+        "eyJhIjoxfQ",  # {"a":1}
+        "WyJ4Il0",  # ["x"]
+        "W3RydWVd",  # [true]
+        "W251bGxd",  # [null]
+        "W1sxXV0",  # [[1]]
+    ],
+)
+def test_decode_cursor_rejects(cursor: str) -> None:
+    with pytest.raises(ValidationError) as e:
+        decode_cursor(cursor, size=1)
+    assert e.value.code == "CURSOR_INVALID"
+
+
+def test_uniform_direction_uses_row_comparison() -> None:
+    columns = [rows_table.c.score, rows_table.c.id]
+    values = [bindparam("seek_0"), bindparam("seek_1")]
+
+    asc = str(seek_after(columns, [False, False], values).compile(dialect=postgresql.dialect()))
+    desc = str(seek_after(columns, [True, True], values).compile(dialect=postgresql.dialect()))
+
+    assert asc == "(rows.score, rows.id) > (%(seek_0)s, %(seek_1)s)"
+    assert desc == "(rows.score, rows.id) < (%(seek_0)s, %(seek_1)s)"
+
+
+def test_mixed_direction_expands() -> None:
+    columns = [rows_table.c.score, rows_table.c.id]
+    values = [bindparam("seek_0"), bindparam("seek_1")]
+
+    sql = str(seek_after(columns, [True, False], values).compile(dialect=postgresql.dialect()))
+
+    assert sql == "rows.score < %(seek_0)s OR rows.score = %(seek_0)s AND rows.id > %(seek_1)s"
+
+
+@pytest.mark.parametrize("score_desc, id_desc", list(product([False, True], repeat=2)))
+def test_seek_walks_every_row_once(score_desc: bool, id_desc: bool) -> None:
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(rows_table), [{"id": i, "score": s} for i, s in enumerate(SCORES, start=1)])
+
+    columns = [rows_table.c.score, rows_table.c.id]
+    descending = [score_desc, id_desc]
+    after = [bindparam("seek_0", type_=Float), bindparam("seek_1", type_=Integer)]
+    order = [c.desc() if d else c.asc() for c, d in zip(columns, descending, strict=True)]
+    first = select(rows_table.c.id, rows_table.c.score).order_by(*order).limit(3)
+    following = first.where(seek_after(columns, descending, after))
+
+    expected = sorted(
+        enumerate(SCORES, start=1),
+        key=lambda r: (-r[1] if score_desc else r[1], -r[0] if id_desc else r[0]),
+    )
+
+    seen: list[int] = []
+    cursor: str | None = None
+    with engine.connect() as conn:
+        while True:
+            if cursor is None:
+                page = conn.execute(first).all()
+            else:
+                score, id_ = decode_cursor(cursor, size=2)
+                page = conn.execute(following, {"seek_0": score, "seek_1": id_}).all()
+            if not page:
+                break
+            seen += [r.id for r in page]
+            cursor = encode_cursor([page[-1].score, page[-1].id])
+
+    assert seen == [i for i, _ in expected]
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+import pytest
+from sqlalchemy import Column, Float, Integer, MetaData, Table, create_engine, insert, select
+from sqlalchemy.engine import Connection
+
+from app.core.errors import ValidationError
+from app.repos.base import Repo
+from app.repos.dto import PageParams, TotalMode
+from app.repos.keyset import SortKey, encode_cursor
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("score", Float, nullable=False),
+)
+
+N = 23
+STMT = select(items.c.id.label("id"), items.c.score.label("score"))
+
+
+class SyncSession:
+    """
+    The part of AsyncSession that Repo._paginate uses, over a sync SQLite connection.
+    """
+
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+        self.statements: list[str] = []
+
+    async def execute(self, stmt: Any, params: Mapping[str, Any] | None = None) -> Any:
+        self.statements.append(str(stmt))
+        return self.conn.execute(stmt, params or {})
+
+    async def scalar(self, stmt: Any, params: Mapping[str, Any] | None = None) -> Any:
+        self.statements.append(str(stmt))
+        return self.conn.execute(stmt, params or {}).scalar()
+
+
+class ItemsRepo(Repo):
+    async def page(self, *, keys: tuple[SortKey, ...], page: PageParams) -> Any:
+        return await self._paginate(STMT, keys=keys, page=page)
+
+
+@pytest.fixture
+def session() -> Any:
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        # three-way ties on score, so pages break inside a tie
+        conn.execute(insert(items), [{"id": i, "score": (i % 7) / 3} for i in range(1, N + 1)])
+    with engine.connect() as conn:
+        yield SyncSession(conn)
+
+
+def _expected(keys: tuple[SortKey, ...]) -> list[int]:
+    rows = [(i, (i % 7) / 3) for i in range(1, N + 1)]
+    by = {"id": 0, "score": 1}
+
+    def key(r: tuple[int, float]) -> tuple[float, ...]:
+        return tuple(-r[by[name]] if desc else r[by[name]] for name, desc in keys)
+
+    return [i for i, _ in sorted(rows, key=key)]
+
+
+@pytest.mark.parametrize(
+    "keys",
+    [
+        (("id", False),),
+        (("score", False), ("id", False)),
+        (("score", True), ("id", False)),
+        (("score", True), ("id", True)),
+    ],
+)
+async def test_cursor_pages_cover_the_set_once(session: SyncSession, keys: tuple[SortKey, ...]) -> None:
+    repo = ItemsRepo(session)  # type: ignore[arg-type]
+    seen: list[int] = []
+    cursor: str | None = None
+    while True:
+        page = await repo.page(keys=keys, page=PageParams(limit=5, cursor=cursor, total="exact"))
+        seen += [r.id for r in page.items]
+        assert page.total == N
+        assert page.has_more == (page.next_cursor is not None)
+        if not page.has_more:
+            break
+        cursor = page.next_cursor
+
+    assert seen == _expected(keys)
+
+
+async def test_offset_and_cursor_agree(session: SyncSession) -> None:
+    repo = ItemsRepo(session)  # type: ignore[arg-type]
+    keys: tuple[SortKey, ...] = (("score", True), ("id", False))
+
+    first = await repo.page(keys=keys, page=PageParams(limit=10, total="none"))
+    by_cursor = await repo.page(keys=keys, page=PageParams(limit=10, cursor=first.next_cursor, total="none"))
+    by_offset = await repo.page(keys=keys, page=PageParams(limit=10, offset=10, total="none"))
+
+    assert first.total is None
+    assert [r.id for r in by_cursor.items] == [r.id for r in by_offset.items]
+
+
+async def test_past_the_end(session: SyncSession) -> None:
+    repo = ItemsRepo(session)  # type: ignore[arg-type]
+    page = await repo.page(keys=(("id", False),), page=PageParams(limit=10, offset=100, total="exact"))
+
+    assert page.items == []
+    assert page.total == N
+    assert not page.has_more
+
+
+async def test_cursor_of_another_sort_is_rejected(session: SyncSession) -> None:
+    repo = ItemsRepo(session)  # type: ignore[arg-type]
+    first = await repo.page(keys=(("score", True), ("id", False)), page=PageParams(limit=5, total="none"))
+
+    with pytest.raises(ValidationError):
+        await repo.page(keys=(("id", False),), page=PageParams(limit=5, cursor=first.next_cursor))
+
+
+async def test_cursor_page_does_not_window_the_whole_set(session: SyncSession) -> None:
+    repo = ItemsRepo(session)  # type: ignore[arg-type]
+    keys: tuple[SortKey, ...] = (("score", True), ("id", False))
+    first = await repo.page(keys=keys, page=PageParams(limit=5, total="exact"))
+    assert len(session.statements) == 1
+    assert "OVER" in session.statements[0]
+
+    session.statements.clear()
+    await repo.page(keys=keys, page=PageParams(limit=5, cursor=first.next_cursor, total="none"))
+    assert len(session.statements) == 1
+    assert "OVER" not in session.statements[0]
+
+    # an exact total on a cursor page is a separate count, the page itself still seeks
+    session.statements.clear()
+    page = await repo.page(keys=keys, page=PageParams(limit=5, cursor=first.next_cursor, total="exact"))
+    assert page.total == N
+    assert len(session.statements) == 2
+    assert "OVER" not in session.statements[0]
+
+
+@pytest.mark.parametrize(("mode", "total"), [("exact", 0), ("estimate", 0), ("none", None)])
+def test_empty_page_follows_total_mode(session: SyncSession, mode: TotalMode, total: int | None) -> None:
+    repo = ItemsRepo(session)  # type: ignore[arg-type]
+    cursor = encode_cursor([7])
+    page = repo._empty_page(keys=(("id", False),), page=PageParams(limit=5, cursor=cursor, total=mode))
+
+    assert page.total == total
+    assert page.items == []
+    assert not page.has_more
+    assert session.statements == []
+
+
+def test_empty_page_still_validates_the_cursor(session: SyncSession) -> None:
+    repo = ItemsRepo(session)  # type: ignore[arg-type]
+
+    with pytest.raises(ValidationError):
+        repo._empty_page(keys=(("id", False),), page=PageParams(limit=5, cursor="not-a-cursor"))
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+from app.db.versions import DatasetVersions
+from app.services.result_cache import ResultCache
+
+# the stub versions never touch the session
+SESSION: Any = None
+
+
+class StubVersions(DatasetVersions):
+    def __init__(self, **counters: int) -> None:
+        super().__init__()
+        self.counters = counters
+
+    async def snapshot(self, session: Any, names: Sequence[str]) -> dict[str, int]:
+        return {name: self.counters.get(name, 0) for name in names}
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Loader:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        return self.calls
+
+
+def _cache(
+    versions: StubVersions,
+    *,
+    max_entries: int = 8,
+    ttl_s: float = 10.0,
+    clock: Clock | None = None,
+) -> ResultCache:
+    return ResultCache(versions, max_entries=max_entries, ttl_s=ttl_s, clock=clock or Clock())
+
+
+async def _get(cache: ResultCache, key: str, load: Loader) -> int:
+    return await cache.get_or_load(SESSION, key=key, tables=("organizations",), load=load)
+
+
+async def test_hit_within_ttl_and_expiry_after() -> None:
+    clock = Clock()
+    cache = _cache(StubVersions(organizations=1), ttl_s=10.0, clock=clock)
+    load = Loader()
+
+    assert await _get(cache, "a", load) == 1
+    clock.now = 9.9
+    assert await _get(cache, "a", load) == 1
+    clock.now = 10.0
+    assert await _get(cache, "a", load) == 2
+
+    assert (cache.stats.misses, cache.stats.hits, cache.stats.expired) == (2, 1, 1)
+
+
+async def test_evicts_least_recently_used_at_capacity() -> None:
+    cache = _cache(StubVersions(organizations=1), max_entries=2)
+    load = Loader()
+
+    await _get(cache, "a", load)
+    await _get(cache, "b", load)
+    await _get(cache, "a", load)  # "b" is now the least recently used
+    await _get(cache, "c", load)
+
+    assert len(cache) == 2
+    assert cache.stats.evicted == 1
+    calls = load.calls
+    await _get(cache, "a", load)
+    assert load.calls == calls
+    await _get(cache, "b", load)
+    assert load.calls == calls + 1
+
+
+async def test_version_bump_invalidates() -> None:
+    versions = StubVersions(organizations=1)
+    cache = _cache(versions)
+    load = Loader()
+
+    assert await _get(cache, "a", load) == 1
+    versions.counters["organizations"] = 2
+    assert await _get(cache, "a", load) == 2
+    assert await _get(cache, "a", load) == 2
+
+    assert cache.stats.invalidated == 1
+
+
+async def test_disabled_cache_always_loads() -> None:
+    cache = _cache(StubVersions(), max_entries=0)
+    load = Loader()
+
+    await _get(cache, "a", load)
+    await _get(cache, "a", load)
+
+    assert load.calls == 2
+    assert len(cache) == 0
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.db.versions import DatasetVersions
+from app.repos.activities import ActivitiesRepo
+from app.repos.dto import ActivityRow
+from app.services.taxonomy import ActivityTaxonomy, TaxonomyCache
+
+# Food (1)
+#   Meat (2)
+#     Sausages (4)
+#   Dairy (3)
+# Cars (5)
+#   Parts (6)
+ROWS = [
+    ActivityRow(id=1, name="Food", parent_id=None, depth=1),
+    ActivityRow(id=2, name="Meat", parent_id=1, depth=2),
+    ActivityRow(id=3, name="Dairy", parent_id=1, depth=2),
+    ActivityRow(id=4, name="Sausages", parent_id=2, depth=3),
+    ActivityRow(id=5, name="Cars", parent_id=None, depth=1),
+    ActivityRow(id=6, name="Parts", parent_id=5, depth=2),
+]
+
+
+class StubVersions(DatasetVersions):
+    def __init__(self, activities: int) -> None:
+        super().__init__()
+        self.activities = activities
+
+    async def current(self, session: Any, name: str) -> int:
+        assert name == "activities"
+        return self.activities
+
+
+class StubRepo(ActivitiesRepo):
+    def __init__(self, rows: list[ActivityRow]) -> None:
+        super().__init__(session=None)  # type: ignore[arg-type]
+        self.rows = rows
+        self.loads = 0
+
+    async def list_all(self, *, max_depth: int = 3) -> list[ActivityRow]:
+        self.loads += 1
+        return list(self.rows)
+
+
+def test_subtree_expansion() -> None:
+    taxonomy = ActivityTaxonomy.build(1, ROWS)
+
+    assert taxonomy.subtree_ids(1) == [1, 2, 3, 4]
+    assert taxonomy.subtree_ids(2) == [2, 4]
+    assert taxonomy.subtree_ids(4) == [4]
+    assert taxonomy.subtree_ids(1, max_depth=2) == [1, 2, 3]
+    assert taxonomy.subtree_ids(99) == []
+
+
+def test_tree_is_cut_at_max_depth() -> None:
+    taxonomy = ActivityTaxonomy.build(1, ROWS)
+
+    roots = taxonomy.tree(max_depth=2)
+    assert [r.id for r in roots] == [1, 5]
+    assert [c.id for c in roots[0].children] == [2, 3]
+    assert roots[0].children[0].children == []
+
+    # deeper than the data: the full tree
+    full = taxonomy.tree(max_depth=10)
+    assert [c.id for c in full[0].children[0].children] == [4]
+
+
+async def test_cache_rebuilds_only_on_version_change() -> None:
+    versions = StubVersions(activities=1)
+    cache = TaxonomyCache(versions)
+    repo = StubRepo(ROWS)
+
+    first = await cache.get(repo)
+    assert await cache.get(repo) is first
+    assert repo.loads == 1
+
+    repo.rows = [*ROWS, ActivityRow(id=7, name="Cheese", parent_id=3, depth=3)]
+    versions.activities = 2
+    second = await cache.get(repo)
+
+    assert repo.loads == 2
+    assert second.version == 2
+    assert second.subtree_ids(1) == [1, 2, 3, 4, 7]